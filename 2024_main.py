@@ -1,6 +1,8 @@
 import argparse
 import time
-from Kraken import KrakenInterface
+from startup_profile import StartupProfiler
+
+# Everything heavy is imported in main(), after the serial ports are open
 
 
 # rough framerate, should be slightly higher due to render time
@@ -14,7 +16,8 @@ parser = argparse.ArgumentParser(description=msg)
 parser.add_argument(
     "port_1",
     type=str,
-    help="Connected XBee or Arduino COM port",
+    nargs="?",
+    help="Connected XBee or Arduino COM port, can be left out with --auto",
 )
 
 parser.add_argument(
@@ -24,6 +27,18 @@ parser.add_argument(
     help="Another connected XBee or Arduino COM port",
 )
 
+parser.add_argument(
+    "--auto",
+    action="store_true",
+    help="Find the Kraken ports by listening to every serial port",
+)
+
+parser.add_argument(
+    "--workers",
+    action="store_true",
+    help="Read and decode each serial port in its own process",
+)
+
 parser.add_argument(
     "-f",
     "--fullscreen",
@@ -31,22 +46,149 @@ parser.add_argument(
     help="Launch interface in full screen mode (borderless)",
 )
 
+parser.add_argument(
+    "--profile-startup",
+    action="store_true",
+    help="Print how long imports and each startup stage took",
+)
+
+parser.add_argument(
+    "--default-gc",
+    action="store_true",
+    help="Leave garbage collection alone instead of freezing startup objects and "
+    "running full collections between frames",
+)
+
+parser.add_argument(
+    "--resume",
+    action="store_true",
+    help="Bring back the telemetry and UI state saved by the last run",
+)
+
+parser.add_argument(
+    "--snapshot",
+    type=str,
+    default="kraken.snapshot",
+    metavar="FILE",
+    help="Where the state gets saved for --resume (default kraken.snapshot)",
+)
+
+parser.add_argument(
+    "--publish",
+    type=int,
+    metavar="PORT",
+    help="Rebroadcast telemetry to remote viewers over TCP on PORT",
+)
+
+parser.add_argument(
+    "--alarms",
+    type=str,
+    metavar="FILE",
+    help="JSON list of threshold alarm rules to check every sample against",
+)
+
+parser.add_argument(
+    "--callouts",
+    nargs="?",
+    const="auto",
+    choices=("auto", "pyttsx3", "espeak", "none"),
+    metavar="ENGINE",
+    help="Read flight stats, altitude and alarms out loud, with pyttsx3, espeak "
+    "or none (default: whichever is installed)",
+)
+
 args = parser.parse_args()
 
 
 def main(args):
+    profiler = StartupProfiler(args.profile_startup)
+
+    # Staged startup: get the ports open and recording before the GUI is even
+    # imported, whatever arrives while booting gets replayed once it's up
+    from PotatoLink import EarlyLinks
+    from Kraken import protocol
+
+    baudrates = {}
+    if args.port_1 is None:
+        if not args.auto:
+            parser.error("port_1 is required, or --auto to find it")
+
+        from PotatoLink import discover, matching
+
+        results = discover(exclude=(args.port_2,))
+        for result in results:
+            print(result)
+        found = matching(results, "Kraken")
+        if not found:
+            parser.error("--auto didn't find Kraken on any serial port")
+        args.port_1 = found[0].port
+        if args.port_2 is None and len(found) > 1:
+            args.port_2 = found[1].port
+        baudrates = {result.port: result.baudrate for result in found}
+        profiler.mark("ports discovered", f"{args.port_1} {args.port_2}")
+
+    early = EarlyLinks(args.workers)
+    for port in (args.port_1, args.port_2):
+        if port is not None:
+            early.open(port, baudrates.get(port, 9600), protocol.decode_frame)
+    # Ingest, publisher and callouts run from here on, so everything after has to
+    # stop them again, also if building the GUI fails
+    publisher = callouts = snapshot = ui = None
+    try:
+        if args.publish is not None:
+            from PotatoLink import TelemetryPublisher
 
-    ui = KrakenInterface(
-        "Kraken Control Panel",
-        1280,
-        720,
-        args.port_1,
-        args.port_2,
-        framerate=FRAMERATE,
-        fullscreen=args.fullscreen,
-    )
+            publisher = TelemetryPublisher(port=args.publish)
+            early.publish(publisher)
+            publisher.start()
+
+        if args.callouts is not None:
+            from PotatoLink import CalloutService, speech_backend
+
+            callouts = CalloutService(speech_backend(args.callouts))
+            callouts.start()
+
+        alarms = None
+        if args.alarms is not None:
+            from PotatoLink import AlarmEngine, load_rules
+
+            alarms = AlarmEngine(load_rules(args.alarms))
+            early.check_alarms(alarms)
+
+        early.start()
+        profiler.mark("serial ports open")
+
+        from Kraken import KrakenInterface
+
+        profiler.mark("GUI imported")
+
+        from PotatoUI import SessionSnapshot
+
+        snapshot = SessionSnapshot(args.snapshot, resume=args.resume)
+
+        ui = KrakenInterface(
+            "Kraken Control Panel",
+            1280,
+            720,
+            args.port_1,
+            args.port_2,
+            framerate=FRAMERATE,
+            fullscreen=args.fullscreen,
+            early=early,
+            snapshot=snapshot,
+            alarms=alarms,
+            callouts=callouts,
+        )
+        snapshot.start()
+        profiler.mark("GUI ready", f"replayed {early.replayed} early frames")
+
+        ui.update_gui()
+        profiler.mark("first frame drawn")
+        profiler.report()
+
+        if not args.default_gc:
+            ui.enable_gc_control()
 
-    try:
         while not ui.should_close:
             ui.update_gui()
 
@@ -54,7 +196,15 @@ def main(args):
         pass
 
     finally:
-        ui.shutdown_gui()
+        if ui is not None:
+            ui.shutdown_gui()
+        if snapshot is not None:
+            snapshot.stop()
+        early.stop()
+        if publisher is not None:
+            publisher.stop()
+        if callouts is not None:
+            callouts.stop()
 
 
 if __name__ == "__main__":
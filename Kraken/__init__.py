@@ -1 +1,10 @@
-from .interface import KrakenInterface
+# The interface pulls in the whole GUI stack, so it's only imported when asked for.
+# That keeps the protocol cheap to import early in startup and in ingest workers.
+
+
+def __getattr__(name):
+    if name == "KrakenInterface":
+        from .interface import KrakenInterface
+
+        return KrakenInterface
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
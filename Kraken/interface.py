@@ -1,13 +1,24 @@
+from __future__ import annotations
 from collections import deque
 from threading import Thread
+import logging
 import time
 
 import msgspec
 import serial
 from imgui_bundle import imgui, implot, imgui_ctx
-from PotatoUI import MainInterface
+from PotatoUI import MainInterface, UplinkWindow, LinkQualityWindow
+from PotatoUI import AlarmBanner, AlarmWindow
+from PotatoUI import RingSection, SessionSnapshot, StateSection
+from PotatoLink import UplinkScheduler, UplinkCommand, Priority, LinkStats
+from PotatoLink import WRITE_TIMEOUT_S, write_all
+from PotatoLink import IngestEngine, SerialLink, ProcessIngestEngine, WorkerLink
+from PotatoLink import AlarmEngine, EarlyLinks
+from PotatoLink import AltitudeCallout, CalloutService, alarm_listener
+from PotatoLink.workers import KIND_COL, VALUES_COL
 
 from . import windows
+from . import protocol
 
 
 class KrakenState(msgspec.Struct):
@@ -16,6 +27,17 @@ class KrakenState(msgspec.Struct):
     motor_power: float = 0.0
     temperature: float = 0.0
     sail_heartbeat: float = 0.0
+    # Bumped on every update so the UI can tell when it needs to redo things
+    version: int = 0
+
+
+class KrakenSnapshot(msgspec.Struct):
+    """Everything ``--resume`` brings back, besides the plots"""
+
+    start_time: float
+    state: KrakenState
+    serial_text: list[str]
+    message_text: list[str]
 
 
 class KrakenInterface(MainInterface):
@@ -35,76 +57,219 @@ class KrakenInterface(MainInterface):
         font_path=None,
         font_size=14,
         scaling_factor=1,
+        ingest: IngestEngine | ProcessIngestEngine | None = None,
+        ingest_workers=False,
+        early: EarlyLinks | None = None,
+        snapshot: SessionSnapshot | None = None,
+        alarms: AlarmEngine | None = None,
+        callouts: CalloutService | None = None,
         **kwargs,
     ):
         """
         this is all probably over-complicated tbh
+
+        Pass in an ``ingest`` engine to share one reader thread with other
+        interfaces, otherwise this makes its own. With ``ingest_workers`` the one it
+        makes reads and decodes each port in a separate process.
+
+        Ports in ``early`` were opened before the GUI (staged startup), they're
+        taken over along with their ingest engine and whatever they recorded.
+
+        State gets saved to ``snapshot`` (and restored from it first, if it's
+        resuming).
+
+        Alarms from ``alarms`` on either port get flashed on screen and written to
+        the message console.
+
+        Altitude and alarms get read out loud through ``callouts``.
         """
 
-        # Set up data storage
-        self.state = KrakenState()
-        self.start_time = time.time()
-        self.current_time = 0.0
+        self.init_data(name, serial_port_1, serial_port_2, early, alarms, callouts)
 
         super().__init__(
             name, width, height, font_path, font_size, scaling_factor, **kwargs
         )
+        self.send_heartbeat = True
 
-        self.plot_context = implot.create_context()
+        if alarms is not None:
+            alarms.on_event(alarm_listener(self.ports, self.alarm_message, callouts))
 
-        # Cool deque to store previously-received data for serial monitor
-        self.serial_text = deque([], maxlen=self.MESSAGE_STORE_CAP)
-        self.message_text = deque([], maxlen=self.MESSAGE_STORE_CAP)
-        self.read_serial = True
-        self.send_heartbeat = True
+        # Before connecting, so anything replayed from early links lands on top
+        if snapshot is not None:
+            snapshot.add(self.snapshot_sections())
 
-        # Make the serial connections
-        self.serial_1 = serial.Serial(
-            serial_port_1, baudrate, timeout=self.SERIAL_TIMEOUT_S, write_timeout=0
-        )
-        self.listen_thread_1 = Thread(target=self.serial_listen, args=(self.serial_1,))
+        self.owns_ingest = ingest is None
+        if ingest is None and early is not None:
+            ingest = early.ingest
+        elif ingest is None:
+            ingest = ProcessIngestEngine() if ingest_workers else IngestEngine()
+        self.ingest = ingest
+
+        # Make the serial connections. In worker mode the port is opened in the worker
+        # process, and serial_1/serial_2 are WorkerLinks that forward writes to it.
+        self.serial_1 = self.connect(serial_port_1, baudrate, self.link_stats[0])
         self.heartbeat_thread = Thread(target=self.heartbeat)
 
         self.has_serial_2 = serial_port_2 is not None
 
         if serial_port_2:
-            self.serial_2 = serial.Serial(
-                serial_port_2, baudrate, timeout=self.SERIAL_TIMEOUT_S, write_timeout=0
-            )
-            self.listen_thread_2 = Thread(
-                target=self.serial_listen, args=(self.serial_2,)
-            )
+            self.serial_2 = self.connect(serial_port_2, baudrate, self.link_stats[1])
 
         # Start da threads
-        self.listen_thread_1.start()
+        self.uplink.start()
+        if self.owns_ingest and not self.ingest.running:
+            self.ingest.start()
         # self.heartbeat_thread.start()
 
+    def init_data(
+        self,
+        name: str,
+        serial_port_1,
+        serial_port_2=None,
+        early: EarlyLinks | None = None,
+        alarms: AlarmEngine | None = None,
+        callouts: CalloutService | None = None,
+    ):
+        """
+        Everything the data handling needs, without the GUI or opening any ports.
+        The benchmarks build their interfaces with just this, so whatever
+        ``handle_frame()`` and the windows use has to be set up here.
+        """
+        # Set up data storage
+        self.state = KrakenState()
+        self.start_time = time.time()
+        self.current_time = 0.0
+
+        # Commands get written from here instead of the UI thread
+        self.uplink = UplinkScheduler(self.write_serial, self.uplink_status)
+
+        self.early = early
+        self.alarms = alarms
+        self.ports = [port for port in (serial_port_1, serial_port_2) if port]
+        self.callouts = callouts
+        self.altitude_callout = (
+            AltitudeCallout(callouts, f"{name}/altitude")
+            if callouts is not None
+            else None
+        )
+        stats_for = early.stats if early is not None else LinkStats
+        self.link_stats = [stats_for(serial_port_1)]
         if serial_port_2:
-            self.listen_thread_2.start()
+            self.link_stats.append(stats_for(serial_port_2))
+
+        # Cool deque to store previously-received data for serial monitor
+        self.serial_text = deque([], maxlen=self.MESSAGE_STORE_CAP)
+        self.message_text = deque([], maxlen=self.MESSAGE_STORE_CAP)
+
+    def connect(
+        self, port: str, baudrate: int, stats: LinkStats
+    ) -> serial.Serial | WorkerLink:
+        if self.early is not None and port in self.early:
+            # Already open, catch up on whatever arrived while the GUI was starting
+            self.early.attach(
+                port, self.handle_frame, self.handle_rows, self.handle_text
+            )
+            return self.early.conn(port)
+
+        if self.ingest.out_of_process:
+            link = WorkerLink(
+                port,
+                baudrate,
+                protocol.decode_frame,
+                self.handle_rows,
+                self.handle_text,
+                stats,
+                num_values=1,
+            )
+            self.ingest.add_link(link)
+            return link
+
+        conn = serial.Serial(
+            port,
+            baudrate,
+            timeout=self.SERIAL_TIMEOUT_S,
+            write_timeout=WRITE_TIMEOUT_S,
+        )
+        self.ingest.add_link(SerialLink(port, conn, self.handle_frame, stats))
+        return conn
+
+    def snapshot_sections(self) -> list[StateSection | RingSection]:
+        sections = [
+            StateSection(
+                f"{self.name}/state",
+                self.snapshot_state,
+                self.restore_state,
+                KrakenSnapshot,
+            )
+        ]
+        # Restored after the state, which puts the time base back first
+        for series in self.plot_window.series:
+            sections.append(RingSection(f"{self.name}/plot/{series.label}", series))
+        return sections
+
+    def snapshot_state(self) -> KrakenSnapshot:
+        # Runs on the snapshot thread
+        return KrakenSnapshot(
+            self.start_time,
+            self.state,
+            list(self.serial_text),
+            list(self.message_text),
+        )
+
+    def restore_state(self, snapshot: KrakenSnapshot):
+        # Same time base as before, so the plots carry on where they stopped
+        self.start_time = snapshot.start_time
+        self.current_time = time.time() - self.start_time
+        self.state = snapshot.state
+        self.serial_text.extend(snapshot.serial_text)
+        self.message_text.extend(snapshot.message_text)
+        self.plot_window.last_graph_update = self.current_time
+        self.serial_window.just_updated = True
 
     def setup_gui(self) -> None:
         self.serial_window = windows.SerialWindow(self.io, self)
         self.button_panel = windows.ButtonPanel(self.io, self)
         self.plot_window = windows.PlotWindow(self.io, self)
         self.motor_debugger = windows.MotorTesterWindow(self.io, self)
+        self.uplink_window = UplinkWindow(self.io, self.uplink, scope=self.workspace_id)
+        self.link_window = LinkQualityWindow(
+            self.io, self.link_stats, scope=self.workspace_id
+        )
+        self.alarm_window = self.alarm_banner = None
+        if self.alarms is not None:
+            self.alarm_window = AlarmWindow(
+                self.io, self.alarms, self.ports, scope=self.workspace_id
+            )
+            self.alarm_banner = AlarmBanner(
+                self.io, self.alarms, self.ports, scope=self.workspace_id
+            )
         self.first = True
 
+    def tick(self):
+        self.current_time = time.time() - self.start_time
+
     def draw(self) -> None:
         # Draw the background logo and version stuff
         super().draw()
 
-        self.current_time = time.time() - self.start_time
+        self.tick()
 
-        display_size = self.io.display_size
+        # Pick up anything the ingest workers decoded (no-op for the threaded engine)
+        self.ingest.poll()
+
+        workspace_size = self.workspace_size
 
         imgui.set_next_window_size((280, 500), imgui.Cond_.once)
         imgui.set_next_window_pos(
-            (0 * display_size.x, 0.5 * display_size.y),
+            self.workspace_point(0.0, 0.5),
             imgui.Cond_.once,
             (0.0, 0.5),
         )
-        node_id = imgui.get_id("dashboard_dockspace")
-        with imgui_ctx.begin("Dashboard", flags=imgui.WindowFlags_.no_docking):
+        node_id = imgui.get_id(f"{self.workspace_id}dashboard_dockspace")
+        with imgui_ctx.begin(
+            f"Dashboard###{self.workspace_id}/Dashboard",
+            flags=imgui.WindowFlags_.no_docking,
+        ):
             imgui.dock_space(node_id, (0, 0))
 
         if self.first:
@@ -113,70 +278,93 @@ class KrakenInterface(MainInterface):
                 node_id, flags=imgui.DockNodeFlags_.no_docking_split
             )
 
-            imgui.internal.dock_builder_dock_window("Motor Tester", node_id)
-            imgui.internal.dock_builder_dock_window("Serial Console", node_id)
+            imgui.internal.dock_builder_dock_window(self.motor_debugger.name, node_id)
+            imgui.internal.dock_builder_dock_window(self.serial_window.name, node_id)
+            imgui.internal.dock_builder_dock_window(self.uplink_window.name, node_id)
+            imgui.internal.dock_builder_dock_window(self.link_window.name, node_id)
+            if self.alarm_window is not None:
+                imgui.internal.dock_builder_dock_window(self.alarm_window.name, node_id)
             imgui.internal.dock_builder_finish(node_id)
             self.first = False
 
         self.serial_window.draw_window()
         self.motor_debugger.draw_window()
+        self.uplink_window.draw_window()
+        self.link_window.draw_window()
+        if self.alarm_window is not None:
+            self.alarm_window.draw_window()
 
         imgui.set_next_window_pos(
-            (1 * display_size.x, 0 * display_size.y),
+            self.workspace_point(1.0, 0.0),
             imgui.Cond_.always,
             (1.0, 0.0),
         )
         self.button_panel.draw_window()
 
-        imgui.set_next_window_size((0.55 * display_size.x, -1), imgui.Cond_.always)
+        imgui.set_next_window_size((0.55 * workspace_size.x, -1), imgui.Cond_.always)
         imgui.set_next_window_pos(
-            (0.5 * display_size.x, 0.04 * display_size.y),
+            self.workspace_point(0.5, 0.04),
             imgui.Cond_.always,
             (0.5, 0.0),
         )
         self.plot_window.draw_window()
 
-    def serial_listen(self, serial_conn: serial.Serial):
+        if self.alarm_banner is not None:
+            imgui.set_next_window_pos(
+                self.workspace_point(0.5, 0.97),
+                imgui.Cond_.always,
+                (0.5, 1.0),
+            )
+            self.alarm_banner.draw_window()
+
+    def alarm_message(self, text: str):
+        # Runs on whichever thread checked the rows
+        self.message_text.append(text)
+        self.serial_window.just_updated = True
+
+    def handle_frame(self, data: bytes):
         """
-        Listen thread for incoming data from the xbee/arduino
+        Called from the ingest thread for every semicolon-separated frame from the
+        xbee/arduino (with the semicolon already removed).
 
         To avoid all kinds of newline wackiness, we use semicolons to separate data.
         Since it's just a regular ascii character it's less prone to silliness from
         protocols and such
 
         """
-        while self.read_serial:
-            data = self._readline(serial_conn, b";")
+        # Echoing disabled as this is not needed atm
+        # # Echo to the other serial (so the latch and SAIL both receive stuff the other sent)
+        # if serial_conn is self.serial_1:
+        #     self.serial_2.write(data)
+        # else:
+        #     self.serial_1.write(data)
 
-            if data == b"":
-                continue
+        self.handle_text(data.decode("ascii", errors="ignore"))
 
-            if data == b";":
-                continue
-
-            # Echoing disabled as this is not needed atm
-            # # Echo to the other serial (so the latch and SAIL both receive stuff the other sent)
-            # if serial_conn is self.serial_1:
-            #     self.serial_2.write(data)
-            # else:
-            #     self.serial_1.write(data)
-
-            data = data.decode("ascii", errors="ignore")
+    def handle_text(self, data: str):
+        # Do stuff with data
+        self.serial_text.append(f"{data}\n")
+        self.serial_window.just_updated = True
 
-            # Remove the semicolon
-            data = data[:-1]
+        # Errors get counted and logged by the ingest engine
+        self.process_data(data)
 
-            # Do stuff with data
-            self.serial_text.append(f"{data}\n")
-            self.serial_window.just_updated = True
-            try:
-                self.process_data(data)
-            except Exception as e:
-                print(e)
-                print(f"Error on processing data {data}")
-
-            # Avoid hogging thread time
-            time.sleep(0.0001)
+    def handle_rows(self, rows):
+        """
+        Called from the UI thread with rows decoded by an ingest worker. These are
+        views into shared memory, so only the values are kept.
+        """
+        for kind, value in zip(rows[:, KIND_COL], rows[:, VALUES_COL]):
+            kind = int(kind)
+            setattr(self.state, protocol.STATE_FIELDS[kind], float(value))
+            self.serial_text.append(f"{protocol.KEYS[kind]} {value:.3f}\n")
+
+        if self.altitude_callout is not None:
+            self.altitude_callout.update(self.state.altitude)
+        # Set the heartbeat since received from sail
+        self.state.sail_heartbeat = self.current_time
+        self.state.version += 1
+        self.serial_window.just_updated = True
 
     def process_data(self, data: str):
         if data.startswith("ALT "):
@@ -184,6 +372,8 @@ class KrakenInterface(MainInterface):
             self.state.altitude = alt
             # Set the heartbeat since received from sail
             self.state.sail_heartbeat = self.current_time
+            if self.altitude_callout is not None:
+                self.altitude_callout.update(alt)
 
         elif data.startswith("MTR "):
             power = float(data.split()[1])
@@ -213,51 +403,79 @@ class KrakenInterface(MainInterface):
             self.message_text.append(f"{data[4:]}\n")
             self.serial_window.just_updated = True
 
-    def _readline(self, serial: serial.Serial, eol: bytes) -> bytes:
-        """
-        Taken almost wholesale from
-        https://stackoverflow.com/questions/16470903/pyserial-2-6-specify-end-of-line-in-readline
-
-        Modified so it actually blocks until fully read incoming data rather than receiving a
-        half-finished string because the incoming stream paused
-        """
+        elif data.startswith("ACK "):
+            self.uplink.acknowledge(data[4:])
 
-        leneol = len(eol)
-        line = bytearray()
-        while self.read_serial:
-            c = serial.read(1)
-            line += c
-            if line[-leneol:] == eol:
-                break
-
-        return bytes(line)
+        self.state.version += 1
 
     def heartbeat(self):
         while self.send_heartbeat:
-            self.send_data("heartbeat")
+            self.send_data("heartbeat", Priority.LOW)
             time.sleep(2.100)
 
-    def send_data(self, data: str):
+    def send_data(
+        self, data: str, priority: Priority = Priority.NORMAL, needs_ack: bool = False
+    ) -> UplinkCommand:
         """
-        Function to send data to both of the serial ports.
+        Function to queue data to be sent to both of the serial ports.
         Will append a semicolon at the end, so you don't need to add one ahead of time.
         Also updates the serial monitor.
 
+        The actual write happens on the uplink thread, so this is safe to call from
+        the UI.
+
         Args:
             data (str): Input data to send
+            priority (Priority): Higher priority commands skip ahead in the queue
+            needs_ack (bool): Resend until the payload replies with ``ACK <data>``
+
+        Returns:
+            UplinkCommand: Handle for checking if the command landed
         """
-        self.serial_1.write((data + ";").encode("ascii"))
-        if self.has_serial_2:
-            self.serial_2.write((data + ";").encode("ascii"))
+        command = self.uplink.submit(data, priority, needs_ack)
 
         self.serial_window.just_updated = True
         self.serial_text.append(f"{data}\n")
         self.message_text.append(f"{data}\n")
 
+        return command
+
+    def write_serial(self, data: str):
+        # Runs on the uplink thread
+        frame = (data + ";").encode("ascii")
+        conns = [self.serial_1, self.serial_2] if self.has_serial_2 else [self.serial_1]
+
+        # Each port on its own, a retry because one port failed would send it
+        # twice on the other. So it's only a failed write when no port took it.
+        errors = []
+        for conn in conns:
+            try:
+                write_all(conn, frame)
+            except (serial.SerialException, OSError) as e:
+                errors.append(e)
+        if len(errors) == len(conns):
+            raise errors[0]
+        for error in errors:
+            logging.error(
+                f"Uplink write of {data!r} only went out on one port: {error}"
+            )
+
+    def uplink_status(self, command: UplinkCommand):
+        if command.latency is not None:
+            latency_ms = command.latency * 1000
+            self.message_text.append(
+                f"{command.text}: {command.state.value} ({latency_ms:.0f}ms)\n"
+            )
+        else:
+            self.message_text.append(f"{command.text}: {command.state.value}!\n")
+        self.serial_window.just_updated = True
+
     def shutdown_gui(self):
         super().shutdown_gui()
-        self.read_serial = False
         self.send_heartbeat = False
+        self.uplink.stop()
+        if self.owns_ingest:
+            self.ingest.stop()
         self.serial_1.close()
         if self.has_serial_2:
             self.serial_2.close()
@@ -0,0 +1,28 @@
+# Decoding for the Kraken text protocol, kept free of GUI imports so it can run in
+# an ingest worker process
+
+# Numeric keys, the index is the row kind in the ingest ring
+KEYS = ("ALT", "MTR", "TEMP", "VELO")
+
+# KrakenState field each key updates
+STATE_FIELDS = ("altitude", "motor_power", "temperature", "velo_estimate")
+
+KEY_KINDS = {key: kind for kind, key in enumerate(KEYS)}
+
+# Row kind and value index of each field, for alarm rules
+FIELDS = {field: (kind, 0) for kind, field in enumerate(STATE_FIELDS)}
+
+
+def decode_frame(frame: bytes) -> tuple[int, tuple[float]] | str:
+    """
+    Numeric keys become (kind, (value,)), anything else (MSG, ACK, ...) is passed
+    through as text.
+    """
+    data = frame.decode("ascii", errors="ignore")
+    key, _, value = data.partition(" ")
+
+    kind = KEY_KINDS.get(key)
+    if kind is None:
+        return data
+
+    return kind, (float(value),)
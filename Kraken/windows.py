@@ -7,7 +7,10 @@ from imgui_bundle import imgui
 from imgui_bundle import imgui_ctx
 from imgui_bundle import implot
 
-from PotatoUI import GUIWindow
+from PotatoUI import GUIWindow, Readout, ReadoutPanel
+from PotatoUI import CursorReadout, DecimatedSeries, GpuSeries, PlotTimeRange
+from PotatoUI import DISTANCE_UNITS, SPEED_UNITS, TEMPERATURE_UNITS
+from PotatoLink import Priority
 
 if TYPE_CHECKING:
     from .interface import KrakenInterface
@@ -22,7 +25,7 @@ class SerialWindow(GUIWindow):
         closable: bool = False,
         flags=None,
     ) -> None:
-        super().__init__("Serial Console", io, closable, flags)
+        super().__init__("Serial Console", io, closable, flags, interface.workspace_id)
         self.interface = interface
         self.serial_input_text = ""
         self.just_sent = False
@@ -97,11 +100,21 @@ class ButtonPanel(GUIWindow):
         flags |= imgui.WindowFlags_.no_move
         flags |= imgui.WindowFlags_.no_bring_to_front_on_focus
 
-        super().__init__("ButtonPanel", io, closable, flags)
+        super().__init__("ButtonPanel", io, closable, flags, interface.workspace_id)
 
         self.interface = interface
         self.armed = False
 
+        # Click one to switch units
+        self.readouts = ReadoutPanel(
+            [
+                Readout("altitude", "Altitude: {:.1f}{unit}", DISTANCE_UNITS),
+                Readout("motor_power", "Motor power: {:.1f}%"),
+                Readout("velo_estimate", "Velocity Est.: {:.1f}{unit}", SPEED_UNITS),
+                Readout("temperature", "Temperature: {:.1f}{unit}", TEMPERATURE_UNITS),
+            ]
+        )
+
     def draw_contents(self):
         state = self.interface.state
 
@@ -143,10 +156,7 @@ class ButtonPanel(GUIWindow):
         # imgui.separator()
         # imgui.dummy(-1, -1)
 
-        imgui.text(f"Altitude: {state.altitude:.1f}m")
-        imgui.text(f"Motor power: {state.motor_power:.1f}%")
-        imgui.text(f"Velocity Est.: {state.velo_estimate:.1f}m/s")
-        imgui.text(f"Temperature: {state.temperature:.1f} \u00B0C")
+        self.readouts.draw(state)
 
         # imgui.separator()
         # imgui.dummy(-1, -1)
@@ -174,7 +184,9 @@ class ButtonPanel(GUIWindow):
                 with imgui_ctx.push_font(self.interface.bigger_icon_font):
                     deploy = imgui.button("\ue9b9###DeployButton", (200, 200))
                     if deploy:
-                        self.interface.send_data("deploy")
+                        self.interface.send_data(
+                            "deploy", Priority.CRITICAL, needs_ack=True
+                        )
 
                 with imgui_ctx.push_style_color(
                     imgui.Col_.button_hovered, imgui.ImVec4(0.9, 0.1, 0.0, 1.0)
@@ -186,7 +198,9 @@ class ButtonPanel(GUIWindow):
                     if kill_popup.visible:
                         imgui.text("Are you sure????")
                         if imgui.button("YESSS", (200, 200)):
-                            self.interface.send_data("kill")
+                            self.interface.send_data(
+                                "kill", Priority.CRITICAL, needs_ack=True
+                            )
                             imgui.close_current_popup()
                         if imgui.button("nah", (200, 200)):
                             imgui.close_current_popup()
@@ -204,11 +218,17 @@ class ButtonPanel(GUIWindow):
 
 
 class PlotWindow(GUIWindow):
-
-    MAX_PLOT_VALUES = 600
+    """
+    Altitude, velocity, motor power and temperature for the whole session. Both
+    plots share one time axis that follows the newest data until it's panned or
+    zoomed (see PlotTimeRange).
+    """
 
     PLOT_UPDATE_TIME_S = 0.1
 
+    # Per channel, almost 3 hours at one sample every PLOT_UPDATE_TIME_S
+    HISTORY_SAMPLES = 100_000
+
     def __init__(
         self,
         io: imgui._IO,
@@ -223,34 +243,39 @@ class PlotWindow(GUIWindow):
         flags |= imgui.WindowFlags_.always_auto_resize
         flags |= imgui.WindowFlags_.no_decoration
 
-        super().__init__("Plot Window", io, closable, flags)
+        super().__init__("Plot Window", io, closable, flags, interface.workspace_id)
         self.interface = interface
 
-        self.time_data = np.zeros(self.MAX_PLOT_VALUES, dtype=np.float32)
-        self.alt_data = np.zeros(self.MAX_PLOT_VALUES, dtype=np.float32)
-        self.motor_data = np.zeros(self.MAX_PLOT_VALUES, dtype=np.float32)
-        self.velo_estimates = np.zeros(self.MAX_PLOT_VALUES, dtype=np.float32)
-        self.temp_data = np.zeros(self.MAX_PLOT_VALUES, dtype=np.float32)
+        self.altitude = GpuSeries("Altitude", self.HISTORY_SAMPLES)
+        self.velocity = GpuSeries("Velocity", self.HISTORY_SAMPLES)
+        self.motor_power = GpuSeries("Motor Power", self.HISTORY_SAMPLES)
+        self.temperature = GpuSeries("Temperature", self.HISTORY_SAMPLES)
+        self.series = [self.altitude, self.velocity, self.motor_power, self.temperature]
 
-        self.offset_index = 0
-        self.num_values = 0
+        self.decimated = {
+            series.label: DecimatedSeries(series) for series in self.series
+        }
+        self.time_range = PlotTimeRange()
+        # Both plots show every channel at the cursor
+        self.readout = CursorReadout(self.series)
 
         self.last_graph_update = interface.current_time
 
     def update_data(self):
-        if self.offset_index == self.MAX_PLOT_VALUES:
-            self.offset_index = 0
-
-        self.time_data[self.offset_index] = self.interface.current_time
-        self.alt_data[self.offset_index] = self.interface.state.altitude
-        self.motor_data[self.offset_index] = self.interface.state.motor_power
-        self.velo_estimates[self.offset_index] = self.interface.state.velo_estimate
-        self.temp_data[self.offset_index] = self.interface.state.temperature
+        now = self.interface.current_time
+        state = self.interface.state
 
-        self.offset_index += 1
+        self.altitude.append(now, state.altitude)
+        self.velocity.append(now, state.velo_estimate)
+        self.motor_power.append(now, state.motor_power)
+        self.temperature.append(now, state.temperature)
 
-        if self.num_values < self.MAX_PLOT_VALUES:
-            self.num_values += 1
+    def plot(self, label: str, shaded: bool = False):
+        x, y = self.decimated[label].visible(*self.time_range.visible())
+        if shaded:
+            implot.plot_shaded(label, x, y)
+        else:
+            implot.plot_line(label, x, y)
 
     def draw_contents(self):
         time_since_update = self.interface.current_time - self.last_graph_update
@@ -259,48 +284,40 @@ class PlotWindow(GUIWindow):
             self.update_data()
             self.last_graph_update = self.interface.current_time
 
-        max_width = imgui.get_content_region_avail().x
+        self.time_range.draw_controls()
+        x_range = self.decimated["Altitude"].x_range()
 
+        # Only y fits itself, x is up to the time range
         axis_flags = implot.AxisFlags_.auto_fit
         plot_flags = implot.Flags_.crosshairs
+        subplot_flags = implot.SubplotFlags_.no_title
+        subplot_flags |= implot.SubplotFlags_.link_all_x
 
         implot.push_style_color(implot.Col_.plot_bg, (0, 0, 0, 0.1))
         implot.push_style_color(implot.Col_.frame_bg, (0, 0, 0, 0.1))
         implot.push_style_var(implot.StyleVar_.fill_alpha, 0.35)
 
-        if implot.begin_plot("###AltitudeVeloPlot", flags=plot_flags):
-            implot.setup_axes("", "", axis_flags, axis_flags)
-            implot.plot_shaded(
-                "Altitude",
-                self.time_data,
-                self.alt_data,
-                offset=self.offset_index,
-            )
-
-            implot.plot_line(
-                "Velocity",
-                self.time_data,
-                self.velo_estimates,
-                offset=self.offset_index,
-            )
-
-            implot.end_plot()
-
-        if implot.begin_plot("###MotorTempPlot", flags=plot_flags):
-            implot.setup_axes("Time", "", axis_flags, axis_flags)
-            implot.plot_line(
-                "Motor Power",
-                self.time_data,
-                self.motor_data,
-                offset=self.offset_index,
-            )
-            implot.plot_shaded(
-                "Temperature",
-                self.time_data,
-                self.temp_data,
-                offset=self.offset_index,
-            )
-            implot.end_plot()
+        size = (-1, 2 * implot.get_style().plot_default_size.y)
+        if implot.begin_subplots("###Plots", 2, 1, size, subplot_flags)[0]:
+            if implot.begin_plot("###AltitudeVeloPlot", flags=plot_flags):
+                implot.setup_axes("", "", 0, axis_flags)
+                self.time_range.setup(x_range)
+                self.plot("Altitude", shaded=True)
+                self.plot("Velocity")
+                self.readout.draw()
+                self.time_range.handle_input()
+                implot.end_plot()
+
+            if implot.begin_plot("###MotorTempPlot", flags=plot_flags):
+                implot.setup_axes("Time", "", 0, axis_flags)
+                self.time_range.setup(x_range)
+                self.plot("Motor Power")
+                self.plot("Temperature", shaded=True)
+                self.readout.draw()
+                self.time_range.handle_input()
+                implot.end_plot()
+
+            implot.end_subplots()
 
         implot.pop_style_color()
         implot.pop_style_color()
@@ -319,7 +336,7 @@ class MotorTesterWindow(GUIWindow):
         if flags is None:
             flags = 0
 
-        super().__init__("Motor Tester", io, closable, flags)
+        super().__init__("Motor Tester", io, closable, flags, interface.workspace_id)
         self.interface = interface
         self.current_slider_pwr = 0.0
 
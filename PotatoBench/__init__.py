@@ -0,0 +1,2 @@
+from .runner import BenchResult, BenchRun, run_case, save_run, load_run, compare_runs
+from .cases import BenchCase, CASES
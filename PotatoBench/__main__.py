@@ -0,0 +1,81 @@
+"""
+Ingest benchmarks, run from the repo root:
+
+    python -m PotatoBench --out before.json
+    python -m PotatoBench --compare before.json
+
+Every case gets a simulated flight's frames at 1x, 10x and 100x the nominal rate.
+Exits with 1 if anything regressed against ``--compare``, so it can gate a build.
+"""
+
+import argparse
+import sys
+
+from .cases import CASES
+from .runner import compare_runs, format_header, format_result, load_run, new_run
+from .runner import run_case, save_run
+
+parser = argparse.ArgumentParser(
+    prog="python -m PotatoBench", description="Ingest throughput and latency"
+)
+parser.add_argument(
+    "cases",
+    nargs="*",
+    metavar="CASE",
+    help=f"Cases to run (default all): {', '.join(CASES)}",
+)
+parser.add_argument(
+    "--rates",
+    type=float,
+    nargs="+",
+    default=[1, 10, 100],
+    help="Multiples of the nominal frame rate (default 1 10 100)",
+)
+parser.add_argument(
+    "--duration", type=float, default=3.0, help="Seconds per case and rate"
+)
+parser.add_argument("--out", metavar="FILE", help="Save the results as JSON")
+parser.add_argument(
+    "--compare", metavar="FILE", help="Earlier results to check for regressions"
+)
+parser.add_argument(
+    "--tolerance",
+    type=float,
+    default=0.2,
+    help="How much worse counts as a regression (default 0.2, 20%%)",
+)
+
+
+def main(args) -> int:
+    unknown = [name for name in args.cases if name not in CASES]
+    if unknown:
+        parser.error(f"unknown case {', '.join(unknown)}")
+
+    print(format_header())
+    results = []
+    for name in args.cases or CASES:
+        case = CASES[name]()
+        for rate in args.rates:
+            results.append(run_case(case, rate, args.duration))
+            print(format_result(results[-1]))
+
+    run = new_run(results)
+
+    if args.out:
+        save_run(run, args.out)
+        print(f"\nSaved to {args.out}")
+
+    if args.compare:
+        regressions = compare_runs(load_run(args.compare), run, args.tolerance)
+        if regressions:
+            print(f"\nRegressions against {args.compare}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\nNo regressions against {args.compare}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,256 @@
+"""
+The hot paths being benchmarked. Every case gets the frames a simulated payload
+would send over a whole flight (from PotatoSim, noise and all), and handles them
+however the ground station would.
+"""
+
+from __future__ import annotations
+from collections import deque
+import time
+
+import serial
+
+from PotatoSim import FlightModel, KrakenEncoder, SpaceducksEncoder, PtyOutput
+
+# Readings per second from the payloads, same as the simulator's default
+NOMINAL_READINGS_HZ = 20.0
+
+FLIGHT_S = 90.0
+
+
+def flight_frames(encoder) -> list[bytes]:
+    """Every frame (with the semicolon) sent over one flight"""
+    model = FlightModel(noise=1.0, seed=0)
+    frames = []
+    for _ in range(int(FLIGHT_S * NOMINAL_READINGS_HZ)):
+        events = model.step(1.0 / NOMINAL_READINGS_HZ)
+        frames += encoder.frames(model.sample(), events, model)
+    return frames
+
+
+class BenchCase:
+    """
+    One thing to benchmark. ``consume`` gets a list of frames each time some are
+    due, and everything expensive to set up belongs in ``setup``.
+    """
+
+    name = ""
+    encoder = KrakenEncoder
+
+    _frames_cache: dict[type, list[bytes]] = {}
+
+    def __init__(self) -> None:
+        if self.encoder not in self._frames_cache:
+            self._frames_cache[self.encoder] = flight_frames(self.encoder())
+        self.frames = self._frames_cache[self.encoder]
+        self.nominal_hz = len(self.frames) / FLIGHT_S
+
+    def setup(self):
+        pass
+
+    def consume(self, chunk: list[bytes]):
+        raise NotImplementedError
+
+    def teardown(self):
+        pass
+
+
+class XbeeReadlineCase(BenchCase):
+    """``XbeeInterface._readline`` pulling frames off a pty a byte at a time"""
+
+    name = "xbee_readline"
+    encoder = SpaceducksEncoder
+
+    def setup(self):
+        from Spaceducks.shared.xbee_interface import XbeeInterface
+
+        self.pty = PtyOutput()
+        self.xbee = XbeeInterface(self.pty.name, lambda data: None)
+
+    def consume(self, chunk: list[bytes]):
+        xbee = self.xbee
+        for frame in chunk:
+            self.pty.write(frame)
+            # A semicolon inside the msgpack gets read as a line of its own
+            for _ in range(frame.count(b";")):
+                xbee._readline(xbee.xbee, b";")
+
+    def teardown(self):
+        self.xbee.running = False
+        self.xbee.xbee.close()
+        self.pty.close()
+
+
+class SerialLinkCase(BenchCase):
+    """``SerialLink.feed`` framing whatever is waiting on a pty, with LinkStats"""
+
+    name = "serial_link_feed"
+    encoder = SpaceducksEncoder
+
+    # Stay under the pty's buffer so writing never blocks
+    WRITE_CHUNK = 2048
+
+    def setup(self):
+        from PotatoLink import LinkStats, SerialLink
+
+        self.pty = PtyOutput()
+        self.conn = serial.Serial(self.pty.name, timeout=0)
+        self.link = SerialLink(
+            self.pty.name, self.conn, lambda frame: None, LinkStats(self.pty.name)
+        )
+
+    def consume(self, chunk: list[bytes]):
+        data = b"".join(chunk)
+        for start in range(0, len(data), self.WRITE_CHUNK):
+            self.pty.write(data[start : start + self.WRITE_CHUNK])
+            remaining = min(self.WRITE_CHUNK, len(data) - start)
+            while remaining:
+                waiting = self.conn.in_waiting
+                if waiting:
+                    self.link.feed(self.conn.read(waiting))
+                    remaining -= waiting
+
+    def teardown(self):
+        self.conn.close()
+        self.pty.close()
+
+
+class SpaceducksProcessCase(BenchCase):
+    """``XbeeInterface.process_data``, msgpack decode and the callback"""
+
+    name = "spaceducks_process_data"
+    encoder = SpaceducksEncoder
+
+    def setup(self):
+        from Spaceducks.shared.xbee_interface import XbeeInterface
+
+        self.received = deque(maxlen=100)
+        self.pty = PtyOutput()
+        self.xbee = XbeeInterface(self.pty.name, self.received.append)
+
+    def consume(self, chunk: list[bytes]):
+        process_data = self.xbee.process_data
+        for frame in chunk:
+            process_data(frame[:-1])
+
+    def teardown(self):
+        self.xbee.xbee.close()
+        self.pty.close()
+
+
+class SpaceducksDecodeCase(BenchCase):
+    """``Spaceducks.protocol.decode_frame``, what the ingest workers run"""
+
+    name = "spaceducks_decode_frame"
+    encoder = SpaceducksEncoder
+
+    def setup(self):
+        from Spaceducks import protocol
+
+        self.decode_frame = protocol.decode_frame
+
+    def consume(self, chunk: list[bytes]):
+        decode_frame = self.decode_frame
+        for frame in chunk:
+            decode_frame(frame[:-1])
+
+
+class HeadlessKraken:
+    """
+    KrakenInterface's data handling and windows without a GLFW window or serial
+    ports. imgui still gets a real context, it just never gets handed to a renderer,
+    so drawing costs everything up to the GL calls.
+    """
+
+    def __init__(self) -> None:
+        from imgui_bundle import imgui
+
+        from Kraken import windows
+        from Kraken.interface import KrakenInterface
+
+        self.context = imgui.create_context()
+        io = imgui.get_io()
+        io.display_size = (1280, 720)
+        io.delta_time = 1 / 60
+        io.set_ini_filename("")
+        io.fonts.get_tex_data_as_rgba32()
+
+        # The same data handling state as a real one, the uplink never gets started
+        interface = KrakenInterface.__new__(KrakenInterface)
+        interface.init_data("Kraken", "bench")
+        interface.io = io
+        interface.workspace_id = ""
+        # The console shows the Messages tab by default, point it at the stream so
+        # there's a full console worth of text to join and lay out
+        interface.message_text = interface.serial_text
+        interface.serial_window = windows.SerialWindow(io, interface)
+        interface.plot_window = windows.PlotWindow(io, interface)
+        self.interface = interface
+
+    def handle(self, chunk: list[bytes]):
+        interface = self.interface
+        interface.current_time = time.time() - interface.start_time
+        handle_frame = interface.handle_frame
+        for frame in chunk:
+            handle_frame(frame[:-1])
+
+    def render(self, window):
+        from imgui_bundle import imgui
+
+        imgui.new_frame()
+        window.draw_window()
+        imgui.render()
+
+    def close(self):
+        from imgui_bundle import imgui
+
+        imgui.destroy_context(self.context)
+
+
+class KrakenProcessCase(BenchCase):
+    """``KrakenInterface.handle_frame``, text decode, console buffer and parsing"""
+
+    name = "kraken_process_data"
+
+    def setup(self):
+        self.kraken = HeadlessKraken()
+
+    def consume(self, chunk: list[bytes]):
+        self.kraken.handle(chunk)
+
+    def teardown(self):
+        self.kraken.close()
+
+
+class KrakenPlotCase(KrakenProcessCase):
+    """Parsing plus ``PlotWindow.update_data`` once per chunk, like once a frame"""
+
+    name = "kraken_plot_update"
+
+    def consume(self, chunk: list[bytes]):
+        self.kraken.handle(chunk)
+        self.kraken.interface.plot_window.update_data()
+
+
+class KrakenConsoleCase(KrakenProcessCase):
+    """Parsing plus one imgui frame of the serial console per chunk"""
+
+    name = "kraken_console_render"
+
+    def consume(self, chunk: list[bytes]):
+        self.kraken.handle(chunk)
+        self.kraken.render(self.kraken.interface.serial_window)
+
+
+CASES = {
+    case.name: case
+    for case in (
+        XbeeReadlineCase,
+        SerialLinkCase,
+        SpaceducksProcessCase,
+        SpaceducksDecodeCase,
+        KrakenProcessCase,
+        KrakenPlotCase,
+        KrakenConsoleCase,
+    )
+}
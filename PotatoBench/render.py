@@ -0,0 +1,417 @@
+"""
+Headless render benchmark, runs on a Linux box without a GPU or a display:
+
+    python -m PotatoBench.render kraken --frames 3000 --out render.json
+    python -m PotatoBench.render spaceducks --compare render.json
+
+A real interface is built against an offscreen OpenGL context (EGL, surfaceless,
+Mesa's software renderer if that's all there is) and fed a simulated flight one
+frame at a time. Every frame's CPU time gets split into the interface's ``draw()``,
+each window's ``draw_window()``, the background image, ``backend.render`` and
+waiting for the GL commands to finish.
+"""
+
+from __future__ import annotations
+import os
+
+# Both have to be set before anything imports OpenGL
+os.environ.setdefault("PYOPENGL_PLATFORM", "egl")
+os.environ.setdefault("EGL_PLATFORM", "surfaceless")
+
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import ctypes
+import multiprocessing as mp
+import sys
+import time
+
+import msgspec
+import numpy as np
+from OpenGL import EGL
+from OpenGL import GL as gl
+from imgui_bundle import imgui
+from imgui_bundle.python_backends.opengl_backend import ProgrammablePipelineRenderer
+
+from PotatoSim import FlightModel, KrakenEncoder, SpaceducksEncoder, PtyOutput
+from PotatoUI import GUIWindow, ImageWidget
+from .cases import NOMINAL_READINGS_HZ
+from .runner import load_run, run_info, save_run
+
+WIDTH = 1280
+HEIGHT = 720
+
+# Frames skipped at the start, the first few lay out docks and upload textures
+WARMUP_FRAMES = 60
+
+# Flight time covered by one rendered frame at --speed 1
+FRAME_FLIGHT_S = 1 / 60
+
+# Changes smaller than these (ms) are noise, not regressions
+NOISE_MS = {"p50_ms": 0.1, "p99_ms": 0.5}
+
+
+class StageTiming(msgspec.Struct):
+    interface: str
+    stage: str
+    frames: int
+    mean_ms: float
+    p50_ms: float
+    p99_ms: float
+    max_ms: float
+
+
+class RenderRun(msgspec.Struct):
+    created: str
+    python: str
+    machine: str
+    commit: str
+    results: list[StageTiming]
+
+
+class FrameTimer:
+    """Per-frame time spent in each stage, a stage can run several times a frame"""
+
+    def __init__(self, frames: int) -> None:
+        self.frames = frames
+        self.frame = -1
+        self.stages: dict[str, np.ndarray] = {}
+
+    def next_frame(self):
+        self.frame += 1
+
+    def add(self, stage: str, seconds: float):
+        if stage not in self.stages:
+            self.stages[stage] = np.zeros(self.frames, dtype=np.float64)
+        self.stages[stage][self.frame] += seconds
+
+    def timed(self, stage: str, func):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - start)
+
+        return wrapper
+
+    def results(self, interface: str, skip: int) -> list[StageTiming]:
+        results = []
+        for stage, seconds in self.stages.items():
+            ms = seconds[skip : self.frame + 1] * 1000
+            if not len(ms):
+                continue
+            results.append(
+                StageTiming(
+                    interface=interface,
+                    stage=stage,
+                    frames=len(ms),
+                    mean_ms=float(ms.mean()),
+                    p50_ms=float(np.percentile(ms, 50)),
+                    p99_ms=float(np.percentile(ms, 99)),
+                    max_ms=float(ms.max()),
+                )
+            )
+        return results
+
+
+class HeadlessRenderer(ProgrammablePipelineRenderer):
+    """imgui's OpenGL renderer with a fixed display size and no window for input"""
+
+    timer: FrameTimer | None = None
+
+    def __init__(self, width: int, height: int) -> None:
+        super().__init__()
+        self.io.display_size = (width, height)
+        self.last_time = time.perf_counter()
+
+    def process_inputs(self):
+        now = time.perf_counter()
+        self.io.delta_time = max(now - self.last_time, 1e-6)
+        self.last_time = now
+
+    def render(self, draw_data):
+        start = time.perf_counter()
+        super().render(draw_data)
+        if self.timer is not None:
+            self.timer.add("backend.render", time.perf_counter() - start)
+
+
+def make_egl_context(width: int, height: int):
+    """
+    Surfaceless EGL context with a framebuffer object standing in for the window,
+    left bound as the draw target.
+    """
+    display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+    if not EGL.eglInitialize(display, None, None):
+        raise RuntimeError("Couldn't initialize EGL")
+
+    config_attribs = (EGL.EGLint * 5)(
+        EGL.EGL_RENDERABLE_TYPE,
+        EGL.EGL_OPENGL_BIT,
+        EGL.EGL_SURFACE_TYPE,
+        0,
+        EGL.EGL_NONE,
+    )
+    config = EGL.EGLConfig()
+    num_configs = EGL.EGLint()
+    EGL.eglChooseConfig(
+        display, config_attribs, ctypes.pointer(config), 1, ctypes.pointer(num_configs)
+    )
+    if not num_configs.value:
+        raise RuntimeError("No EGL config for desktop OpenGL")
+
+    EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+    # Same version and profile the GLFW window asks for
+    context_attribs = (EGL.EGLint * 7)(
+        EGL.EGL_CONTEXT_MAJOR_VERSION,
+        3,
+        EGL.EGL_CONTEXT_MINOR_VERSION,
+        3,
+        EGL.EGL_CONTEXT_OPENGL_PROFILE_MASK,
+        EGL.EGL_CONTEXT_OPENGL_CORE_PROFILE_BIT,
+        EGL.EGL_NONE,
+    )
+    context = EGL.eglCreateContext(display, config, EGL.EGL_NO_CONTEXT, context_attribs)
+    if not context:
+        raise RuntimeError("Couldn't create an OpenGL 3.3 core context")
+    EGL.eglMakeCurrent(display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, context)
+
+    framebuffer = gl.glGenFramebuffers(1)
+    gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, framebuffer)
+    color = gl.glGenRenderbuffers(1)
+    gl.glBindRenderbuffer(gl.GL_RENDERBUFFER, color)
+    gl.glRenderbufferStorage(gl.GL_RENDERBUFFER, gl.GL_RGBA8, width, height)
+    gl.glFramebufferRenderbuffer(
+        gl.GL_FRAMEBUFFER, gl.GL_COLOR_ATTACHMENT0, gl.GL_RENDERBUFFER, color
+    )
+    gl.glViewport(0, 0, width, height)
+    return display, context
+
+
+class HeadlessMixin:
+    """
+    Goes in front of an interface class to draw offscreen. There's no GLFW window
+    at all, the GL context comes from EGL and the frame goes to a framebuffer object.
+    """
+
+    timer: FrameTimer | None = None
+
+    def create_backend(self, width, height, fullscreen):
+        self.context = imgui.create_context()
+        imgui.set_current_context(self.context)
+        self.glfw_window = None
+        self.egl_display, self.egl_context = make_egl_context(width, height)
+        self.imgui_backend = HeadlessRenderer(width, height)
+
+    def poll_inputs(self):
+        self.imgui_backend.process_inputs()
+
+    def present(self):
+        # Nothing to swap, but wait for the frame to actually be drawn
+        start = time.perf_counter()
+        gl.glFinish()
+        if self.timer is not None:
+            self.timer.add("glFinish", time.perf_counter() - start)
+
+    def instrument(self, timer: FrameTimer):
+        self.timer = timer
+        self.imgui_backend.timer = timer
+        self.draw = timer.timed("draw()", self.draw)
+        for value in list(vars(self).values()):
+            if isinstance(value, GUIWindow):
+                value.draw_window = timer.timed(value.title, value.draw_window)
+            elif isinstance(value, ImageWidget):
+                name = f"{type(value.image).__name__} {value.image.path.name}"
+                value.draw = timer.timed(name, value.draw)
+
+
+def kraken_interface(port: str):
+    from Kraken import KrakenInterface
+
+    class HeadlessKraken(HeadlessMixin, KrakenInterface):
+        pass
+
+    # Huge framerate so the wrapper never sleeps between frames
+    interface = HeadlessKraken("Kraken", WIDTH, HEIGHT, port, framerate=1_000_000)
+    return interface, KrakenEncoder(), interface.handle_frame
+
+
+def spaceducks_interface(port: str):
+    from Spaceducks import SpaceduckInterface
+
+    class HeadlessSpaceducks(HeadlessMixin, SpaceduckInterface):
+        pass
+
+    interface = HeadlessSpaceducks(
+        "Spaceducks", WIDTH, HEIGHT, port, framerate=1_000_000
+    )
+    # What the ingest engine hands frames to in threaded mode
+    return interface, SpaceducksEncoder(), interface.xbee.process_data
+
+
+INTERFACES = {"kraken": kraken_interface, "spaceducks": spaceducks_interface}
+
+
+def run_interface(
+    name: str, frames: int, speed: float, rate: float, save_frame: str | None = None
+) -> list[StageTiming]:
+    """
+    Render ``frames`` frames of one interface. Before each frame, the simulated
+    flight moves on by a fixed step and whatever the payload would have sent in that
+    time gets handed to the interface, like the ingest thread would.
+    """
+    # Only opened so the interface has a port, nothing gets written to it
+    port = PtyOutput()
+    interface, encoder, handle_frame = INTERFACES[name](port.name)
+
+    timer = FrameTimer(frames)
+    interface.instrument(timer)
+
+    model = FlightModel(noise=1.0, seed=0)
+    reading_s = 1.0 / (NOMINAL_READINGS_HZ * rate)
+    step_s = FRAME_FLIGHT_S * speed
+    flight_time = 0.0
+    next_reading = 0.0
+
+    try:
+        for _ in range(frames):
+            timer.next_frame()
+            frame_start = time.perf_counter()
+
+            flight_time += step_s
+            while next_reading <= flight_time:
+                events = model.step(reading_s)
+                for frame in encoder.frames(model.sample(), events, model):
+                    handle_frame(frame[:-1])
+                next_reading += reading_s
+            timer.add("telemetry", time.perf_counter() - frame_start)
+
+            interface.update_gui()
+            timer.add("frame", time.perf_counter() - frame_start)
+
+        if save_frame:
+            save_framebuffer(save_frame)
+    finally:
+        interface.shutdown_gui()
+        port.close()
+
+    return timer.results(name, min(WARMUP_FRAMES, frames // 2))
+
+
+def save_framebuffer(path: str):
+    """The last frame as an image, to check the benchmark drew what it should"""
+    from PIL import Image
+
+    gl.glPixelStorei(gl.GL_PACK_ALIGNMENT, 1)
+    pixels = gl.glReadPixels(0, 0, WIDTH, HEIGHT, gl.GL_RGBA, gl.GL_UNSIGNED_BYTE)
+    image = Image.frombytes("RGBA", (WIDTH, HEIGHT), pixels)
+    image.transpose(Image.Transpose.FLIP_TOP_BOTTOM).save(path)
+
+
+def format_timing(timing: StageTiming) -> str:
+    return (
+        f"{timing.interface:<11} {timing.stage:<42} {timing.mean_ms:>8.3f} "
+        f"{timing.p50_ms:>8.3f} {timing.p99_ms:>8.3f} {timing.max_ms:>8.2f}"
+    )
+
+
+def compare_render_runs(
+    old: RenderRun, new: RenderRun, tolerance: float = 0.2
+) -> list[str]:
+    """
+    Stages whose median or p99 got worse by more than ``tolerance`` (as a fraction)
+    and by more than NOISE_MS.
+    """
+    baseline = {(timing.interface, timing.stage): timing for timing in old.results}
+    regressions = []
+    for timing in new.results:
+        before = baseline.get((timing.interface, timing.stage))
+        if before is None:
+            continue
+
+        name = f"{timing.interface} {timing.stage}"
+        for field, noise in NOISE_MS.items():
+            old_ms = getattr(before, field)
+            new_ms = getattr(timing, field)
+            if new_ms - old_ms > noise and new_ms > old_ms * (1 + tolerance):
+                regressions.append(f"{name}: {field} {old_ms:.3f} -> {new_ms:.3f}")
+    return regressions
+
+
+parser = argparse.ArgumentParser(
+    prog="python -m PotatoBench.render", description="Headless render benchmark"
+)
+parser.add_argument(
+    "interfaces",
+    nargs="*",
+    metavar="INTERFACE",
+    help=f"Interfaces to render (default all): {', '.join(INTERFACES)}",
+)
+parser.add_argument("--frames", type=int, default=2000, help="Frames per interface")
+parser.add_argument(
+    "--speed",
+    type=float,
+    default=3.0,
+    help="Flight seconds per 60 frames (default 3, about one flight in 2000 frames)",
+)
+parser.add_argument(
+    "--rate", type=float, default=1.0, help="Multiple of the nominal telemetry rate"
+)
+parser.add_argument("--out", metavar="FILE", help="Save the results as JSON")
+parser.add_argument(
+    "--compare", metavar="FILE", help="Earlier results to check for regressions"
+)
+parser.add_argument("--tolerance", type=float, default=0.2)
+parser.add_argument(
+    "--save-frame",
+    metavar="PNG",
+    help="Save the last frame of each interface, named after it",
+)
+
+
+def main(args) -> int:
+    unknown = [name for name in args.interfaces if name not in INTERFACES]
+    if unknown:
+        parser.error(f"unknown interface {', '.join(unknown)}")
+
+    results = []
+    for name in args.interfaces or INTERFACES:
+        save_frame = None
+        if args.save_frame:
+            root, ext = os.path.splitext(args.save_frame)
+            save_frame = f"{root}_{name}{ext or '.png'}"
+
+        # A fresh process per interface, the texture cache and the other GL
+        # singletons can't outlive the context they were made with
+        with ProcessPoolExecutor(1, mp_context=mp.get_context("spawn")) as pool:
+            results += pool.submit(
+                run_interface, name, args.frames, args.speed, args.rate, save_frame
+            ).result()
+
+    print(
+        f"{'interface':<11} {'stage':<42} {'mean ms':>8} {'p50 ms':>8} "
+        f"{'p99 ms':>8} {'max ms':>8}"
+    )
+    for timing in results:
+        print(format_timing(timing))
+
+    run = RenderRun(**run_info(), results=results)
+    if args.out:
+        save_run(run, args.out)
+        print(f"\nSaved to {args.out}")
+
+    if args.compare:
+        old = load_run(args.compare, RenderRun)
+        regressions = compare_render_runs(old, run, args.tolerance)
+        if regressions:
+            print(f"\nRegressions against {args.compare}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\nNo regressions against {args.compare}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(parser.parse_args()))
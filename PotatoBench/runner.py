@@ -0,0 +1,196 @@
+from __future__ import annotations
+import platform
+import subprocess
+import time
+
+import msgspec
+import numpy as np
+
+# Latency of the last frame past which a case counts as falling behind, a few UI
+# frames worth
+BACKLOG_LIMIT_MS = 50.0
+
+# Latency changes smaller than this are mostly the scheduler waking up late
+LATENCY_NOISE_MS = 5.0
+
+
+class BenchResult(msgspec.Struct):
+    case: str
+    rate: float
+    frames: int
+    seconds: float
+    offered_per_s: float
+    # Frames per second of time spent in the handler, what it could sustain
+    frames_per_s: float
+    # Arrival of a frame's last byte until its handler returned
+    latency_p50_ms: float
+    latency_p99_ms: float
+    latency_max_ms: float
+    # Whole process CPU time over wall time, 100 is one core flat out
+    cpu_percent: float
+    # Whether it kept up with the offered rate at the end of the run
+    kept_up: bool
+
+
+class BenchRun(msgspec.Struct):
+    created: str
+    python: str
+    machine: str
+    commit: str
+    results: list[BenchResult]
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def run_info() -> dict:
+    """When and where a run happened, so saved runs can be told apart"""
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()} {platform.processor()}",
+        "commit": _git_commit(),
+    }
+
+
+def new_run(results: list[BenchResult]) -> BenchRun:
+    return BenchRun(**run_info(), results=results)
+
+
+def save_run(run: msgspec.Struct, path: str):
+    with open(path, "wb") as f:
+        f.write(msgspec.json.format(msgspec.json.encode(run)))
+
+
+def load_run(path: str, run_type=BenchRun):
+    with open(path, "rb") as f:
+        return msgspec.json.decode(f.read(), type=run_type)
+
+
+def run_case(case, rate: float, duration_s: float) -> BenchResult:
+    """
+    Feed a case its stream at ``rate`` times the nominal frame rate for
+    ``duration_s`` seconds of wall time.
+
+    Frames are due at evenly spaced times, and everything that's due gets handed
+    over in one chunk, the same way the ingest thread reads whatever is waiting on
+    the port. If the case can't keep up, chunks get bigger and latency grows, so
+    the numbers show both the cost per frame and where it falls over.
+    """
+    frames = case.frames
+    interval = 1.0 / (case.nominal_hz * rate)
+    # Never need more frames than fit in the run
+    total = int(duration_s / interval) + 1
+    arrivals = np.arange(total) * interval
+
+    # Latencies get filled in a whole chunk at a time
+    latencies = np.empty(total, dtype=np.float64)
+
+    case.setup()
+    try:
+        sent = 0
+        busy = 0.0
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        now = 0.0
+        while now < duration_s:
+            due = min(int(now / interval) + 1, total)
+            if due > sent:
+                chunk = [frames[i % len(frames)] for i in range(sent, due)]
+                began = time.perf_counter()
+                case.consume(chunk)
+                done = time.perf_counter() - start
+                busy += done - (began - start)
+                latencies[sent:due] = done - arrivals[sent:due]
+                sent = due
+            elif sent == total:
+                break
+            else:
+                time.sleep(max(arrivals[sent] - now, 0.0))
+            now = time.perf_counter() - start
+
+        wall = time.perf_counter() - start
+        cpu = time.process_time() - cpu_start
+    finally:
+        case.teardown()
+
+    handled = latencies[:sent] * 1000
+    return BenchResult(
+        case=case.name,
+        rate=rate,
+        frames=sent,
+        seconds=wall,
+        offered_per_s=case.nominal_hz * rate,
+        frames_per_s=sent / busy if busy else 0.0,
+        latency_p50_ms=float(np.percentile(handled, 50)) if sent else 0.0,
+        latency_p99_ms=float(np.percentile(handled, 99)) if sent else 0.0,
+        latency_max_ms=float(handled.max()) if sent else 0.0,
+        cpu_percent=100 * cpu / wall,
+        kept_up=bool(sent and handled[-1] < BACKLOG_LIMIT_MS),
+    )
+
+
+def format_header() -> str:
+    return (
+        f"{'case':<24} {'rate':>5} {'offered/s':>9} {'frames/s':>9} {'p50 ms':>8} "
+        f"{'p99 ms':>8} {'max ms':>8} {'cpu %':>6}"
+    )
+
+
+def format_result(result: BenchResult) -> str:
+    behind = "" if result.kept_up else "  fell behind"
+    return (
+        f"{result.case:<24} {result.rate:>4g}x {result.offered_per_s:>9.0f} "
+        f"{result.frames_per_s:>9.0f} {result.latency_p50_ms:>8.3f} "
+        f"{result.latency_p99_ms:>8.3f} {result.latency_max_ms:>8.2f} "
+        f"{result.cpu_percent:>6.1f}{behind}"
+    )
+
+
+def compare_runs(old: BenchRun, new: BenchRun, tolerance: float = 0.2) -> list[str]:
+    """
+    Match up results by case and rate and list everything that got worse by more
+    than ``tolerance`` (as a fraction).
+
+    Returns:
+        list[str]: One line per regression, empty if there were none
+    """
+    baseline = {(result.case, result.rate): result for result in old.results}
+    regressions = []
+    for result in new.results:
+        before = baseline.get((result.case, result.rate))
+        if before is None:
+            continue
+
+        name = f"{result.case} @ {result.rate:g}x"
+        if before.kept_up and not result.kept_up:
+            regressions.append(f"{name}: no longer keeps up")
+        if result.frames_per_s < before.frames_per_s * (1 - tolerance):
+            regressions.append(
+                f"{name}: frames/s {before.frames_per_s:.0f} -> "
+                f"{result.frames_per_s:.0f}"
+            )
+        p99_growth = result.latency_p99_ms - before.latency_p99_ms
+        if (
+            p99_growth > LATENCY_NOISE_MS
+            and result.latency_p99_ms > before.latency_p99_ms * (1 + tolerance)
+        ):
+            regressions.append(
+                f"{name}: p99 latency {before.latency_p99_ms:.3f} -> "
+                f"{result.latency_p99_ms:.3f} ms"
+            )
+        if result.cpu_percent > before.cpu_percent * (1 + tolerance) + 1.0:
+            regressions.append(
+                f"{name}: CPU {before.cpu_percent:.1f}% -> "
+                f"{result.cpu_percent:.1f}%"
+            )
+    return regressions
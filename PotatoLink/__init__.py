@@ -0,0 +1,12 @@
+from .uplink import UplinkScheduler, UplinkCommand, Priority, CommandState
+from .uplink import WRITE_TIMEOUT_S, write_all
+from .link_stats import LinkStats
+from .ingest import IngestEngine, SerialLink
+from .shared_ring import SharedRing
+from .workers import ProcessIngestEngine, WorkerLink
+from .staging import EarlyLinks, FrameRecorder
+from .publish import TelemetryPublisher, Batch, LinkBatch, Snapshot
+from .remote import RemoteLinks, RemoteLink, RemoteIngest
+from .alarms import AlarmEngine, AlarmRule, AlarmEvent, load_rules
+from .callouts import CalloutService, AltitudeCallout, alarm_listener, speech_backend
+from .discovery import PortProbe, discover, matching
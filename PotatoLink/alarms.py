@@ -0,0 +1,265 @@
+"""
+Threshold alarms, checked against every decoded sample right where ingest hands it
+over instead of against whatever the UI happens to show each frame, so a spike
+that comes and goes between two frames still trips them.
+"""
+
+from __future__ import annotations
+from collections import deque
+from typing import Callable, Literal
+import importlib
+import logging
+import threading
+
+import msgspec
+import numpy as np
+
+from .workers import FrameDecoder, KIND_COL, TIME_COL, VALUES_COL
+
+
+class AlarmRule(msgspec.Struct, frozen=True):
+    """
+    Trips once ``field`` has been past ``threshold`` (by ``comparator``) for
+    ``duration`` seconds, and clears once it's back on the other side by
+    ``hysteresis``, so a value sitting right on the threshold doesn't flap.
+    """
+
+    name: str
+    # A field from the link's protocol FIELDS, like "temperature"
+    field: str
+    comparator: Literal[">", ">=", "<", "<="]
+    threshold: float
+    hysteresis: float = 0.0
+    duration: float = 0.0
+
+
+class AlarmEvent(msgspec.Struct):
+    # Monotonic time of the sample that tripped or cleared it
+    time: float
+    link: str
+    rule: str
+    value: float
+    active: bool
+
+
+def load_rules(path: str) -> list[AlarmRule]:
+    """Rules from a JSON list of AlarmRule objects"""
+    with open(path, "rb") as f:
+        return msgspec.json.decode(f.read(), type=list[AlarmRule])
+
+
+def protocol_fields(module: str) -> dict[str, tuple[int, int]]:
+    """
+    ``FIELDS`` of a decoder's module (like "Kraken.protocol"): field name to row
+    kind and value index. Empty if there's no such thing.
+    """
+    try:
+        return getattr(importlib.import_module(module), "FIELDS", {})
+    except ImportError:
+        return {}
+
+
+def _fill_forward(mask: np.ndarray) -> np.ndarray:
+    """For every row, the latest row up to it where ``mask`` is set (-1 if none)"""
+    index = np.where(mask, np.arange(len(mask))[:, None], -1)
+    return np.maximum.accumulate(index, axis=0)
+
+
+class _KindChecks:
+    """Every rule on one row kind of one link, checked together as one matrix"""
+
+    def __init__(self, rules: list[AlarmRule], columns: list[int]) -> None:
+        self.rules = rules
+        self.columns = np.array(columns, dtype=np.intp) + VALUES_COL
+
+        # Everything gets flipped into "greater than", < and <= are > and >= on
+        # the negated values
+        self.sign = np.array(
+            [1.0 if rule.comparator[0] == ">" else -1.0 for rule in rules]
+        )
+        self.threshold = self.sign * [rule.threshold for rule in rules]
+        self.clear_threshold = self.threshold - [rule.hysteresis for rule in rules]
+        self.strict = np.array([len(rule.comparator) == 1 for rule in rules])
+        self.duration = np.array([rule.duration for rule in rules])
+
+        # Where each rule was at the end of the last batch
+        self.past = np.zeros(len(rules), dtype=bool)
+        self.since = np.zeros(len(rules))
+        self.active = np.zeros(len(rules), dtype=bool)
+
+    def _beyond(self, values: np.ndarray, threshold: np.ndarray) -> np.ndarray:
+        return np.where(self.strict, values > threshold, values >= threshold)
+
+    def check(self, rows: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Run a batch of rows (all of this kind) through every rule.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: Row, rule and new state of
+                every alarm that tripped or cleared, oldest first
+        """
+        times = rows[:, TIME_COL]
+        values = rows[:, self.columns] * self.sign
+
+        # Past the threshold, or back by the hysteresis. In between, a rule stays
+        # however the last sample that was either left it.
+        over = self._beyond(values, self.threshold)
+        back = ~self._beyond(values, self.clear_threshold)
+        last = _fill_forward(over | back)
+        past = np.where(
+            last >= 0,
+            np.take_along_axis(over, np.maximum(last, 0), axis=0),
+            self.past,
+        )
+
+        # When each rule last went past, for the duration
+        went_past = past & ~np.vstack([self.past, past[:-1]])
+        last = _fill_forward(went_past)
+        since = np.where(last >= 0, times[np.maximum(last, 0)], self.since)
+        active = past & (times[:, None] - since >= self.duration)
+
+        changed_rows, changed_rules = np.nonzero(
+            active != np.vstack([self.active, active[:-1]])
+        )
+        self.past, self.since, self.active = past[-1], since[-1], active[-1]
+        return changed_rows, changed_rules, active[changed_rows, changed_rules]
+
+
+class AlarmEngine:
+    """
+    Checks AlarmRules against every sample ingest decodes. Links hand it each batch
+    of decoded rows (``check()``), or each chunk of raw frames in threaded mode
+    (``check_frames()``), on whatever thread they run on. The rules for a link are
+    compiled into one set of array comparisons per row kind when it's added, so a
+    batch costs the same few numpy calls however many rules there are.
+
+    Every alarm that trips or clears is logged and goes to the ``on_event()``
+    listeners, and the UI reads them back with ``active_on()`` and ``events_on()``.
+    """
+
+    EVENT_CAP = 200
+
+    def __init__(self, rules: list[AlarmRule]) -> None:
+        self.rules = rules
+        self.links: dict[str, dict[int, _KindChecks]] = {}
+        self.decoders: dict[str, FrameDecoder] = {}
+
+        self.active: dict[tuple[str, str], AlarmEvent] = {}
+        self.events: deque[AlarmEvent] = deque(maxlen=self.EVENT_CAP)
+        self.listeners: list[Callable[[AlarmEvent], None]] = []
+        self.lock = threading.Lock()
+
+    def add_link(
+        self,
+        name: str,
+        fields: dict[str, tuple[int, int]],
+        decoder: FrameDecoder | None = None,
+    ):
+        """
+        Compile the rules for a link. Rules on fields the link doesn't have are
+        skipped.
+
+        Args:
+            fields (dict[str, tuple[int, int]]): Row kind and value index of each
+                field, see ``protocol_fields()``
+            decoder (FrameDecoder | None): For ``check_frames()``
+        """
+        by_kind: dict[int, list[tuple[AlarmRule, int]]] = {}
+        for rule in self.rules:
+            if rule.field in fields:
+                kind, column = fields[rule.field]
+                by_kind.setdefault(kind, []).append((rule, column))
+
+        self.links[name] = {
+            kind: _KindChecks(
+                [rule for rule, _ in checks], [column for _, column in checks]
+            )
+            for kind, checks in by_kind.items()
+        }
+        if decoder is not None:
+            self.decoders[name] = decoder
+
+    def on_event(self, listener: Callable[[AlarmEvent], None]):
+        """Call ``listener`` with every event, from the thread that checked it"""
+        self.listeners.append(listener)
+
+    def check(self, link: str, rows: np.ndarray):
+        """A batch of decoded rows in the ingest ring layout"""
+        checks = self.links.get(link)
+        if not checks:
+            return
+
+        kinds = rows[:, KIND_COL]
+        for kind, kind_checks in checks.items():
+            kind_rows = rows[kinds == kind]
+            if not len(kind_rows):
+                continue
+
+            for row, rule, active in zip(*kind_checks.check(kind_rows)):
+                self._event(
+                    AlarmEvent(
+                        float(kind_rows[row, TIME_COL]),
+                        link,
+                        kind_checks.rules[rule].name,
+                        float(kind_rows[row, kind_checks.columns[rule]]),
+                        bool(active),
+                    )
+                )
+
+    def check_frames(self, link: str, frames: list[bytes], now: float):
+        """
+        Threaded ingest, where links only have raw frames: decode a chunk's worth
+        and check them as one batch.
+        """
+        decoder = self.decoders.get(link)
+        if decoder is None or not self.links.get(link):
+            return
+
+        decoded = []
+        for frame in frames:
+            try:
+                result = decoder(frame)
+            except Exception:
+                # Already counted and logged by the link
+                continue
+            if result is not None and not isinstance(result, str):
+                decoded.append((len(frame), *result))
+        if not decoded:
+            return
+
+        width = VALUES_COL + max(len(values) for _, _, values in decoded)
+        rows = np.full((len(decoded), width), np.nan)
+        for row, (num_bytes, kind, values) in zip(rows, decoded):
+            row[:VALUES_COL] = (now, kind, num_bytes)
+            row[VALUES_COL : VALUES_COL + len(values)] = values
+        self.check(link, rows)
+
+    def _event(self, event: AlarmEvent):
+        with self.lock:
+            key = (event.link, event.rule)
+            if event.active:
+                self.active[key] = event
+            else:
+                self.active.pop(key, None)
+            self.events.append(event)
+
+        if event.active:
+            logging.warning(f"ALARM {event.rule} on {event.link} ({event.value:g})")
+        else:
+            logging.info(
+                f"Alarm {event.rule} on {event.link} cleared ({event.value:g})"
+            )
+
+        for listener in self.listeners:
+            listener(event)
+
+    def active_on(self, links: list[str]) -> list[AlarmEvent]:
+        """Alarms currently tripped on any of ``links``, oldest first"""
+        with self.lock:
+            active = [event for event in self.active.values() if event.link in links]
+        return sorted(active, key=lambda event: event.time)
+
+    def events_on(self, links: list[str]) -> list[AlarmEvent]:
+        """Recent events on any of ``links``, oldest first"""
+        with self.lock:
+            return [event for event in self.events if event.link in links]
@@ -0,0 +1,302 @@
+"""
+Spoken callouts (flight stats, altitude, alarms) for when nobody can look at the
+screen. Speech is slow, a few seconds a sentence, so it all happens on one
+background thread and callers only ever queue text.
+"""
+
+from __future__ import annotations
+from collections import deque
+from typing import Callable, TYPE_CHECKING
+import importlib
+import itertools
+import logging
+import shutil
+import subprocess
+import threading
+import time
+
+from .uplink import Priority
+
+if TYPE_CHECKING:
+    from .alarms import AlarmEvent
+
+
+class Callout:
+    def __init__(self, seq: int, text: str, priority: Priority, key: str | None):
+        self.seq = seq
+        self.text = text
+        self.priority = priority
+        self.key = key
+        self.created = time.monotonic()
+
+
+class NullSpeech:
+    """Says nothing, just keeps what it would have said"""
+
+    def __init__(self) -> None:
+        self.spoken: list[str] = []
+
+    def say(self, text: str):
+        self.spoken.append(text)
+
+    def stop(self):
+        pass
+
+
+class EspeakSpeech:
+    """The espeak (or espeak-ng) command line tool, one process per callout"""
+
+    def __init__(self, command: str = "espeak", words_per_minute: int = 170) -> None:
+        self.command = command
+        self.words_per_minute = words_per_minute
+        self.process: subprocess.Popen | None = None
+
+    def say(self, text: str):
+        self.process = subprocess.Popen(
+            [self.command, "-s", str(self.words_per_minute), text],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        self.process.wait()
+
+    def stop(self):
+        # Cut off whatever it's in the middle of saying
+        process = self.process
+        if process is not None and process.poll() is None:
+            process.terminate()
+
+
+class Pyttsx3Speech:
+    """
+    pyttsx3, which uses whatever the OS has (SAPI5, NSSpeechSynthesizer, espeak).
+    The engine only works from the thread that made it, so it's made on the first
+    ``say()``.
+    """
+
+    def __init__(self, words_per_minute: int = 170) -> None:
+        self.words_per_minute = words_per_minute
+        self.engine = None
+
+    def say(self, text: str):
+        if self.engine is None:
+            pyttsx3 = importlib.import_module("pyttsx3")
+            self.engine = pyttsx3.init()
+            self.engine.setProperty("rate", self.words_per_minute)
+        self.engine.say(text)
+        self.engine.runAndWait()
+
+    def stop(self):
+        if self.engine is not None:
+            self.engine.stop()
+
+
+SPEECH_BACKENDS = ("auto", "pyttsx3", "espeak", "none")
+
+
+def speech_backend(name: str = "auto") -> NullSpeech | EspeakSpeech | Pyttsx3Speech:
+    """
+    A backend by name (see ``SPEECH_BACKENDS``). "auto" takes pyttsx3 if it's
+    installed, then espeak, and falls back to saying nothing.
+    """
+    if name in ("auto", "pyttsx3"):
+        try:
+            importlib.import_module("pyttsx3")
+            return Pyttsx3Speech()
+        except ImportError:
+            if name == "pyttsx3":
+                logging.warning("pyttsx3 isn't installed, callouts will be silent")
+                return NullSpeech()
+
+    if name in ("auto", "espeak"):
+        command = shutil.which("espeak-ng") or shutil.which("espeak")
+        if command is not None:
+            return EspeakSpeech(command)
+        logging.warning("No TTS engine found, callouts will be silent")
+        return NullSpeech()
+
+    if name == "none":
+        return NullSpeech()
+    raise ValueError(f"Unknown speech backend {name!r}")
+
+
+class CalloutService:
+    """
+    Speaks queued callouts one at a time from a background thread, so neither the
+    UI nor the serial threads ever wait on the speech engine.
+
+    The most urgent callout goes next (``Priority``, like the uplink), so an alarm
+    jumps ahead of the flight stats. Callouts with a ``key`` coalesce: a new one
+    replaces whatever is still waiting under the same key, keeping its place in
+    line, so a climb queues up one altitude callout with the latest number instead
+    of a backlog of old ones. A keyed callout that says exactly what was last said
+    under its key is dropped.
+
+    Anything that waited longer than ``max_age`` is stale and skipped, except
+    critical ones.
+    """
+
+    QUEUE_CAP = 20
+
+    MAX_AGE_S = 15.0
+
+    HISTORY_CAP = 50
+
+    def __init__(
+        self,
+        backend: NullSpeech | EspeakSpeech | Pyttsx3Speech,
+        on_spoken: Callable[[Callout], None] | None = None,
+        max_age: float = MAX_AGE_S,
+    ) -> None:
+        """
+        Args:
+            backend: Does the talking, see ``speech_backend()``. Only ever called
+                from the callout thread.
+            on_spoken (Callable[[Callout], None] | None): Called from the callout
+                thread after each callout is said.
+            max_age (float): Seconds a callout stays worth saying.
+        """
+        self.backend = backend
+        self.on_spoken = on_spoken
+        self.max_age = max_age
+
+        self.pending: list[Callout] = []
+        self.last_said: dict[str, str] = {}
+        # What was said, newest last
+        self.history: deque[Callout] = deque([], maxlen=self.HISTORY_CAP)
+        self.dropped = 0
+        self.condition = threading.Condition()
+
+        self._seq = itertools.count(1)
+        self.running = False
+        self.speak_thread = threading.Thread(target=self.speak_loop, daemon=True)
+
+    def start(self):
+        self.running = True
+        self.speak_thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.pending.clear()
+            self.condition.notify()
+        self.backend.stop()
+        if self.speak_thread.is_alive():
+            self.speak_thread.join(timeout=1.0)
+
+    def submit(
+        self, text: str, priority: Priority = Priority.NORMAL, key: str | None = None
+    ):
+        """
+        Queue something to say, this never blocks. Safe from any thread.
+
+        Args:
+            text (str): What to say
+            priority (Priority): Where in line it goes
+            key (str | None): Replaces anything still waiting under the same key
+        """
+        with self.condition:
+            if key is not None:
+                for callout in self.pending:
+                    if callout.key == key:
+                        callout.text = text
+                        callout.priority = min(callout.priority, priority)
+                        callout.created = time.monotonic()
+                        self.condition.notify()
+                        return
+                if self.last_said.get(key) == text:
+                    return
+
+            callout = Callout(next(self._seq), text, priority, key)
+            if len(self.pending) >= self.QUEUE_CAP:
+                # Full, whatever's least urgent (the newest of those) doesn't get said
+                least = max(self.pending + [callout], key=lambda c: (c.priority, c.seq))
+                self.dropped += 1
+                if least is callout:
+                    return
+                self.pending.remove(least)
+
+            self.pending.append(callout)
+            self.condition.notify()
+
+    def _next(self) -> Callout | None:
+        with self.condition:
+            while self.running and not self.pending:
+                self.condition.wait()
+            if not self.running:
+                return None
+
+            callout = min(self.pending, key=lambda c: (c.priority, c.seq))
+            self.pending.remove(callout)
+            if callout.key is not None:
+                self.last_said[callout.key] = callout.text
+            return callout
+
+    def speak_loop(self):
+        while self.running:
+            callout = self._next()
+            if callout is None:
+                break
+
+            age = time.monotonic() - callout.created
+            if callout.priority != Priority.CRITICAL and age > self.max_age:
+                self.dropped += 1
+                # Never said, so the same thing can be queued again
+                with self.condition:
+                    if self.last_said.get(callout.key) == callout.text:
+                        del self.last_said[callout.key]
+                continue
+
+            try:
+                self.backend.say(callout.text)
+            except Exception as e:
+                logging.error(f"Couldn't say {callout.text!r}: {e}")
+                continue
+
+            self.history.append(callout)
+            if self.on_spoken is not None:
+                self.on_spoken(callout)
+
+
+class AltitudeCallout:
+    """
+    Calls out altitude every ``step`` meters it moves (up or down) from the last
+    one called, so noise around a round number doesn't keep setting it off.
+    """
+
+    def __init__(self, callouts: CalloutService, key: str, step: float = 100.0) -> None:
+        self.callouts = callouts
+        self.key = key
+        self.step = step
+        self.last = 0.0
+
+    def update(self, altitude: float):
+        if abs(altitude - self.last) < self.step:
+            return
+        self.last = round(altitude / self.step) * self.step
+        self.callouts.submit(f"Altitude {self.last:.0f} meters", key=self.key)
+
+
+def alarm_listener(
+    links: list[str],
+    on_message: Callable[[str], None],
+    callouts: CalloutService | None = None,
+) -> Callable[[AlarmEvent], None]:
+    """
+    An ``AlarmEngine.on_event`` listener for one interface. Events on ``links`` go
+    to ``on_message`` as a line for the message console, and get read out through
+    ``callouts`` if there is one.
+    """
+
+    def listener(event: AlarmEvent):
+        # Runs on whichever thread checked the rows
+        if event.link not in links:
+            return
+        state = "ALARM" if event.active else "Cleared"
+        on_message(f"{state}: {event.rule} ({event.value:g})\n")
+        if callouts is not None:
+            if event.active:
+                callouts.submit(f"Alarm. {event.rule}.", Priority.HIGH)
+            else:
+                callouts.submit(f"{event.rule} cleared.")
+
+    return listener
@@ -0,0 +1,207 @@
+"""
+Finding which serial port has which payload on it, for when there's a dozen USB
+devices plugged in and no time to try them one by one.
+
+Every port gets opened at a few baud rates and listened to for a moment, all ports
+at once. Whatever comes in is split into frames and run through each protocol's
+own ``decode_frame``, and the protocol that turns the most of them into values is
+what's on the port.
+"""
+
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+import importlib
+import time
+
+import msgspec
+import serial
+import serial.tools.list_ports
+
+# Protocol name to the module with its decode_frame
+PROTOCOLS = {
+    "Kraken": "Kraken.protocol",
+    "Spaceducks": "Spaceducks.protocol",
+}
+
+# Most likely first, the rest only get tried if nothing made sense at it
+BAUDRATES = (9600, 57600, 115200)
+
+SAMPLE_S = 1.5
+
+# Fewer frames than this and nothing gets called a match
+MIN_FRAMES = 3
+
+# Fraction of frames that have to decode to values for a match. Noise basically
+# never does, but Spaceducks' msgpack floats can have the separator in them, so a
+# fair few of its frames get cut in two.
+MIN_SCORE = 0.25
+
+
+class PortProbe(msgspec.Struct):
+    port: str
+    description: str = ""
+    baudrate: int = 0
+    # None if nothing matched
+    protocol: str | None = None
+    # Fraction of frames the protocol decoded to values
+    score: float = 0.0
+    frames: int = 0
+    num_bytes: int = 0
+    error: str | None = None
+
+    def __str__(self) -> str:
+        if self.error is not None:
+            found = f"error: {self.error}"
+        elif self.protocol is None:
+            found = f"unknown ({self.num_bytes} B, {self.frames} frames)"
+        else:
+            found = (
+                f"{self.protocol} at {self.baudrate} baud "
+                f"({self.score:.0%} of {self.frames} frames)"
+            )
+        if self.description:
+            found += f" [{self.description}]"
+        return f"{self.port}: {found}"
+
+
+def classify(
+    frames: list[bytes], decoders: dict[str, Callable]
+) -> tuple[str | None, float]:
+    """
+    Which protocol decodes the most ``frames`` into values (text doesn't count,
+    Kraken passes anything through as text), and the fraction it decoded.
+    """
+    if len(frames) < MIN_FRAMES:
+        return None, 0.0
+
+    best, best_score = None, 0.0
+    for name, decode in decoders.items():
+        decoded = 0
+        for frame in frames:
+            try:
+                result = decode(frame)
+            except Exception:
+                continue
+            if result is not None and not isinstance(result, str):
+                decoded += 1
+
+        score = decoded / len(frames)
+        if score > best_score:
+            best, best_score = name, score
+
+    if best_score < MIN_SCORE:
+        return None, best_score
+    return best, best_score
+
+
+def sniff(
+    port: str, baudrate: int, sample_s: float = SAMPLE_S, eol: bytes = b";"
+) -> tuple[list[bytes], int]:
+    """
+    Everything ``port`` sends in ``sample_s`` at ``baudrate``, split into frames.
+    The first partial frame is dropped since it probably started mid-frame.
+
+    Returns:
+        tuple[list[bytes], int]: Frames and the total bytes read
+    """
+    data = bytearray()
+    with serial.Serial(port, baudrate, timeout=0.05) as conn:
+        deadline = time.monotonic() + sample_s
+        while time.monotonic() < deadline:
+            data += conn.read(max(conn.in_waiting, 1))
+
+    frames = bytes(data).split(eol)[1:-1]
+    return [frame for frame in frames if frame], len(data)
+
+
+def probe(
+    port: str,
+    description: str = "",
+    decoders: dict[str, Callable] | None = None,
+    baudrates: tuple[int, ...] = BAUDRATES,
+    sample_s: float = SAMPLE_S,
+) -> PortProbe:
+    """Listen to one port at each baud rate until something makes sense"""
+    if decoders is None:
+        decoders = protocol_decoders()
+
+    best = PortProbe(port, description)
+    for baudrate in baudrates:
+        try:
+            frames, num_bytes = sniff(port, baudrate, sample_s)
+        except (serial.SerialException, OSError) as e:
+            # Busy, gone or not allowed, the other rates won't do any better
+            return PortProbe(port, description, error=str(e))
+
+        protocol, score = classify(frames, decoders)
+        result = PortProbe(
+            port, description, baudrate, protocol, score, len(frames), num_bytes
+        )
+        if rank(result) > rank(best):
+            best = result
+        if protocol is not None:
+            break
+    return best
+
+
+def protocol_decoders(
+    protocols: dict[str, str] = PROTOCOLS,
+) -> dict[str, Callable]:
+    return {
+        name: importlib.import_module(module).decode_frame
+        for name, module in protocols.items()
+    }
+
+
+def rank(result: PortProbe) -> tuple:
+    """Sort key, best match biggest"""
+    return (
+        result.error is None,
+        result.protocol is not None,
+        result.score,
+        result.frames,
+        result.num_bytes,
+    )
+
+
+def discover(
+    ports: list[str] | None = None,
+    baudrates: tuple[int, ...] = BAUDRATES,
+    sample_s: float = SAMPLE_S,
+    exclude: tuple[str | None, ...] = (),
+) -> list[PortProbe]:
+    """
+    Probe every port (all of them ``list_ports`` knows about by default) at the same
+    time, so it takes as long as the slowest port however many there are: one
+    ``sample_s`` per baud rate it had to try. Ports in ``exclude`` are left alone.
+
+    Returns:
+        list[PortProbe]: Best match first
+    """
+    if ports is None:
+        candidates = [
+            (port.device, port.description)
+            for port in serial.tools.list_ports.comports()
+        ]
+    else:
+        candidates = [(port, "") for port in ports]
+    candidates = [candidate for candidate in candidates if candidate[0] not in exclude]
+    if not candidates:
+        return []
+
+    # Imported here rather than in each thread
+    decoders = protocol_decoders()
+    with ThreadPoolExecutor(max_workers=len(candidates)) as pool:
+        results = list(
+            pool.map(
+                lambda candidate: probe(*candidate, decoders, baudrates, sample_s),
+                candidates,
+            )
+        )
+    return sorted(results, key=rank, reverse=True)
+
+
+def matching(results: list[PortProbe], protocol: str) -> list[PortProbe]:
+    """The ports ``protocol`` was found on, best first"""
+    return [result for result in results if result.protocol == protocol]
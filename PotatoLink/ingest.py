@@ -0,0 +1,149 @@
+from __future__ import annotations
+from typing import Callable, TYPE_CHECKING
+import logging
+import threading
+import time
+
+import serial
+
+if TYPE_CHECKING:
+    from .alarms import AlarmEngine
+    from .link_stats import LinkStats
+    from .publish import TelemetryPublisher
+
+
+class SerialLink:
+    """
+    One serial port being read by an IngestEngine. Incoming bytes are split on
+    ``eol`` and every complete frame (without the separator) goes to ``on_frame``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        conn: serial.Serial,
+        on_frame: Callable[[bytes], None],
+        stats: LinkStats | None = None,
+        eol: bytes = b";",
+    ) -> None:
+        self.name = name
+        self.conn = conn
+        self.on_frame = on_frame
+        self.stats = stats
+        self.eol = eol
+        self.buffer = bytearray()
+        # Gets a copy of every raw frame for remote viewers, see IngestEngine
+        self.publisher: TelemetryPublisher | None = None
+        # Gets every chunk's frames to check, see IngestEngine
+        self.alarms: AlarmEngine | None = None
+
+    def feed(self, chunk: bytes):
+        """Split a chunk of raw bytes into frames and hand them off"""
+        self.buffer += chunk
+        if self.eol not in chunk:
+            return
+
+        *frames, rest = self.buffer.split(self.eol)
+        self.buffer = bytearray(rest)
+        frames = [bytes(frame) for frame in frames if frame]
+
+        for frame in frames:
+            if self.stats is not None:
+                self.stats.record_frame(len(frame) + len(self.eol))
+            if self.publisher is not None:
+                self.publisher.frame(self.name, frame)
+            try:
+                self.on_frame(frame)
+            except Exception as e:
+                if self.stats is not None:
+                    self.stats.record_decode_failure()
+                logging.error(e)
+                logging.error(f"Error on processing data {frame}")
+
+        if self.alarms is not None and frames:
+            self.alarms.check_frames(self.name, frames, time.monotonic())
+
+
+class IngestEngine:
+    """
+    A single thread that reads every registered serial link, instead of one
+    blocking thread per port. Whatever is waiting on each port gets read in one go
+    and split into frames, and the thread only sleeps when every port is idle.
+    """
+
+    IDLE_SLEEP_S = 0.001
+
+    # Frames are handed off on the ingest thread, there's nothing to poll for
+    out_of_process = False
+
+    def __init__(self) -> None:
+        self.links: list[SerialLink] = []
+        self.lock = threading.Lock()
+        self.publisher: TelemetryPublisher | None = None
+        self.alarms: AlarmEngine | None = None
+        self.running = False
+        self.ingest_thread = threading.Thread(target=self.ingest_loop)
+
+    def add_link(self, link: SerialLink):
+        with self.lock:
+            link.publisher = self.publisher
+            link.alarms = self.alarms
+            self.links.append(link)
+
+    def publish_to(self, publisher: TelemetryPublisher | None):
+        """Rebroadcast every link's frames, on links added later too"""
+        with self.lock:
+            self.publisher = publisher
+            for link in self.links:
+                link.publisher = publisher
+
+    def check_alarms(self, alarms: AlarmEngine | None):
+        """Check every chunk of frames against ``alarms``, on links added later too"""
+        with self.lock:
+            self.alarms = alarms
+            for link in self.links:
+                link.alarms = alarms
+
+    def remove_link(self, link: SerialLink):
+        with self.lock:
+            if link in self.links:
+                self.links.remove(link)
+
+    def start(self):
+        self.running = True
+        self.ingest_thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.ingest_thread.is_alive():
+            self.ingest_thread.join()
+
+    def poll(self):
+        # Counterpart of ProcessIngestEngine.poll(), frames were already handed off
+        pass
+
+    def ingest_loop(self):
+        while self.running:
+            with self.lock:
+                links = list(self.links)
+
+            got_data = False
+            for link in links:
+                try:
+                    waiting = link.conn.in_waiting
+                    if not waiting:
+                        continue
+                    chunk = link.conn.read(waiting)
+                except (serial.SerialException, OSError, TypeError) as e:
+                    # Port got closed or unplugged, stop polling it
+                    logging.error(f"Lost link {link.name}: {e}")
+                    if link.stats is not None:
+                        link.stats.record_lost(str(e))
+                    self.remove_link(link)
+                    continue
+
+                got_data = True
+                link.feed(chunk)
+
+            if not got_data:
+                time.sleep(self.IDLE_SLEEP_S)
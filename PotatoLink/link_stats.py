@@ -0,0 +1,147 @@
+from bisect import bisect_right
+import time
+
+import numpy as np
+
+
+class LinkStats:
+    """
+    Rolling per-second counters for one serial link.
+
+    Everything lives in preallocated numpy arrays indexed by the current second, so
+    the reader thread only ever does in-place increments and the UI thread can read
+    the arrays directly without taking a lock. There must only be one writer (the
+    thread reading the link), everything else only reads.
+    """
+
+    WINDOW_S = 60
+
+    # Inter-arrival histogram bin edges in milliseconds
+    JITTER_EDGES_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000)
+
+    # Gap between frames long enough to call it a dropout
+    DROPOUT_S = 1.0
+
+    def __init__(self, name: str, window_s: int = WINDOW_S) -> None:
+        self.name = name
+        self.window_s = window_s
+
+        self.bytes = np.zeros(window_s, dtype=np.float32)
+        self.frames = np.zeros(window_s, dtype=np.float32)
+        self.decode_failures = np.zeros(window_s, dtype=np.float32)
+        self.sequence_gaps = np.zeros(window_s, dtype=np.float32)
+        self.dropouts = np.zeros(window_s, dtype=np.float32)
+        self.jitter = np.zeros(
+            (window_s, len(self.JITTER_EDGES_MS) + 1), dtype=np.float32
+        )
+
+        self.total_bytes = 0
+        self.total_frames = 0
+        self.total_decode_failures = 0
+        self.total_sequence_gaps = 0
+
+        self.last_frame_time: float | None = None
+        self.last_sequence: int | None = None
+        # Why the port stopped being read (unplugged, ...), None while it's fine
+        self.lost: str | None = None
+
+        self._current_second = int(time.monotonic())
+        self._index = 0
+
+    def _advance(self, now: float) -> int:
+        """Move the write index up to the current second, clearing skipped buckets"""
+        second = int(now)
+        elapsed = second - self._current_second
+        if elapsed > 0:
+            for _ in range(min(elapsed, self.window_s)):
+                self._index = (self._index + 1) % self.window_s
+                self.bytes[self._index] = 0
+                self.frames[self._index] = 0
+                self.decode_failures[self._index] = 0
+                self.sequence_gaps[self._index] = 0
+                self.dropouts[self._index] = 0
+                self.jitter[self._index] = 0
+            self._current_second = second
+        return self._index
+
+    def record_frame(self, num_bytes: int, now: float | None = None):
+        """Call once per framed message, decoded or not"""
+        if now is None:
+            now = time.monotonic()
+        index = self._advance(now)
+
+        self.bytes[index] += num_bytes
+        self.frames[index] += 1
+        self.total_bytes += num_bytes
+        self.total_frames += 1
+
+        if self.last_frame_time is not None:
+            gap = now - self.last_frame_time
+            self.jitter[index, bisect_right(self.JITTER_EDGES_MS, gap * 1000)] += 1
+            if gap > self.DROPOUT_S:
+                self.dropouts[index] += 1
+        self.last_frame_time = now
+
+    def record_decode_failure(self, now: float | None = None):
+        if now is None:
+            now = time.monotonic()
+        self.decode_failures[self._advance(now)] += 1
+        self.total_decode_failures += 1
+
+    def record_sequence(
+        self, sequence: int, modulus: int = 256, now: float | None = None
+    ):
+        """
+        For protocols that number their frames. Counts how many numbers got skipped
+        since the last frame.
+        """
+        if self.last_sequence is not None:
+            missed = (sequence - self.last_sequence - 1) % modulus
+            if missed:
+                if now is None:
+                    now = time.monotonic()
+                self.sequence_gaps[self._advance(now)] += missed
+                self.total_sequence_gaps += missed
+        self.last_sequence = sequence
+
+    def record_lost(self, reason: str):
+        """The port is gone and won't be read anymore"""
+        self.lost = reason
+
+    @property
+    def counts_sequence(self) -> bool:
+        """Whether the link's protocol has been numbering frames for us at all"""
+        return self.last_sequence is not None
+
+    def _ordered(self, counter: np.ndarray) -> np.ndarray:
+        """
+        Counter buckets oldest to newest as of right now. This is read-only, so the
+        UI thread never touches the writer's index. If the link has gone quiet the
+        buckets the writer hasn't rolled over to yet are treated as zero.
+        """
+        ordered = np.roll(counter, -(self._index + 1), axis=0)
+        stale = min(int(time.monotonic()) - self._current_second, self.window_s)
+        if stale > 0:
+            ordered[:-stale] = ordered[stale:]
+            ordered[-stale:] = 0
+        return ordered
+
+    def history(self, counter: np.ndarray) -> np.ndarray:
+        """
+        Returns the given counter oldest to newest, without the second that is still
+        being filled in.
+        """
+        return self._ordered(counter)[:-1]
+
+    def latest(self, counter: np.ndarray) -> float:
+        """Value of the counter over the last complete second"""
+        return float(self._ordered(counter)[-2])
+
+    def jitter_histogram(self) -> np.ndarray:
+        """Inter-arrival counts over the whole window, one per bin"""
+        return self._ordered(self.jitter).sum(axis=0)
+
+    def seconds_since_frame(self) -> float | None:
+        if self.last_frame_time is None:
+            return None
+        return time.monotonic() - self.last_frame_time
@@ -0,0 +1,418 @@
+from __future__ import annotations
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import selectors
+import socket
+import struct
+import threading
+import time
+import zlib
+
+import msgspec
+import numpy as np
+
+from .workers import FrameDecoder, KIND_COL, KIND_DECODE_FAILURE, KIND_TEXT
+from .workers import VALUES_COL
+
+# Every message on the wire is this header (payload length) and then a msgpack Batch
+# or Snapshot
+HEADER = struct.Struct("<I")
+
+
+class LinkBatch(msgspec.Struct, array_like=True):
+    """Everything one link got since the last batch"""
+
+    link: str
+    # Raw frames without the separator, as they came off the port (threaded ingest
+    # only, worker processes keep theirs)
+    frames: list[bytes]
+    # float64 monotonic arrival time of each raw frame
+    frame_times: bytes
+    # float64 rows in the ingest ring layout (time, kind, bytes, values...)
+    rows: bytes
+    width: int
+    # Text frames (MSG, ACK, ...) in order
+    text: list[str]
+
+    def row_array(self) -> np.ndarray:
+        return np.frombuffer(self.rows, dtype=np.float64).reshape(-1, self.width)
+
+
+class Batch(msgspec.Struct, array_like=True, tag=True):
+    seq: int
+    # Station's monotonic clock when this went out
+    sent: float
+    links: list[LinkBatch]
+
+
+class Snapshot(msgspec.Struct, array_like=True, tag=True):
+    """
+    First thing a viewer gets: everything in the publisher's history, one
+    LinkBatch per link. Batches from ``seq + 1`` on pick up where it ends.
+    """
+
+    seq: int
+    sent: float
+    # Module of each link's decoder (like "Kraken.protocol"), so viewers know
+    # which interface goes with it
+    decoders: dict[str, str]
+    # zlib compressed msgpack list[LinkBatch]
+    links: bytes
+
+    def link_batches(self) -> list[LinkBatch]:
+        return msgspec.msgpack.decode(zlib.decompress(self.links), type=list[LinkBatch])
+
+
+class _PendingLink:
+    """What's piled up for one link until the next batch, filled in by ingest"""
+
+    def __init__(self, name: str, decoder: FrameDecoder | None, width: int) -> None:
+        self.name = name
+        self.decoder = decoder
+        self.width = width
+        self.frames: list[bytes] = []
+        self.frame_times: list[float] = []
+        self.rows: list[np.ndarray] = []
+        self.text: list[str] = []
+
+    def take(self) -> tuple[list, list, list, list] | None:
+        """
+        Frames, frame times, rows and text so far, None if there's nothing. Called
+        with the publisher's lock held, so it only swaps the lists out.
+        """
+        if not (self.frames or self.rows or self.text):
+            return None
+
+        taken = (self.frames, self.frame_times, self.rows, self.text)
+        self.frames, self.frame_times, self.rows, self.text = [], [], [], []
+        return taken
+
+    def link_batch(
+        self, frames: list[bytes], frame_times: list[float], rows: list, text: list
+    ) -> LinkBatch:
+        """What ``take()`` returned, ready to send. Runs without the lock."""
+        # Frames are decoded here on the publisher thread, not on the ingest one,
+        # and not while holding the lock ingest needs to hand over the next ones
+        if self.decoder is not None and frames:
+            decoded = np.zeros((len(frames), self.width), dtype=np.float64)
+            keep = np.ones(len(frames), dtype=bool)
+            for i, (now, frame) in enumerate(zip(frame_times, frames)):
+                decoded[i, :VALUES_COL] = (now, KIND_DECODE_FAILURE, len(frame))
+                try:
+                    result = self.decoder(frame)
+                except Exception:
+                    continue
+
+                if result is None:
+                    keep[i] = False
+                elif isinstance(result, str):
+                    decoded[i, KIND_COL] = KIND_TEXT
+                    text.append(result)
+                else:
+                    kind, values = result
+                    decoded[i, KIND_COL] = kind
+                    decoded[i, VALUES_COL : VALUES_COL + len(values)] = values
+            rows.append(decoded[keep])
+
+        return LinkBatch(
+            link=self.name,
+            frames=frames,
+            frame_times=np.array(frame_times, dtype=np.float64).tobytes(),
+            rows=np.concatenate(rows).tobytes() if rows else b"",
+            width=self.width,
+            text=text,
+        )
+
+
+def merge_link_batches(name: str, batches: list[LinkBatch]) -> LinkBatch:
+    """One LinkBatch with everything in ``batches`` (all from the same link)"""
+    width = batches[-1].width
+    return LinkBatch(
+        link=name,
+        frames=[frame for batch in batches for frame in batch.frames],
+        frame_times=b"".join(batch.frame_times for batch in batches),
+        # A worker's rows can't change width, but skip any that somehow did
+        rows=b"".join(batch.rows for batch in batches if batch.width == width),
+        width=width,
+        text=[text for batch in batches for text in batch.text],
+    )
+
+
+class _Client:
+    def __init__(self, sock: socket.socket, address) -> None:
+        self.sock = sock
+        self.address = address
+        self.queue: deque[memoryview] = deque()
+        self.sent = 0
+        # Batches published while its snapshot is still being made, they go out
+        # right after it. None once the snapshot is queued.
+        self.held: list[bytes] | None = []
+
+
+class TelemetryPublisher:
+    """
+    Rebroadcasts everything the ground station receives to any number of viewers
+    over TCP, so people away from the radio get the live data too.
+
+    Ingest hands over each raw frame (or decoded rows, from worker processes) with
+    a list append, and a publisher thread decodes, batches and sends them every
+    ``BATCH_INTERVAL_S``. Each viewer has its own bounded queue; one that falls too
+    far behind gets disconnected instead of holding anything else up.
+
+    Everything published is also kept (up to ``HISTORY_CAP`` link batches) and sent
+    to new viewers as a compressed Snapshot, so joining mid-flight still shows the
+    whole flight. With a lot of history that takes a while to make, so it's made on
+    a separate thread, and the new viewer's live batches wait for it while
+    everyone else's keep going out.
+    """
+
+    BATCH_INTERVAL_S = 0.02
+
+    # Batches a viewer can be behind before it gets dropped, about 5 s worth
+    CLIENT_QUEUE_CAP = 250
+
+    # About 10 minutes of link batches for a single busy link
+    HISTORY_CAP = 30_000
+
+    def __init__(self, host: str = "0.0.0.0", port: int = 5760) -> None:
+        self.host = host
+        self.port = port
+
+        self.links: dict[str, _PendingLink] = {}
+        self.lock = threading.Lock()
+
+        self.clients: list[_Client] = []
+        self.history: deque[LinkBatch] = deque(maxlen=self.HISTORY_CAP)
+        self.seq = 0
+        self.batches_sent = 0
+        self.dropped_clients = 0
+
+        self.server: socket.socket | None = None
+        self.selector = selectors.DefaultSelector()
+        self.snapshot_pool: ThreadPoolExecutor | None = None
+        # Finished snapshots for the publisher thread to queue, from the pool
+        self.snapshots_ready: deque[tuple[_Client, bytes]] = deque()
+        self.running = False
+        self.publish_thread = threading.Thread(target=self.publish_loop, daemon=True)
+
+    def add_link(
+        self, name: str, decoder: FrameDecoder | None = None, num_values: int = 1
+    ):
+        """
+        Register a link. With a ``decoder`` its raw frames get published as decoded
+        rows too (see WorkerLink for the decoder).
+        """
+        with self.lock:
+            self.links[name] = _PendingLink(name, decoder, VALUES_COL + num_values)
+
+    def _link(self, name: str) -> _PendingLink:
+        link = self.links.get(name)
+        if link is None:
+            link = self.links[name] = _PendingLink(name, None, VALUES_COL + 1)
+        return link
+
+    def frame(self, link: str, frame: bytes, now: float | None = None):
+        """Ingest side, one raw frame"""
+        if now is None:
+            now = time.monotonic()
+        with self.lock:
+            pending = self._link(link)
+            pending.frames.append(frame)
+            pending.frame_times.append(now)
+
+    def rows(self, link: str, rows: np.ndarray):
+        """Ingest side, rows already decoded by a worker (copied, they can be views)"""
+        with self.lock:
+            pending = self._link(link)
+            pending.width = rows.shape[1]
+            pending.rows.append(np.array(rows, dtype=np.float64))
+
+    def text(self, link: str, text: str):
+        with self.lock:
+            self._link(link).text.append(text)
+
+    def start(self):
+        self.server = socket.create_server((self.host, self.port))
+        self.server.setblocking(False)
+        self.selector.register(self.server, selectors.EVENT_READ)
+        self.running = True
+        self.publish_thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.publish_thread.is_alive():
+            self.publish_thread.join()
+        if self.snapshot_pool is not None:
+            self.snapshot_pool.shutdown(wait=False, cancel_futures=True)
+            self.snapshot_pool = None
+        for client in list(self.clients):
+            self._drop(client)
+        if self.server is not None:
+            self.selector.unregister(self.server)
+            self.server.close()
+            self.server = None
+        self.selector.close()
+
+    @property
+    def address(self) -> tuple[str, int]:
+        """Where it's actually listening, handy with port 0"""
+        return self.server.getsockname()[:2]
+
+    def _accept(self):
+        try:
+            sock, address = self.server.accept()
+        except BlockingIOError:
+            return
+        sock.setblocking(False)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        client = _Client(sock, address)
+        self.clients.append(client)
+        self.selector.register(sock, selectors.EVENT_READ, client)
+        logging.info(f"Viewer connected from {address}")
+
+        # Copied here since the history keeps changing on this thread
+        if self.snapshot_pool is None:
+            self.snapshot_pool = ThreadPoolExecutor(1, thread_name_prefix="Snapshot")
+        self.snapshot_pool.submit(
+            self._make_snapshot, client, list(self.history), self.seq
+        )
+
+    def _make_snapshot(self, client: _Client, history: list[LinkBatch], seq: int):
+        try:
+            message = self.encode(self.snapshot(history, seq))
+        except Exception as e:
+            logging.error(f"Couldn't make a snapshot for {client.address}: {e}")
+            return
+        self.snapshots_ready.append((client, message))
+
+    def _queue_snapshots(self):
+        while self.snapshots_ready:
+            client, message = self.snapshots_ready.popleft()
+            if client not in self.clients:
+                continue
+            held, client.held = client.held, None
+            self._enqueue(client, message)
+            for batch in held:
+                self._enqueue(client, batch)
+
+    def _drop(self, client: _Client, reason: str = ""):
+        if client not in self.clients:
+            return
+        self.clients.remove(client)
+        self.selector.unregister(client.sock)
+        client.sock.close()
+        if reason:
+            self.dropped_clients += 1
+            logging.warning(f"Dropped viewer {client.address}: {reason}")
+
+    def _enqueue(self, client: _Client, message: bytes):
+        if len(client.queue) >= self.CLIENT_QUEUE_CAP:
+            self._drop(client, "too far behind")
+            return
+        if not client.queue:
+            self.selector.modify(
+                client.sock, selectors.EVENT_READ | selectors.EVENT_WRITE, client
+            )
+        client.queue.append(memoryview(message))
+
+    def _flush(self, client: _Client):
+        while client.queue:
+            head = client.queue[0]
+            try:
+                sent = client.sock.send(head)
+            except BlockingIOError:
+                return
+            except OSError as e:
+                self._drop(client, str(e))
+                return
+            client.sent += sent
+            if sent < len(head):
+                client.queue[0] = head[sent:]
+                return
+            client.queue.popleft()
+        self.selector.modify(client.sock, selectors.EVENT_READ, client)
+
+    def _read(self, client: _Client):
+        # Viewers don't send anything yet, this is just to notice them leaving
+        try:
+            data = client.sock.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            logging.info(f"Viewer {client.address} disconnected")
+            self._drop(client)
+
+    @staticmethod
+    def encode(message: msgspec.Struct) -> bytes:
+        payload = msgspec.msgpack.encode(message)
+        return HEADER.pack(len(payload)) + payload
+
+    def snapshot(self, history: list[LinkBatch], seq: int) -> Snapshot:
+        """
+        Everything in ``history``, which ends with batch ``seq``. Can run on any
+        thread.
+        """
+        by_link: dict[str, list[LinkBatch]] = {}
+        for link_batch in history:
+            by_link.setdefault(link_batch.link, []).append(link_batch)
+        links = [merge_link_batches(name, batches) for name, batches in by_link.items()]
+
+        with self.lock:
+            decoders = {
+                name: pending.decoder.__module__
+                for name, pending in self.links.items()
+                if pending.decoder is not None
+            }
+        compressed = zlib.compress(msgspec.msgpack.encode(links), 1)
+        # After compressing, so viewers don't count that as delay on the network
+        return Snapshot(
+            seq=seq, sent=time.monotonic(), decoders=decoders, links=compressed
+        )
+
+    def _make_batch(self) -> Batch | None:
+        with self.lock:
+            taken = [(pending, pending.take()) for pending in self.links.values()]
+        links = [
+            pending.link_batch(*pieces)
+            for pending, pieces in taken
+            if pieces is not None
+        ]
+        if not links:
+            return None
+        self.history.extend(links)
+        self.seq += 1
+        return Batch(seq=self.seq, sent=time.monotonic(), links=links)
+
+    def publish(self, batch: Batch):
+        message = self.encode(batch)
+        for client in list(self.clients):
+            if client.held is not None:
+                client.held.append(message)
+            else:
+                self._enqueue(client, message)
+        self.batches_sent += 1
+
+    def publish_loop(self):
+        next_batch = time.monotonic()
+        while self.running:
+            timeout = max(next_batch - time.monotonic(), 0.0)
+            for key, events in self.selector.select(timeout):
+                if key.fileobj is self.server:
+                    self._accept()
+                    continue
+                client = key.data
+                if events & selectors.EVENT_READ:
+                    self._read(client)
+                if events & selectors.EVENT_WRITE and client in self.clients:
+                    self._flush(client)
+            self._queue_snapshots()
+
+            now = time.monotonic()
+            if now >= next_batch:
+                next_batch = now + self.BATCH_INTERVAL_S
+                batch = self._make_batch()
+                if batch is not None:
+                    self.publish(batch)
@@ -0,0 +1,310 @@
+from __future__ import annotations
+from typing import Callable
+import logging
+import socket
+import threading
+import time
+import zlib
+
+import msgspec
+import numpy as np
+
+from .alarms import AlarmEngine, protocol_fields
+from .link_stats import LinkStats
+from .publish import HEADER, Batch, LinkBatch, Snapshot
+from .workers import KIND_COL, KIND_DECODE_FAILURE, NBYTES_COL, TIME_COL
+
+
+class RemoteLink:
+    """
+    One of the station's links, as seen by a viewer. Stands in for a WorkerLink:
+    rows and text pile up here off the network thread and get handed to the
+    interface by ``poll()`` on the UI thread.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.stats = LinkStats(name)
+        self.on_rows: Callable[[np.ndarray], None] | None = None
+        self.on_text: Callable[[str], None] | None = None
+        # Checked against the live rows, here rather than at the station
+        self.alarms: AlarmEngine | None = None
+
+        # Blocks of rows and whether they're live (snapshot rows skip the stats)
+        self.rows: list[tuple[np.ndarray, bool]] = []
+        self.text: list[str] = []
+        self.lock = threading.Lock()
+
+        # Newest row so far in station time, so a reconnect doesn't repeat rows
+        self.last_time = -np.inf
+        # And in our time, which never goes back even when the offset does
+        self.last_stamped = -np.inf
+        self.warned_write = False
+
+    def add(
+        self, link_batch: LinkBatch, offset: float, live: bool = True, text=True
+    ) -> int:
+        """
+        Network thread, ``offset`` turns station time into ours. Rows never get
+        stamped earlier than the ones before them, the plots and cursor readouts
+        rely on times only going up.
+
+        Returns:
+            int: Number of new rows
+        """
+        rows = link_batch.row_array()
+        rows = rows[rows[:, TIME_COL] > self.last_time]
+        if len(rows):
+            self.last_time = rows[-1, TIME_COL]
+            rows = rows.copy()
+            rows[:, TIME_COL] += offset
+            # The snapshot's offset includes sending it, so the first live batches
+            # usually bring it down and would land before the replayed rows
+            np.maximum(rows[:, TIME_COL], self.last_stamped, out=rows[:, TIME_COL])
+            self.last_stamped = rows[-1, TIME_COL]
+
+        with self.lock:
+            if len(rows):
+                self.rows.append((rows, live))
+            if text:
+                self.text += link_batch.text
+        return len(rows)
+
+    def write(self, data: bytes):
+        # Only the station talks to the payloads
+        if not self.warned_write:
+            logging.warning(f"{self.name} is remote, commands aren't sent from here")
+            self.warned_write = True
+
+    def close(self):
+        pass
+
+    def poll(self):
+        """Same as WorkerLink.poll(), from whatever thread calls this"""
+        # Keep everything until the interface is there to take it
+        if self.on_rows is None:
+            return
+
+        with self.lock:
+            blocks, self.rows = self.rows, []
+            text, self.text = self.text, []
+
+        for rows, live in blocks:
+            # The stats are about the live link, not what the station saw earlier
+            for now, kind, num_bytes in rows[:, : NBYTES_COL + 1] if live else ():
+                self.stats.record_frame(int(num_bytes), now)
+                if kind == KIND_DECODE_FAILURE:
+                    self.stats.record_decode_failure(now)
+
+            if live and self.alarms is not None:
+                self.alarms.check(self.name, rows)
+
+            rows = rows[rows[:, KIND_COL] >= 0]
+            if len(rows):
+                self.on_rows(rows)
+
+        for line in text:
+            self.on_text(line)
+
+
+class RemoteIngest:
+    """
+    ProcessIngestEngine lookalike for interfaces fed by RemoteLinks. Decoded rows
+    come in batches from the station and get handed over once a frame in
+    ``poll()``.
+    """
+
+    out_of_process = True
+
+    def __init__(self, remote: RemoteLinks) -> None:
+        self.remote = remote
+
+    @property
+    def running(self) -> bool:
+        return self.remote.running
+
+    def start(self):
+        if not self.remote.running:
+            self.remote.start()
+
+    def stop(self):
+        self.remote.stop()
+
+    def poll(self):
+        for link in list(self.remote.links.values()):
+            link.poll()
+
+
+class RemoteLinks:
+    """
+    A ground station's links over the network, from its TelemetryPublisher. Takes
+    the place of EarlyLinks when building interfaces, so KrakenInterface and
+    SpaceduckInterface run unchanged on a laptop away from the radio.
+
+    On connecting the station sends a snapshot of everything so far, which gets
+    replayed into the interfaces as one big batch, and then it streams live. If the
+    connection drops it keeps retrying, and picks up the rows it missed from the
+    next snapshot.
+    """
+
+    RECONNECT_S = 1.0
+
+    # How often the receive thread checks if it should stop
+    RECV_TIMEOUT_S = 0.5
+
+    def __init__(self, host: str, port: int = 5760) -> None:
+        self.host = host
+        self.port = port
+
+        self.links: dict[str, RemoteLink] = {}
+        self.decoders: dict[str, str] = {}
+        self.ingest = RemoteIngest(self)
+        self.alarms: AlarmEngine | None = None
+
+        self.decoder = msgspec.msgpack.Decoder(Batch | Snapshot)
+        # Station monotonic time to ours, the smallest (least delayed) seen so far
+        self.offset: float | None = None
+        self.seq = 0
+        self.batches = 0
+        self.snapshots = 0
+        self.replayed = 0
+        self.connected = threading.Event()
+        self.got_snapshot = threading.Event()
+
+        self.running = False
+        self.receive_thread = threading.Thread(target=self.receive_loop, daemon=True)
+
+    def __contains__(self, port: str) -> bool:
+        return port in self.links
+
+    def start(self):
+        self.running = True
+        self.receive_thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.receive_thread.is_alive():
+            self.receive_thread.join()
+
+    def wait_for_snapshot(self, timeout: float | None = None) -> dict[str, str]:
+        """
+        Block until the station has said what links it has.
+
+        Returns:
+            dict[str, str]: Decoder module of each link, like EarlyLinks' ports
+
+        Raises:
+            TimeoutError: If no snapshot came in time
+        """
+        if not self.got_snapshot.wait(timeout):
+            raise TimeoutError(f"No snapshot from {self.host}:{self.port}")
+        return dict(self.decoders)
+
+    def check_alarms(self, alarms: AlarmEngine):
+        """Check the live rows of every link against ``alarms``"""
+        self.alarms = alarms
+        for name, link in list(self.links.items()):
+            self._add_alarms(name, link)
+
+    def _add_alarms(self, name: str, link: RemoteLink):
+        if self.alarms is None or name not in self.decoders:
+            return
+        self.alarms.add_link(name, protocol_fields(self.decoders[name]))
+        link.alarms = self.alarms
+
+    def conn(self, port: str) -> RemoteLink:
+        return self.links[port]
+
+    def stats(self, port: str) -> LinkStats:
+        if port in self.links:
+            return self.links[port].stats
+        return LinkStats(port)
+
+    def attach(
+        self,
+        port: str,
+        on_frame: Callable[[bytes], None] | None = None,
+        on_rows: Callable[[np.ndarray], None] | None = None,
+        on_text: Callable[[str], None] | None = None,
+    ):
+        """Hand a link to its interface, what arrived so far goes out on next poll"""
+        # Raw frames aren't used, the station already decoded everything
+        link = self.links[port]
+        link.on_text = on_text
+        link.on_rows = on_rows
+
+    def _link(self, name: str) -> RemoteLink:
+        link = self.links.get(name)
+        if link is None:
+            link = self.links[name] = RemoteLink(name)
+        return link
+
+    def handle(self, message: Batch | Snapshot):
+        offset = time.monotonic() - message.sent
+        if self.offset is None or offset < self.offset:
+            self.offset = offset
+
+        if type(message) is Snapshot:
+            # Text has no timestamps to tell what's new, so only the first
+            # snapshot's text is kept
+            text = not self.snapshots
+            new = [name for name in message.decoders if name not in self.decoders]
+            self.decoders.update(message.decoders)
+            for name in message.decoders:
+                link = self._link(name)
+                if name in new:
+                    self._add_alarms(name, link)
+            for link_batch in message.link_batches():
+                link = self._link(link_batch.link)
+                self.replayed += link.add(link_batch, self.offset, False, text)
+            self.snapshots += 1
+            self.got_snapshot.set()
+        else:
+            if self.seq and message.seq != self.seq + 1:
+                logging.warning(f"Missed batches {self.seq + 1} to {message.seq - 1}")
+            for link_batch in message.links:
+                self._link(link_batch.link).add(link_batch, self.offset)
+            self.batches += 1
+        self.seq = message.seq
+
+    def receive(self, sock: socket.socket):
+        buffer = bytearray()
+        while self.running:
+            try:
+                data = sock.recv(65536)
+            except socket.timeout:
+                continue
+            if not data:
+                return
+            buffer += data
+
+            # Handle every complete message in the buffer
+            start = 0
+            while len(buffer) - start >= HEADER.size:
+                (size,) = HEADER.unpack_from(buffer, start)
+                end = start + HEADER.size + size
+                if len(buffer) < end:
+                    break
+                self.handle(self.decoder.decode(buffer[start + HEADER.size : end]))
+                start = end
+            del buffer[:start]
+
+    def receive_loop(self):
+        while self.running:
+            try:
+                sock = socket.create_connection(
+                    (self.host, self.port), timeout=self.RECV_TIMEOUT_S
+                )
+            except OSError:
+                time.sleep(self.RECONNECT_S)
+                continue
+
+            logging.info(f"Connected to station {self.host}:{self.port}")
+            self.connected.set()
+            try:
+                with sock:
+                    self.receive(sock)
+            except (OSError, msgspec.DecodeError, zlib.error) as e:
+                logging.error(f"Lost station {self.host}:{self.port}: {e}")
+            self.connected.clear()
+            self.seq = 0
@@ -0,0 +1,104 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+class SharedRing:
+    """
+    Fixed-size ring of float64 rows in shared memory, for one writer process and
+    one reader process.
+
+    The first 8 bytes hold the total number of rows ever written. The writer fills
+    in a row and only then bumps the count, so the reader never sees a half-written
+    row unless it falls a whole ring behind (in which case it skips ahead).
+
+    Reads are views, not copies, so a row can still be overwritten while the reader
+    is using it if the writer gets a whole ring ahead in the meantime. ``lapped()``
+    says after the fact whether that happened.
+    """
+
+    HEADER_BYTES = 8
+
+    def __init__(
+        self, capacity: int, width: int, name: str | None = None, create=True
+    ) -> None:
+        """
+        Args:
+            capacity (int): Number of rows before the oldest get overwritten
+            width (int): Floats per row
+            name (str | None): Shared memory block to attach to, leave as None when
+                creating a new ring
+            create (bool): Create the block (the owner) or attach to an existing one
+        """
+        self.capacity = capacity
+        self.width = width
+        self.owner = create
+
+        size = self.HEADER_BYTES + capacity * width * 8
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+
+        self.header = np.ndarray((1,), dtype=np.int64, buffer=self.shm.buf)
+        self.data = np.ndarray(
+            (capacity, width),
+            dtype=np.float64,
+            buffer=self.shm.buf,
+            offset=self.HEADER_BYTES,
+        )
+        if create:
+            self.header[0] = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def count(self) -> int:
+        return int(self.header[0])
+
+    def append(self, row):
+        """Writer side. ``row`` can be shorter than the ring width."""
+        count = int(self.header[0])
+        self.data[count % self.capacity, : len(row)] = row
+        self.header[0] = count + 1
+
+    def read_since(self, count: int) -> tuple[list[np.ndarray], int]:
+        """
+        Reader side. Returns views (not copies) of every row written since ``count``,
+        oldest first. That's one view normally, or two if the rows wrap around the
+        end of the ring.
+
+        Args:
+            count (int): The count returned by the previous call, 0 to start
+
+        Returns:
+            tuple[list[np.ndarray], int]: Row blocks, and the count to pass next time
+        """
+        end = int(self.header[0])
+        # The oldest slot is the one the writer fills next, leave it out
+        start = max(count, end - self.capacity + 1)
+        num_rows = end - start
+        if num_rows <= 0:
+            return [], end
+
+        first = start % self.capacity
+        if first + num_rows <= self.capacity:
+            return [self.data[first : first + num_rows]], end
+
+        wrapped = num_rows - (self.capacity - first)
+        return [self.data[first:], self.data[:wrapped]], end
+
+    def lapped(self, count: int) -> int:
+        """
+        Reader side. How many rows, starting at row ``count``, the writer has
+        started overwriting. Anything ``read_since`` returned from ``count`` on is
+        intact if this is 0 once the reader is done with it.
+        """
+        return max(0, int(self.header[0]) - self.capacity + 1 - count)
+
+    def close(self):
+        # The numpy views have to go before the buffer can be released
+        del self.header
+        del self.data
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
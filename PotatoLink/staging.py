@@ -0,0 +1,172 @@
+from __future__ import annotations
+from collections import deque
+from typing import Callable
+import logging
+import threading
+
+import numpy as np
+import serial
+
+from .alarms import AlarmEngine, protocol_fields
+from .ingest import IngestEngine, SerialLink
+from .link_stats import LinkStats
+from .publish import TelemetryPublisher
+from .uplink import WRITE_TIMEOUT_S
+from .workers import FrameDecoder, ProcessIngestEngine, WorkerLink
+
+
+class FrameRecorder:
+    """
+    Stand-in handler for a link whose real handler doesn't exist yet. Everything it
+    gets is kept until ``attach()``, which replays it in order and then forwards
+    from then on.
+    """
+
+    RECORD_CAP = 50_000
+
+    def __init__(self, maxlen: int = RECORD_CAP, copy: Callable | None = None) -> None:
+        self.recorded = deque(maxlen=maxlen)
+        # For things that are only valid during the call (like ring views)
+        self.copy = copy
+        self.handler: Callable | None = None
+        self.replayed = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, item):
+        with self.lock:
+            if self.handler is None:
+                self.recorded.append(item if self.copy is None else self.copy(item))
+                return
+        self.handler(item)
+
+    def attach(self, handler: Callable):
+        # Holding the lock stops new frames from jumping ahead of the replay
+        with self.lock:
+            while self.recorded:
+                item = self.recorded.popleft()
+                self.replayed += 1
+                try:
+                    handler(item)
+                except Exception as e:
+                    # Same as a live frame failing, don't lose the rest over it
+                    logging.error(e)
+                    logging.error(f"Error on replaying data {item}")
+            self.handler = handler
+
+
+class EarlyLinks:
+    """
+    Serial ports opened during staged startup, before anything GUI-related is even
+    imported, so telemetry sent while the ground station boots isn't lost. Frames
+    get recorded until the interface is built and attaches its handlers, then
+    they're replayed into its state.
+
+    In worker mode the ports are read by ingest processes, which already buffer
+    everything in their rings until polled.
+    """
+
+    def __init__(self, ingest_workers=False) -> None:
+        self.ingest = ProcessIngestEngine() if ingest_workers else IngestEngine()
+        self.conns: dict[str, serial.Serial | WorkerLink] = {}
+        self.link_stats: dict[str, LinkStats] = {}
+        self.recorders: dict[str, dict[str, FrameRecorder]] = {}
+        self.decoders: dict[str, tuple[FrameDecoder | None, int]] = {}
+
+    def __contains__(self, port: str) -> bool:
+        return port in self.conns
+
+    def open(
+        self,
+        port: str,
+        baudrate: int,
+        decoder: FrameDecoder | None = None,
+        num_values: int = 1,
+        timeout: float = 2,
+    ):
+        """
+        Open a port and start recording it.
+
+        Args:
+            decoder (FrameDecoder | None): Payload decoder for worker mode, see
+                WorkerLink
+            num_values (int): Most values ``decoder`` returns for a frame
+        """
+        stats = LinkStats(port)
+        if self.ingest.out_of_process:
+            recorders = {
+                "on_rows": FrameRecorder(copy=np.copy),
+                "on_text": FrameRecorder(),
+            }
+            conn = WorkerLink(
+                port,
+                baudrate,
+                decoder,
+                recorders["on_rows"],
+                recorders["on_text"],
+                stats,
+                num_values=num_values,
+            )
+            self.ingest.add_link(conn)
+        else:
+            recorders = {"on_frame": FrameRecorder()}
+            conn = serial.Serial(
+                port, baudrate, timeout=timeout, write_timeout=WRITE_TIMEOUT_S
+            )
+            self.ingest.add_link(SerialLink(port, conn, recorders["on_frame"], stats))
+
+        self.conns[port] = conn
+        self.link_stats[port] = stats
+        self.recorders[port] = recorders
+        self.decoders[port] = (decoder, num_values)
+
+    def start(self):
+        self.ingest.start()
+
+    def stop(self):
+        """Stop reading, also when the GUI never got far enough to take over"""
+        self.ingest.stop()
+
+    def publish(self, publisher: TelemetryPublisher):
+        """Rebroadcast every open port to remote viewers through ``publisher``"""
+        for port, (decoder, num_values) in self.decoders.items():
+            publisher.add_link(port, decoder, num_values)
+        self.ingest.publish_to(publisher)
+
+    def check_alarms(self, alarms: AlarmEngine):
+        """Check everything every open port decodes against ``alarms``"""
+        for port, (decoder, _) in self.decoders.items():
+            if decoder is not None:
+                alarms.add_link(port, protocol_fields(decoder.__module__), decoder)
+        self.ingest.check_alarms(alarms)
+
+    def conn(self, port: str) -> serial.Serial | WorkerLink:
+        """The open port, or the WorkerLink that forwards to it in worker mode"""
+        return self.conns[port]
+
+    def stats(self, port: str) -> LinkStats:
+        """Stats the port has been recording into, or new ones if it wasn't opened early"""
+        if port in self.link_stats:
+            return self.link_stats[port]
+        return LinkStats(port)
+
+    def attach(
+        self,
+        port: str,
+        on_frame: Callable[[bytes], None] | None = None,
+        on_rows: Callable[[np.ndarray], None] | None = None,
+        on_text: Callable[[str], None] | None = None,
+    ):
+        """Hand the port over to its interface, replaying what was recorded so far"""
+        handlers = {"on_frame": on_frame, "on_rows": on_rows, "on_text": on_text}
+        for kind, recorder in self.recorders[port].items():
+            if handlers[kind] is not None:
+                recorder.attach(handlers[kind])
+
+    @property
+    def replayed(self) -> int:
+        """Number of frames that arrived before their interface was ready"""
+        return sum(
+            recorder.replayed
+            for recorders in self.recorders.values()
+            for recorder in recorders.values()
+        )
@@ -0,0 +1,275 @@
+from __future__ import annotations
+from collections import deque
+from enum import Enum, IntEnum
+from typing import Callable
+import itertools
+import logging
+import queue
+import threading
+import time
+
+import serial
+
+# Ports get opened with this as their write_timeout. Writes only happen on the
+# uplink thread, so a stuck port holds up the next command for at most this long
+# instead of forever, and with 0 a write would just send whatever fits.
+WRITE_TIMEOUT_S = 0.5
+
+
+class Priority(IntEnum):
+    """Lower value goes out first"""
+
+    CRITICAL = 0
+    HIGH = 1
+    NORMAL = 2
+    LOW = 3
+
+
+class CommandState(Enum):
+    QUEUED = "queued"
+    SENT = "sent"
+    ACKED = "acked"
+    TIMED_OUT = "timed out"
+    FAILED = "failed"
+
+
+class UplinkCommand:
+    def __init__(
+        self, seq: int, text: str, priority: Priority, needs_ack: bool
+    ) -> None:
+        self.seq = seq
+        self.text = text
+        self.priority = priority
+        self.needs_ack = needs_ack
+
+        self.state = CommandState.QUEUED
+        self.attempts = 0
+        self.created = time.monotonic()
+        self.first_sent: float | None = None
+        self.last_sent: float | None = None
+        self.acked_at: float | None = None
+        # Not to be retried before this, after a failed write
+        self.retry_at = 0.0
+
+    @property
+    def latency(self) -> float | None:
+        """Seconds from being queued to being acknowledged by the payload"""
+        if self.acked_at is None:
+            return None
+        return self.acked_at - self.created
+
+    def __lt__(self, other: UplinkCommand) -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+def write_all(conn, data: bytes):
+    """
+    Write ``data`` to a port, from an UplinkScheduler ``write`` callback. Raises if
+    only part of it went out, so the scheduler counts a failed attempt instead of
+    marking a cut off command as sent.
+    """
+    # WorkerLinks only queue it for their worker and return None
+    written = conn.write(data)
+    if written is not None and written < len(data):
+        raise serial.SerialTimeoutException(f"Wrote {written} of {len(data)} bytes")
+
+
+class UplinkScheduler:
+    """
+    Sends commands to the payload from a background thread so the UI never blocks
+    on a serial write.
+
+    Commands are pulled out of a priority queue (so a kill jumps ahead of a pile of
+    heartbeats), and commands sent with ``needs_ack`` are kept around until the
+    downlink reports ``ACK <command>`` back. If the ack doesn't show up in time the
+    command is resent, up to ``max_attempts`` times. A write that fails is retried
+    after ``WRITE_RETRY_S`` without holding up anything else in the queue.
+
+    Acks are matched by text, against the oldest pending command with that text,
+    since that's what the payloads echo back. ``seq`` only orders the queue, it
+    never goes on the wire. So a late ack for an earlier send of a command acks its
+    resend too, which is fine since it did land.
+    """
+
+    ACK_TIMEOUT_S = 1.5
+
+    MAX_ATTEMPTS = 3
+
+    # Backoff before retrying after the write itself raised (e.g. full TX buffer)
+    WRITE_RETRY_S = 0.05
+
+    HISTORY_CAP = 50
+
+    LATENCY_CAP = 200
+
+    def __init__(
+        self,
+        write: Callable[[str], None],
+        on_status: Callable[[UplinkCommand], None] | None = None,
+        ack_timeout: float = ACK_TIMEOUT_S,
+        max_attempts: int = MAX_ATTEMPTS,
+    ) -> None:
+        """
+        Args:
+            write (Callable[[str], None]): Does the actual write to the link(s). Only
+                ever called from the scheduler thread.
+            on_status (Callable[[UplinkCommand], None] | None): Called from the
+                scheduler/reader thread whenever a command is acked, times out or fails.
+            ack_timeout (float): Seconds to wait for an ack before resending.
+            max_attempts (int): Total number of writes before giving up on a command.
+        """
+        self.write = write
+        self.on_status = on_status
+        self.ack_timeout = ack_timeout
+        self.max_attempts = max_attempts
+
+        self.queue: queue.PriorityQueue[UplinkCommand] = queue.PriorityQueue()
+        self.pending: dict[int, UplinkCommand] = {}
+        # Commands waiting out WRITE_RETRY_S after a failed write
+        self.retrying: list[UplinkCommand] = []
+        self.lock = threading.Lock()
+
+        # Recent commands for the uplink window, newest last
+        self.history: deque[UplinkCommand] = deque([], maxlen=self.HISTORY_CAP)
+        self.latencies: deque[float] = deque([], maxlen=self.LATENCY_CAP)
+
+        self._seq = itertools.count(1)
+        self.running = False
+        self.send_thread = threading.Thread(target=self.send_loop)
+
+    def start(self):
+        self.running = True
+        self.send_thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.send_thread.is_alive():
+            self.send_thread.join()
+
+    def submit(
+        self, text: str, priority: Priority = Priority.NORMAL, needs_ack: bool = False
+    ) -> UplinkCommand:
+        """
+        Queue up a command, this never blocks.
+
+        Args:
+            text (str): Command to send, without the trailing separator
+            priority (Priority): Where in line the command goes
+            needs_ack (bool): Wait for ``ACK <text>`` from the payload and resend if
+                it doesn't arrive
+
+        Returns:
+            UplinkCommand: Handle that can be checked to see if the command landed
+        """
+        command = UplinkCommand(next(self._seq), text, priority, needs_ack)
+        self.history.append(command)
+        self.queue.put(command)
+        return command
+
+    def acknowledge(self, text: str) -> UplinkCommand | None:
+        """
+        Match an ack from the downlink against the oldest pending command with the
+        same text. Safe to call from the serial threads.
+        """
+        now = time.monotonic()
+        with self.lock:
+            for seq, command in self.pending.items():
+                if command.text == text:
+                    del self.pending[seq]
+                    break
+            else:
+                return None
+
+            command.state = CommandState.ACKED
+            command.acked_at = now
+            self.latencies.append(command.latency)
+
+        self._notify(command)
+        return command
+
+    def send_loop(self):
+        while self.running:
+            try:
+                command = self.queue.get(timeout=0.05)
+            except queue.Empty:
+                command = None
+
+            if command is not None:
+                self._send(command)
+
+            self._check_retries()
+            self._check_timeouts()
+
+    def _send(self, command: UplinkCommand):
+        command.attempts += 1
+        now = time.monotonic()
+        if command.needs_ack:
+            # Pending before it's written, the ack can come back before write()
+            # even returns
+            with self.lock:
+                command.last_sent = now
+                self.pending[command.seq] = command
+
+        try:
+            self.write(command.text)
+        except Exception as e:
+            logging.error(f"Uplink write of {command.text!r} failed: {e}")
+            with self.lock:
+                self.pending.pop(command.seq, None)
+            if command.attempts >= self.max_attempts:
+                command.state = CommandState.FAILED
+                self._notify(command)
+            else:
+                command.retry_at = time.monotonic() + self.WRITE_RETRY_S
+                self.retrying.append(command)
+            return
+
+        with self.lock:
+            if command.first_sent is None:
+                command.first_sent = now
+            command.last_sent = now
+            # Unless it got acked in the meantime
+            if command.state != CommandState.ACKED:
+                command.state = CommandState.SENT
+
+    def _check_retries(self):
+        now = time.monotonic()
+        due = [command for command in self.retrying if command.retry_at <= now]
+        for command in due:
+            self.retrying.remove(command)
+            self.queue.put(command)
+
+    def _check_timeouts(self):
+        now = time.monotonic()
+        expired = []
+        with self.lock:
+            for seq, command in list(self.pending.items()):
+                if now - command.last_sent > self.ack_timeout:
+                    del self.pending[seq]
+                    expired.append(command)
+
+        for command in expired:
+            if command.attempts >= self.max_attempts:
+                command.state = CommandState.TIMED_OUT
+                self._notify(command)
+            else:
+                command.state = CommandState.QUEUED
+                self.queue.put(command)
+
+    def _notify(self, command: UplinkCommand):
+        if self.on_status is not None:
+            self.on_status(command)
+
+    def latency_stats(self) -> tuple[int, float, float, float]:
+        """
+        Returns:
+            tuple[int, float, float, float]: Count, mean, p95 and max ack latency in
+                seconds, all zero if nothing has been acked yet
+        """
+        latencies = sorted(self.latencies)
+        if not latencies:
+            return 0, 0.0, 0.0, 0.0
+
+        count = len(latencies)
+        p95 = latencies[min(count - 1, int(0.95 * count))]
+        return count, sum(latencies) / count, p95, latencies[-1]
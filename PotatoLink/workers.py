@@ -0,0 +1,315 @@
+from __future__ import annotations
+from typing import Callable, TYPE_CHECKING
+import logging
+import multiprocessing as mp
+import queue
+import time
+
+import numpy as np
+import serial
+
+from .ingest import SerialLink
+from .shared_ring import SharedRing
+from .uplink import WRITE_TIMEOUT_S, write_all
+
+if TYPE_CHECKING:
+    from .alarms import AlarmEngine
+    from .link_stats import LinkStats
+    from .publish import TelemetryPublisher
+
+# Leading columns of every ring row, the decoded values come after these
+TIME_COL = 0
+KIND_COL = 1
+NBYTES_COL = 2
+VALUES_COL = 3
+
+# Row kinds below zero are bookkeeping, payload decoders use kinds >= 0
+KIND_DECODE_FAILURE = -1
+KIND_TEXT = -2
+
+# A decoder turns one frame into either (kind, values) for the ring, text for the
+# text queue, or None to drop it. It runs in the worker process, so it has to be a
+# plain module-level function.
+FrameDecoder = Callable[[bytes], "tuple[int, tuple[float, ...]] | str | None"]
+
+
+def ingest_worker(
+    port: str,
+    baudrate: int,
+    eol: bytes,
+    decoder: FrameDecoder,
+    ring_name: str,
+    capacity: int,
+    width: int,
+    text_queue: mp.Queue,
+    tx_queue: mp.Queue,
+    running,
+    lost,
+):
+    """
+    Entry point of a worker process. Reads and frames the port, decodes every frame
+    and writes the results into the shared ring, and writes anything the GUI queued
+    on ``tx_queue`` out to the port. If reading the port fails (unplugged, ...) it
+    sets ``lost`` and stops.
+    """
+    ring = SharedRing(capacity, width, ring_name, create=False)
+    conn = serial.Serial(port, baudrate, timeout=0, write_timeout=WRITE_TIMEOUT_S)
+
+    def on_frame(frame: bytes):
+        now = time.monotonic()
+        try:
+            decoded = decoder(frame)
+        except Exception as e:
+            logging.error(f"Error on processing data {frame}: {e}")
+            ring.append((now, KIND_DECODE_FAILURE, len(frame)))
+            return
+
+        if decoded is None:
+            return
+
+        if isinstance(decoded, str):
+            ring.append((now, KIND_TEXT, len(frame)))
+            try:
+                text_queue.put_nowait(decoded)
+            except queue.Full:
+                pass
+            return
+
+        kind, values = decoded
+        ring.append((now, kind, len(frame), *values))
+
+    link = SerialLink(port, conn, on_frame, eol=eol)
+
+    try:
+        while running.is_set():
+            got_data = False
+
+            try:
+                waiting = conn.in_waiting
+                chunk = conn.read(waiting) if waiting else b""
+            except (serial.SerialException, OSError) as e:
+                # Same as IngestEngine, the port is gone so stop reading it
+                logging.error(f"Lost link {port}: {e}")
+                lost.set()
+                break
+            if chunk:
+                got_data = True
+                link.feed(chunk)
+
+            while True:
+                try:
+                    data = tx_queue.get_nowait()
+                except queue.Empty:
+                    break
+                got_data = True
+                try:
+                    write_all(conn, data)
+                except (serial.SerialException, OSError) as e:
+                    # Uplink is best effort from here, reading is what matters
+                    logging.error(f"Write to {port} dropped: {e}")
+
+            if not got_data:
+                time.sleep(0.001)
+    finally:
+        conn.close()
+        ring.close()
+
+
+class WorkerLink:
+    """
+    A serial port owned by a worker process. Decoded rows land in a SharedRing the
+    GUI reads without copying; text frames come through a queue.
+
+    Also stands in for the ``serial.Serial`` on the writing side: ``write()`` hands
+    the bytes to the worker, since the port can only be open in one process.
+    """
+
+    RING_CAPACITY = 8192
+
+    TEXT_QUEUE_CAP = 1000
+
+    def __init__(
+        self,
+        port: str,
+        baudrate: int,
+        decoder: FrameDecoder,
+        on_rows: Callable[[np.ndarray], None],
+        on_text: Callable[[str], None],
+        stats: LinkStats | None = None,
+        num_values: int = 11,
+        eol: bytes = b";",
+    ) -> None:
+        """
+        Args:
+            port (str): Serial port for the worker to open
+            baudrate (int): Baud rate
+            decoder (FrameDecoder): Module-level decode function
+            on_rows (Callable[[np.ndarray], None]): Gets each new block of rows
+                (views into shared memory, don't hold on to them). If polling falls
+                a whole ring behind, the oldest rows can get overwritten while
+                they're being handled, which gets logged.
+            on_text (Callable[[str], None]): Gets each text frame
+            stats (LinkStats | None): Updated on the GUI side from the rows
+            num_values (int): Most values a decoder returns for one frame
+            eol (bytes): Frame separator
+        """
+        self.name = port
+        self.port = port
+        self.baudrate = baudrate
+        self.decoder = decoder
+        self.on_rows = on_rows
+        self.on_text = on_text
+        self.stats = stats
+        self.eol = eol
+        # Gets the decoded rows and text for remote viewers, see ProcessIngestEngine
+        self.publisher: TelemetryPublisher | None = None
+        # Gets every block of rows to check, see ProcessIngestEngine
+        self.alarms: AlarmEngine | None = None
+
+        self.ring = SharedRing(self.RING_CAPACITY, VALUES_COL + num_values)
+        self.read_count = 0
+
+        self.text_queue = mp.Queue(self.TEXT_QUEUE_CAP)
+        self.tx_queue = mp.Queue()
+        self.running = mp.Event()
+        # Set by the worker when it can't read the port anymore
+        self.lost = mp.Event()
+        self.disconnected = False
+        self.process: mp.Process | None = None
+
+    def start(self):
+        self.running.set()
+        self.process = mp.Process(
+            target=ingest_worker,
+            args=(
+                self.port,
+                self.baudrate,
+                self.eol,
+                self.decoder,
+                self.ring.name,
+                self.ring.capacity,
+                self.ring.width,
+                self.text_queue,
+                self.tx_queue,
+                self.running,
+                self.lost,
+            ),
+            daemon=True,
+        )
+        self.process.start()
+
+    def stop(self):
+        self.running.clear()
+        if self.process is not None:
+            self.process.join(timeout=2)
+            self.process = None
+
+    def write(self, data: bytes):
+        self.tx_queue.put(data)
+
+    def close(self):
+        self.stop()
+        self.ring.close()
+
+    def poll(self):
+        """Hand everything new to the callbacks, from whatever thread calls this"""
+        blocks, self.read_count = self.ring.read_since(self.read_count)
+        start = self.read_count - sum(len(rows) for rows in blocks)
+        for rows in blocks:
+            if self.stats is not None:
+                for now, kind, num_bytes in rows[:, :VALUES_COL]:
+                    self.stats.record_frame(int(num_bytes), now)
+                    if kind == KIND_DECODE_FAILURE:
+                        self.stats.record_decode_failure(now)
+            if self.publisher is not None:
+                # Bookkeeping rows included, so viewers can keep link stats too
+                self.publisher.rows(self.name, rows)
+            if self.alarms is not None:
+                # Every row the worker decoded, not just the newest per frame
+                self.alarms.check(self.name, rows)
+
+            # Only copies if there's bookkeeping rows mixed in
+            bookkeeping = rows[:, KIND_COL] < 0
+            if bookkeeping.any():
+                rows = rows[~bookkeeping]
+            if len(rows):
+                self.on_rows(rows)
+
+        if self.lost.is_set() and not self.disconnected:
+            self.disconnected = True
+            logging.error(f"Lost link {self.name}, its worker stopped reading")
+            if self.stats is not None:
+                self.stats.record_lost("worker stopped reading")
+
+        lapped = self.ring.lapped(start)
+        if lapped:
+            logging.warning(
+                f"{self.name} fell a whole ring behind, {lapped} rows may have been "
+                "overwritten while they were handled"
+            )
+
+        while True:
+            try:
+                text = self.text_queue.get_nowait()
+            except queue.Empty:
+                break
+            if self.publisher is not None:
+                self.publisher.text(self.name, text)
+            self.on_text(text)
+
+
+class ProcessIngestEngine:
+    """
+    Same job as IngestEngine, but every link is read and decoded in its own
+    process so the GIL is never shared between the serial side and the render
+    loop. Results are collected by calling ``poll()`` once a frame.
+    """
+
+    out_of_process = True
+
+    def __init__(self) -> None:
+        self.links: list[WorkerLink] = []
+        self.publisher: TelemetryPublisher | None = None
+        self.alarms: AlarmEngine | None = None
+        self.running = False
+
+    def add_link(self, link: WorkerLink):
+        link.publisher = self.publisher
+        link.alarms = self.alarms
+        self.links.append(link)
+        if self.running:
+            link.start()
+
+    def remove_link(self, link: WorkerLink):
+        if link in self.links:
+            self.links.remove(link)
+            link.stop()
+
+    def publish_to(self, publisher: TelemetryPublisher | None):
+        """
+        Rebroadcast every link's rows and text, on links added later too. Raw frames
+        never leave the workers, so only decoded data gets published.
+        """
+        self.publisher = publisher
+        for link in self.links:
+            link.publisher = publisher
+
+    def check_alarms(self, alarms: AlarmEngine | None):
+        """Check every link's rows against ``alarms``, on links added later too"""
+        self.alarms = alarms
+        for link in self.links:
+            link.alarms = alarms
+
+    def start(self):
+        self.running = True
+        for link in self.links:
+            link.start()
+
+    def stop(self):
+        self.running = False
+        for link in self.links:
+            link.stop()
+
+    def poll(self):
+        for link in self.links:
+            link.poll()
@@ -0,0 +1,4 @@
+from .flight import FlightModel, FlightProfile, FlightSample, Phase
+from .protocols import KrakenEncoder, SpaceducksEncoder, ENCODERS
+from .outputs import PtyOutput, PortOutput, Impairments, open_output
+from .simulator import PayloadSimulator
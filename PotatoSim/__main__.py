@@ -0,0 +1,113 @@
+"""
+Payload simulator, for running the ground station without any XBees:
+
+    python -m PotatoSim --spaceducks pty --kraken pty --noise 1
+
+Each payload gets its own pseudo terminal (or port/pyserial URL), the paths get
+printed so they can be passed to main.py or session_main.py.
+"""
+
+import argparse
+import time
+
+from .flight import FlightModel
+from .outputs import Impairments, open_output
+from .protocols import ENCODERS
+from .simulator import PayloadSimulator
+
+parser = argparse.ArgumentParser(
+    prog="python -m PotatoSim", description="Simulated payloads for load testing"
+)
+
+for payload in ENCODERS:
+    parser.add_argument(
+        f"--{payload}",
+        metavar="PORT",
+        help=f"Simulate {payload} on PORT: 'pty', a serial port, or a pyserial URL",
+    )
+
+parser.add_argument(
+    "--rate", type=float, default=20.0, help="Readings per second (default 20)"
+)
+parser.add_argument(
+    "--saturate",
+    action="store_true",
+    help="Ignore --rate and send as fast as the baudrate allows",
+)
+parser.add_argument(
+    "--baudrate",
+    type=int,
+    default=9600,
+    help="Link speed the output is paced to, 0 for unlimited (default 9600)",
+)
+parser.add_argument(
+    "--speed", type=float, default=1.0, help="Flight seconds per real second"
+)
+parser.add_argument(
+    "--noise", type=float, default=0.0, help="Sensor noise, 1 is realistic"
+)
+parser.add_argument(
+    "--drop", type=float, default=0.0, help="Chance of dropping each frame"
+)
+parser.add_argument(
+    "--corrupt", type=float, default=0.0, help="Chance of garbling each byte"
+)
+parser.add_argument("--seed", type=int, default=None)
+parser.add_argument(
+    "--repeat", action="store_true", help="Fly again after landing, forever"
+)
+
+
+def main(args):
+    simulators = []
+    for payload, encoder_type in ENCODERS.items():
+        spec = getattr(args, payload)
+        if spec is None:
+            continue
+
+        output = open_output(spec, args.baudrate)
+        simulators.append(
+            PayloadSimulator(
+                encoder_type(),
+                output,
+                rate_hz=args.rate,
+                baudrate=args.baudrate,
+                saturate=args.saturate,
+                speed=args.speed,
+                model=FlightModel(noise=args.noise, seed=args.seed),
+                impairments=Impairments(args.drop, args.corrupt, args.seed),
+                repeat=args.repeat,
+            )
+        )
+        print(f"{encoder_type.name} on {output.name}")
+
+    if not simulators:
+        parser.error("give at least one payload, like --spaceducks pty")
+
+    for simulator in simulators:
+        simulator.start()
+
+    try:
+        while True:
+            time.sleep(2.0)
+            for simulator in simulators:
+                stats = simulator.stats
+                model = simulator.model
+                print(
+                    f"{simulator.encoder.name}: t={model.time:6.1f}s "
+                    f"{model.phase.value:>7} alt={model.altitude:7.1f}m | "
+                    f"{stats.frames} frames, {stats.bytes} bytes, "
+                    f"{stats.dropped} dropped, {stats.corrupted_bytes} corrupted, "
+                    f"{stats.replies} acks"
+                )
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:
+        for simulator in simulators:
+            simulator.stop()
+
+
+if __name__ == "__main__":
+    main(parser.parse_args())
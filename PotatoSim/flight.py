@@ -0,0 +1,228 @@
+from __future__ import annotations
+import enum
+import math
+
+import msgspec
+import numpy as np
+
+GRAVITY = 9.81
+
+
+class Phase(enum.Enum):
+    PAD = "pad"
+    BOOST = "boost"
+    COAST = "coast"
+    DROGUE = "drogue"
+    MAIN = "main"
+    LANDED = "landed"
+
+
+class FlightProfile(msgspec.Struct, frozen=True):
+    """Knobs for the simulated flight, the defaults go to about 1 km"""
+
+    pad_time_s: float = 10.0
+    burn_time_s: float = 2.4
+    # While the motor burns, on top of fighting gravity
+    thrust_accel: float = 110.0
+    # Drag acceleration is this times velocity squared
+    drag_coefficient: float = 0.0012
+    drogue_rate: float = 25.0
+    main_rate: float = 6.0
+    main_altitude: float = 150.0
+
+    ground_temperature: float = 22.0
+    # Degrees C lost per km of altitude
+    lapse_rate: float = 6.5
+
+    # Motor buzz on the side axes while burning, shows up in the vibration window
+    boost_vibration_hz: float = 38.0
+    boost_vibration: float = 4.0
+    # Roll rate from the fins, degrees per second
+    spin_rate: float = 90.0
+
+
+class FlightSample(msgspec.Struct):
+    """What the payload sensors would read right now"""
+
+    time: float
+    phase: Phase
+    altitude: float
+    velocity: float
+    temperature: float
+    # (heading, roll, pitch) in degrees, like SensorState
+    orientation: tuple[float, float, float]
+    # Body axes, x along the nose, with and without gravity
+    acceleration: tuple[float, float, float]
+    linear_accel: tuple[float, float, float]
+    # Kraken's motor isn't part of the flight, it just sweeps like fake_data.py did
+    motor_power: float
+
+
+class FlightModel:
+    """
+    Vertical flight of a single stage rocket: sits on the pad, burns, coasts to
+    apogee, comes down on a drogue, then the main, and lands. The physics are
+    integrated in small fixed steps so any sample rate sees the same flight.
+
+    Sensor readings get gaussian noise scaled by ``noise`` (0 for clean data).
+    """
+
+    STEP_S = 0.002
+    MAX_CHUTE_ACCEL = 4 * GRAVITY
+
+    # Sensor noise at noise=1
+    ALTITUDE_NOISE = 0.5
+    ACCEL_NOISE = 0.15
+    TEMPERATURE_NOISE = 0.05
+    ORIENTATION_NOISE = 0.3
+
+    def __init__(
+        self,
+        profile: FlightProfile | None = None,
+        noise: float = 0.0,
+        seed: int | None = None,
+    ) -> None:
+        self.profile = profile if profile is not None else FlightProfile()
+        self.noise = noise
+        self.rng = np.random.default_rng(seed)
+        self.reset()
+
+    def reset(self):
+        self.time = 0.0
+        self.phase = Phase.PAD
+        self.phase_started = 0.0
+        self.altitude = 0.0
+        self.velocity = 0.0
+        self.accel = 0.0
+        self.velocity_at_burnout = 1.0
+
+        self.max_altitude = 0.0
+        self.max_accel = GRAVITY
+        self.max_temperature = self.profile.ground_temperature
+
+    def _set_phase(self, phase: Phase, events: list[str]):
+        self.phase = phase
+        self.phase_started = self.time
+        events.append(phase.value)
+
+    def step(self, dt: float) -> list[str]:
+        """
+        Advance the flight by ``dt`` seconds.
+
+        Returns:
+            list[str]: Phases entered along the way, in order
+        """
+        events = []
+        profile = self.profile
+        steps = math.ceil(dt / self.STEP_S) if dt > 0 else 0
+        for _ in range(steps):
+            h = dt / steps
+            self.time += h
+            elapsed = self.time - self.phase_started
+
+            if self.phase is Phase.PAD:
+                if elapsed >= profile.pad_time_s:
+                    self._set_phase(Phase.BOOST, events)
+                continue
+
+            if self.phase is Phase.LANDED:
+                continue
+
+            drag = profile.drag_coefficient * self.velocity * abs(self.velocity)
+            if self.phase is Phase.BOOST:
+                accel = profile.thrust_accel - GRAVITY - drag
+                if elapsed >= profile.burn_time_s:
+                    self.velocity_at_burnout = self.velocity
+                    self._set_phase(Phase.COAST, events)
+            elif self.phase is Phase.COAST:
+                accel = -GRAVITY - drag
+                if self.velocity <= 0:
+                    self._set_phase(Phase.DROGUE, events)
+            else:
+                # Chute drag balances gravity at its descent rate, and the
+                # opening shock is capped since the chute takes a moment to fill
+                rate = (
+                    profile.drogue_rate
+                    if self.phase is Phase.DROGUE
+                    else profile.main_rate
+                )
+                chute = GRAVITY * (self.velocity / rate) ** 2
+                accel = -GRAVITY + min(chute, self.MAX_CHUTE_ACCEL)
+                if (
+                    self.phase is Phase.DROGUE
+                    and self.altitude <= profile.main_altitude
+                ):
+                    self._set_phase(Phase.MAIN, events)
+
+            self.accel = accel
+            self.velocity += accel * h
+            self.altitude += self.velocity * h
+
+            if self.altitude <= 0 and self.phase is not Phase.BOOST:
+                self.altitude = self.velocity = self.accel = 0.0
+                self._set_phase(Phase.LANDED, events)
+
+            self.max_altitude = max(self.max_altitude, self.altitude)
+            self.max_accel = max(self.max_accel, abs(self.accel + GRAVITY))
+
+        return events
+
+    def _noisy(self, value: float, scale: float) -> float:
+        if not self.noise:
+            return value
+        return value + float(self.rng.normal(0.0, scale * self.noise))
+
+    def sample(self) -> FlightSample:
+        profile = self.profile
+        elapsed = self.time - self.phase_started
+
+        side_x = side_y = 0.0
+        if self.phase is Phase.BOOST:
+            phase = 2 * math.pi * profile.boost_vibration_hz * self.time
+            side_x = profile.boost_vibration * math.sin(phase)
+            side_y = profile.boost_vibration * math.cos(phase * 1.3)
+
+        # Nose up until burnout, arcs over to level at apogee, then hangs under the
+        # chute swinging a bit
+        if self.phase in (Phase.PAD, Phase.BOOST):
+            pitch = 88.0
+        elif self.phase is Phase.COAST:
+            pitch = 88.0 * max(self.velocity, 0.0) / self.velocity_at_burnout
+        elif self.phase is Phase.LANDED:
+            pitch = 0.0
+        else:
+            pitch = -70.0 + 15.0 * math.sin(elapsed * 1.7)
+
+        spinning = self.phase in (Phase.BOOST, Phase.COAST)
+        roll = (self.time * profile.spin_rate) % 360.0 - 180.0 if spinning else 0.0
+        heading = (40.0 + 5.0 * math.sin(self.time * 0.3)) % 360.0
+
+        # An accelerometer feels everything but gravity, so free fall reads 0
+        linear = (self.accel, side_x, side_y)
+        measured = (self.accel + GRAVITY, side_x, side_y)
+
+        temperature = (
+            profile.ground_temperature - profile.lapse_rate * self.altitude / 1000
+        )
+        self.max_temperature = max(self.max_temperature, temperature)
+
+        noisy = self._noisy
+        return FlightSample(
+            time=self.time,
+            phase=self.phase,
+            altitude=noisy(self.altitude, self.ALTITUDE_NOISE),
+            velocity=self.velocity,
+            temperature=noisy(temperature, self.TEMPERATURE_NOISE),
+            orientation=tuple(
+                noisy(angle, self.ORIENTATION_NOISE) for angle in (heading, roll, pitch)
+            ),
+            acceleration=tuple(noisy(value, self.ACCEL_NOISE) for value in measured),
+            linear_accel=tuple(noisy(value, self.ACCEL_NOISE) for value in linear),
+            motor_power=(math.sin(self.time / 2) + 1) * 50,
+        )
+
+    @property
+    def survivability(self) -> float:
+        """Made-up STEMnaut survivability, 1 until 10 g and 0 past 30 g"""
+        g = self.max_accel / GRAVITY
+        return min(max(1.0 - (g - 10.0) / 20.0, 0.0), 1.0)
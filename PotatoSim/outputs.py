@@ -0,0 +1,105 @@
+from __future__ import annotations
+import os
+import select
+
+import numpy as np
+import serial
+
+
+class PtyOutput:
+    """
+    One end of a new pseudo terminal (Linux/macOS). Point the ground station at
+    ``name`` as if it were the XBee's port.
+    """
+
+    def __init__(self) -> None:
+        import pty
+        import tty
+
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.master)
+        tty.setraw(self.slave)
+        # The slave end stays open here too, so the port doesn't hang up whenever
+        # the ground station closes it
+        self.name = os.ttyname(self.slave)
+
+    def write(self, data: bytes):
+        view = memoryview(data)
+        while view:
+            view = view[os.write(self.master, view) :]
+
+    def read_available(self) -> bytes:
+        if not select.select([self.master], [], [], 0)[0]:
+            return b""
+        return os.read(self.master, 4096)
+
+    def close(self):
+        os.close(self.master)
+        os.close(self.slave)
+
+
+class PortOutput:
+    """
+    A real serial port, or any pyserial URL, like ``loop://`` or
+    ``socket://host:port`` for loopback testing
+    """
+
+    def __init__(self, url: str, baudrate: int = 9600) -> None:
+        self.conn = serial.serial_for_url(url, baudrate=baudrate, timeout=0)
+        self.name = url
+
+    def write(self, data: bytes):
+        self.conn.write(data)
+
+    def read_available(self) -> bytes:
+        waiting = self.conn.in_waiting
+        return self.conn.read(waiting) if waiting else b""
+
+    def close(self):
+        self.conn.close()
+
+
+def open_output(spec: str, baudrate: int = 9600) -> PtyOutput | PortOutput:
+    """``pty`` for a new pseudo terminal, anything else is a port or pyserial URL"""
+    if spec == "pty":
+        return PtyOutput()
+    return PortOutput(spec, baudrate)
+
+
+class Impairments:
+    """Ways the radio link can mess frames up"""
+
+    def __init__(
+        self, drop_rate: float = 0.0, corrupt_rate: float = 0.0, seed: int | None = None
+    ) -> None:
+        """
+        Args:
+            drop_rate (float): Chance of a whole frame never arriving
+            corrupt_rate (float): Chance of each byte getting garbled
+        """
+        self.drop_rate = drop_rate
+        self.corrupt_rate = corrupt_rate
+        self.rng = np.random.default_rng(seed)
+
+    @property
+    def active(self) -> bool:
+        return self.drop_rate > 0 or self.corrupt_rate > 0
+
+    def apply(self, frame: bytes) -> tuple[bytes | None, int]:
+        """
+        Returns:
+            tuple[bytes | None, int]: The frame as received (None if dropped), and
+                how many bytes were corrupted
+        """
+        if self.drop_rate and self.rng.random() < self.drop_rate:
+            return None, 0
+        if not self.corrupt_rate:
+            return frame, 0
+
+        data = np.frombuffer(frame, dtype=np.uint8).copy()
+        hits = self.rng.random(len(data)) < self.corrupt_rate
+        count = int(hits.sum())
+        if count:
+            # XOR with something non-zero so the byte always actually changes
+            data[hits] ^= self.rng.integers(1, 256, count, dtype=np.uint8)
+        return data.tobytes(), count
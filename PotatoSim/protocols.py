@@ -0,0 +1,133 @@
+"""
+Encoders for what each payload actually sends. Both protocols end every frame with a
+semicolon, and both answer commands from the ground station with ``ACK <command>``
+so the uplink retry logic has something to talk to.
+"""
+
+from __future__ import annotations
+
+import msgspec
+
+from Spaceducks.shared.state import MESSAGE_TYPES, SensorState, FlightStats, Message
+from .flight import FlightModel, FlightSample
+
+EOL = b";"
+
+# What gets said when the flight enters each phase
+PHASE_MESSAGES = {
+    "boost": "Launch detected",
+    "coast": "Burnout",
+    "drogue": "Apogee, drogue out",
+    "main": "Main deployed",
+    "landed": "Landed",
+}
+
+
+class FrameSplitter:
+    """Collects incoming bytes and hands back complete frames"""
+
+    def __init__(self) -> None:
+        self.buffer = bytearray()
+
+    def feed(self, data: bytes) -> list[bytes]:
+        self.buffer += data
+        *frames, rest = self.buffer.split(EOL)
+        self.buffer = bytearray(rest)
+        return [bytes(frame) for frame in frames if frame]
+
+
+class KrakenEncoder:
+    """Kraken's text protocol, one ``KEY value;`` frame per reading"""
+
+    name = "Kraken"
+
+    def __init__(self) -> None:
+        self.splitter = FrameSplitter()
+
+    def frames(
+        self, sample: FlightSample, events: list[str], model: FlightModel
+    ) -> list[bytes]:
+        frames = [
+            f"ALT {sample.altitude:.3f};".encode("ascii"),
+            f"MTR {sample.motor_power:.3f};".encode("ascii"),
+            f"TEMP {sample.temperature:.3f};".encode("ascii"),
+            f"VELO {sample.velocity:.3f};".encode("ascii"),
+        ]
+        for event in events:
+            frames.append(f"MSG {PHASE_MESSAGES[event]};".encode("ascii"))
+        return frames
+
+    def replies(self, data: bytes) -> list[bytes]:
+        replies = []
+        for frame in self.splitter.feed(data):
+            command = frame.decode("ascii", errors="ignore")
+            if command.startswith("ACK"):
+                # Our own acks coming back around on a loopback
+                continue
+            replies.append(f"ACK {command};".encode("ascii"))
+        return replies
+
+
+class SpaceducksEncoder:
+    """
+    Spaceducks' msgpack frames: a SensorState per reading, FlightStats every so
+    often, and a Message for each flight event.
+    """
+
+    name = "Spaceducks"
+
+    STATS_INTERVAL_S = 1.0
+
+    def __init__(self) -> None:
+        self.splitter = FrameSplitter()
+        self.encoder = msgspec.msgpack.Encoder()
+        self.decoder = msgspec.msgpack.Decoder(MESSAGE_TYPES)
+        self.last_stats = None
+
+    def _encode(self, message: MESSAGE_TYPES) -> bytes:
+        return self.encoder.encode(message) + EOL
+
+    def frames(
+        self, sample: FlightSample, events: list[str], model: FlightModel
+    ) -> list[bytes]:
+        frames = [
+            self._encode(
+                SensorState(
+                    altitude=sample.altitude,
+                    temperature=sample.temperature,
+                    orientation=sample.orientation,
+                    acceleration=sample.acceleration,
+                    linear_accel=sample.linear_accel,
+                )
+            )
+        ]
+        for event in events:
+            frames.append(self._encode(Message(PHASE_MESSAGES[event])))
+
+        if self.last_stats is None or (
+            sample.time - self.last_stats >= self.STATS_INTERVAL_S
+        ):
+            self.last_stats = sample.time
+            stats = FlightStats(
+                current_alt=sample.altitude,
+                max_acceleration=model.max_accel,
+                max_temperature=model.max_temperature,
+                max_altitude=model.max_altitude,
+                survivability_rating=model.survivability,
+            )
+            frames.append(self._encode(stats))
+        return frames
+
+    def replies(self, data: bytes) -> list[bytes]:
+        replies = []
+        for frame in self.splitter.feed(data):
+            try:
+                command = self.decoder.decode(frame)
+            except (msgspec.DecodeError, UnicodeDecodeError):
+                continue
+            if type(command) is Message and not command.message.startswith("ACK"):
+                replies.append(self._encode(Message(f"ACK {command.message}")))
+        return replies
+
+
+ENCODERS = {"kraken": KrakenEncoder, "spaceducks": SpaceducksEncoder}
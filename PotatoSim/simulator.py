@@ -0,0 +1,136 @@
+from __future__ import annotations
+import logging
+import threading
+import time
+
+from .flight import FlightModel, Phase
+from .outputs import Impairments, PtyOutput, PortOutput
+from .protocols import KrakenEncoder, SpaceducksEncoder
+
+
+class SimStats:
+    def __init__(self) -> None:
+        self.frames = 0
+        self.bytes = 0
+        self.dropped = 0
+        self.corrupted_bytes = 0
+        self.replies = 0
+
+
+class PayloadSimulator:
+    """
+    Plays one payload: steps a FlightModel, encodes what it would send and writes it
+    to an output, running on its own thread.
+
+    Sends ``rate_hz`` readings a second, but never more bytes than ``baudrate``
+    could carry (8N1, so 10 bits a byte). With ``saturate`` the rate is ignored
+    and it sends as fast as the link allows, a baudrate of 0 means no limit at all.
+    """
+
+    # How long to sit on the ground before flying again with ``repeat``
+    LANDED_TIME_S = 10.0
+
+    def __init__(
+        self,
+        encoder: KrakenEncoder | SpaceducksEncoder,
+        output: PtyOutput | PortOutput,
+        rate_hz: float = 20.0,
+        baudrate: int = 9600,
+        saturate: bool = False,
+        speed: float = 1.0,
+        model: FlightModel | None = None,
+        impairments: Impairments | None = None,
+        repeat: bool = False,
+    ) -> None:
+        """
+        Args:
+            speed (float): Flight seconds per real second
+            repeat (bool): Start another flight once this one has been on the
+                ground for a bit
+        """
+        self.encoder = encoder
+        self.output = output
+        self.rate_hz = rate_hz
+        self.bytes_per_s = baudrate / 10 if baudrate else 0.0
+        self.saturate = saturate
+        self.speed = speed
+        self.model = model if model is not None else FlightModel()
+        self.impairments = impairments if impairments is not None else Impairments()
+        self.repeat = repeat
+
+        self.stats = SimStats()
+        self.running = False
+        self.sim_thread = threading.Thread(target=self.sim_loop, daemon=True)
+
+    def start(self):
+        self.running = True
+        self.sim_thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.sim_thread.is_alive():
+            self.sim_thread.join()
+        self.output.close()
+
+    def send(self, frames: list[bytes]):
+        data = bytearray()
+        for frame in frames:
+            frame, corrupted = self.impairments.apply(frame)
+            if frame is None:
+                self.stats.dropped += 1
+                continue
+            self.stats.frames += 1
+            self.stats.corrupted_bytes += corrupted
+            data += frame
+
+        if data:
+            self.output.write(bytes(data))
+            self.stats.bytes += len(data)
+        return len(data)
+
+    def tick(self, dt: float) -> int:
+        """One reading (and any replies), returns how many bytes went out"""
+        events = self.model.step(dt * self.speed)
+        sample = self.model.sample()
+        frames = self.encoder.frames(sample, events, self.model)
+
+        replies = self.encoder.replies(self.output.read_available())
+        self.stats.replies += len(replies)
+
+        if (
+            self.repeat
+            and self.model.phase is Phase.LANDED
+            and self.model.time - self.model.phase_started > self.LANDED_TIME_S
+        ):
+            self.model.reset()
+
+        return self.send(frames + replies)
+
+    def sim_loop(self):
+        last = time.perf_counter()
+        # When the link will be free again, and when the next reading is due
+        link_free = next_reading = last
+        interval = 1.0 / self.rate_hz
+
+        while self.running:
+            now = time.perf_counter()
+            try:
+                sent = self.tick(now - last)
+            except OSError as e:
+                # Mostly the ground station closing its end of the pty
+                logging.error(f"{self.encoder.name} output error: {e}")
+                time.sleep(0.5)
+                last = time.perf_counter()
+                continue
+            last = now
+
+            if self.bytes_per_s:
+                link_free = max(link_free, now) + sent / self.bytes_per_s
+            wait_until = link_free
+            if not self.saturate:
+                next_reading = max(next_reading + interval, now)
+                wait_until = max(wait_until, next_reading)
+
+            delay = wait_until - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
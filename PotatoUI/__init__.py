@@ -1,2 +1,13 @@
 from .interface import MainInterface
 from .ui_utils.widgets import *
+from .ui_utils.link_windows import UplinkWindow, LinkQualityWindow
+from .ui_utils.alarm_window import AlarmWindow, AlarmBanner
+from .ui_utils.gpu_plot import GpuPlot, GpuSeries
+from .ui_utils.history_plot import DecimatedSeries, PlotTimeRange
+from .ui_utils.cursor import CursorReadout
+from .ui_utils.waterfall import StreamingFFT, Waterfall
+from .ui_utils.attitude import AttitudeIndicator
+from .ui_utils.readout import Readout, ReadoutPanel, Unit
+from .ui_utils.readout import DISTANCE_UNITS, SPEED_UNITS, TEMPERATURE_UNITS
+from .session import SessionManager
+from .ui_utils.snapshot import SessionSnapshot, StateSection, RingSection
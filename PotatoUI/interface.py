@@ -2,11 +2,13 @@ from importlib import resources as impresource
 import platform
 
 from .ui_utils.imgui_wrapper import GLFWImguiWrapper
-from .ui_utils.gui_style import style_gui_from_file
+from .ui_utils.gui_style import apply_style
+from .ui_utils.startup_cache import FontSpec, StartupCache
 from .ui_utils import widgets
 
 from imgui_bundle import imgui
 from imgui_bundle import imgui_ctx
+from imgui_bundle import implot
 
 import glfw
 from PIL import Image
@@ -24,9 +26,19 @@ class MainInterface(GLFWImguiWrapper):
         scaling_factor=1,
         **kwargs,
     ):
-        super().__init__(
-            name, width, height, font_path, font_size, scaling_factor, **kwargs
-        )
+        # Fonts get loaded further down, all at once
+        super().__init__(name, width, height, None, font_size, scaling_factor, **kwargs)
+
+        if self.host is not None:
+            # Everything past here is per-window, so just borrow it from the host
+            self.plot_context = self.host.plot_context
+            self.icon_font = self.host.icon_font
+            self.bigger_icon_font = self.host.bigger_icon_font
+            self.rocket_logo = self.host.rocket_logo
+            self.python_version = self.host.python_version
+            return
+
+        self.plot_context = implot.create_context()
 
         # Enable moving around with the keyboard
         self.io.config_flags |= imgui.ConfigFlags_.nav_enable_keyboard
@@ -36,32 +48,33 @@ class MainInterface(GLFWImguiWrapper):
 
         icon = Image.open(resources.joinpath("assets", "icon.png"))
 
-        glfw.set_window_icon(self.glfw_window, 1, icon)
+        # No window to put it on when drawing offscreen
+        if self.glfw_window is not None:
+            glfw.set_window_icon(self.glfw_window, 1, icon)
+
+        # Baked fonts and the parsed style get reused between launches
+        self.startup_cache = StartupCache()
 
         style_file = str(resources.joinpath("styles", "dark_style.toml"))
 
-        style_gui_from_file(style_file)
+        apply_style(self.startup_cache.style(style_file))
 
         if font_path is None:
             font_path = str(resources.joinpath("fonts", "main.ttf"))
 
-        self.setup_main_font(font_path, font_size, scaling_factor)
-
         icon_font_path = str(resources.joinpath("fonts", "icons.ttf"))
         icons_start = ord("\ue900")
         icons_end = ord("\uEAEE")
         icon_glyph_range = [icons_start, icons_end]
 
-        self.icon_font = self.add_extra_font(
-            icon_font_path,
-            font_size * 1.3,
-            glyph_ranges_as_int_list=icon_glyph_range,
-        )
-
-        self.bigger_icon_font = self.add_extra_font(
-            icon_font_path,
-            font_size * 6.5,
-            glyph_ranges_as_int_list=icon_glyph_range,
+        _, self.icon_font, self.bigger_icon_font = self.setup_fonts(
+            [
+                FontSpec(str(font_path), font_size),
+                FontSpec(icon_font_path, font_size * 1.3, icon_glyph_range),
+                FontSpec(icon_font_path, font_size * 6.5, icon_glyph_range),
+            ],
+            scaling_factor,
+            self.startup_cache,
         )
 
         self.io.config_docking_no_split = True
@@ -79,7 +92,38 @@ class MainInterface(GLFWImguiWrapper):
         # Override this method and add setup code here!
         pass
 
+    @property
+    def workspace_pos(self) -> imgui.ImVec2:
+        """Top left corner of the area this interface gets to draw in"""
+        if self.host is not None:
+            return self.host.workspace_rects[self.workspace_id][0]
+        return imgui.ImVec2(0, 0)
+
+    @property
+    def workspace_size(self) -> imgui.ImVec2:
+        """Size of the area this interface gets to draw in"""
+        if self.host is not None:
+            return self.host.workspace_rects[self.workspace_id][1]
+        return self.io.display_size
+
+    def workspace_point(self, x: float, y: float) -> tuple[float, float]:
+        """Turn a fraction of the workspace (0-1 on both axes) into screen space"""
+        pos = self.workspace_pos
+        size = self.workspace_size
+        return (pos.x + x * size.x, pos.y + y * size.y)
+
+    def tick(self):
+        """
+        Once a frame whether or not it gets drawn (a SessionManager doesn't draw
+        hidden workspaces), for clocks and such
+        """
+        pass
+
     def draw(self):
+        if self.host is not None:
+            # Logo and version text are drawn once by the host
+            return
+
         display_size = self.io.display_size
 
         rocket_width = self.rocket_logo.image.width * self.rocket_logo.scale[0]
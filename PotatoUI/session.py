@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from imgui_bundle import imgui
+from imgui_bundle import imgui_ctx
+
+from PotatoLink import IngestEngine, ProcessIngestEngine
+
+from .interface import MainInterface
+
+
+class SessionManager(MainInterface):
+    """
+    Runs several payload interfaces in one window, with one render loop and one
+    ingest thread, instead of a whole GLFW/imgui/implot stack per payload.
+
+    Each payload gets a workspace. Workspaces can be shown one at a time (picked
+    from the menu bar) or tiled side by side. Hidden workspaces keep receiving data
+    and their clocks keep running, they just aren't drawn.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        width: int,
+        height: int,
+        font_path=None,
+        font_size=14,
+        scaling_factor=1,
+        ingest_workers=False,
+        ingest: IngestEngine | ProcessIngestEngine | None = None,
+        **kwargs,
+    ):
+        """
+        Args:
+            ingest_workers (bool): Read and decode every link in its own process
+                instead of on a shared thread
+            ingest (IngestEngine | ProcessIngestEngine | None): Use this engine
+                instead of making one, e.g. the one from EarlyLinks
+        """
+        self.workspaces: list[MainInterface] = []
+        self.workspace_rects: dict[str, tuple[imgui.ImVec2, imgui.ImVec2]] = {}
+        self.active_workspace = 0
+        self.tiled = False
+
+        super().__init__(
+            name, width, height, font_path, font_size, scaling_factor, **kwargs
+        )
+
+        # Shared by every workspace, links can be added while it's running
+        if ingest is None:
+            ingest = ProcessIngestEngine() if ingest_workers else IngestEngine()
+        self.ingest = ingest
+        if not self.ingest.running:
+            self.ingest.start()
+
+    def add_workspace(
+        self, interface_class: type[MainInterface], name: str, *args, **kwargs
+    ):
+        """
+        Create a payload interface inside this window.
+
+        Args:
+            interface_class (type[MainInterface]): e.g. KrakenInterface
+            name (str): Workspace name, shown in the menu bar. Must be unique.
+            *args, **kwargs: Passed on to the interface after name/width/height
+                (serial ports and so on)
+
+        Returns:
+            MainInterface: The new interface
+        """
+        self.workspace_rects[name] = (imgui.ImVec2(0, 0), self.io.display_size)
+
+        display_size = self.io.display_size
+        interface = interface_class(
+            name,
+            display_size.x,
+            display_size.y,
+            *args,
+            host=self,
+            ingest=self.ingest,
+            **kwargs,
+        )
+        self.workspaces.append(interface)
+        return interface
+
+    def draw(self):
+        # Background logo and version text, drawn once for everyone
+        super().draw()
+
+        with imgui_ctx.begin_main_menu_bar() as menu_bar:
+            if menu_bar:
+                for index, workspace in enumerate(self.workspaces):
+                    selected = self.tiled or index == self.active_workspace
+                    if imgui.menu_item(workspace.name, "", selected)[0]:
+                        self.active_workspace = index
+                        self.tiled = False
+
+                imgui.separator()
+                self.tiled = imgui.menu_item("Tile", "", self.tiled)[1]
+
+        top = imgui.get_frame_height()
+        display_size = self.io.display_size
+        area_height = display_size.y - top
+
+        if self.tiled:
+            visible = self.workspaces
+        else:
+            visible = self.workspaces[self.active_workspace : self.active_workspace + 1]
+
+        # Hidden ones too, so heartbeat ages don't jump when switching back
+        for workspace in self.workspaces:
+            if workspace not in visible:
+                workspace.tick()
+
+        if not visible:
+            return
+
+        tile_width = display_size.x / len(visible)
+        for index, workspace in enumerate(visible):
+            self.workspace_rects[workspace.workspace_id] = (
+                imgui.ImVec2(index * tile_width, top),
+                imgui.ImVec2(tile_width, area_height),
+            )
+            workspace.draw()
+
+    def shutdown_gui(self):
+        self.ingest.stop()
+        for workspace in self.workspaces:
+            workspace.shutdown_gui()
+        super().shutdown_gui()
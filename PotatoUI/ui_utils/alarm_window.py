@@ -0,0 +1,133 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+import time
+
+from imgui_bundle import imgui
+from imgui_bundle import imgui_ctx
+
+from .widgets import GUIWindow
+
+if TYPE_CHECKING:
+    from PotatoLink.alarms import AlarmEngine
+
+
+ALARM_COLOR = (1.0, 0.1, 0.1, 1.0)
+CLEARED_COLOR = (0.0, 1.0, 0.0, 1.0)
+
+
+class AlarmBanner(GUIWindow):
+    """
+    Flashes every tripped alarm on ``links`` across the workspace, and stays out of
+    the way (draws nothing) when there's none.
+    """
+
+    FLASH_HZ = 2.0
+
+    def __init__(
+        self,
+        io: imgui._IO,
+        alarms: AlarmEngine,
+        links: list[str],
+        closable: bool = False,
+        flags=None,
+        scope="",
+    ) -> None:
+        if flags is None:
+            flags = 0
+
+        flags |= imgui.WindowFlags_.always_auto_resize
+        flags |= imgui.WindowFlags_.no_decoration
+        flags |= imgui.WindowFlags_.no_move
+        flags |= imgui.WindowFlags_.no_focus_on_appearing
+        flags |= imgui.WindowFlags_.no_docking
+
+        super().__init__("Alarms Banner", io, closable, flags, scope)
+        self.alarms = alarms
+        self.links = links
+        self.active = []
+
+    def draw_window(self):
+        self.active = self.alarms.active_on(self.links)
+        if not self.active:
+            return
+
+        # Flash the background, the text stays readable either way
+        lit = int(time.monotonic() * self.FLASH_HZ * 2) % 2 == 0
+        background = (0.6, 0.0, 0.0, 0.9) if lit else (0.2, 0.0, 0.0, 0.9)
+        with imgui_ctx.push_style_color(imgui.Col_.window_bg, background):
+            super().draw_window()
+
+    def draw_contents(self):
+        for event in self.active:
+            imgui.text(f"ALARM  {event.rule} ({event.value:g}) on {event.link}")
+
+
+class AlarmWindow(GUIWindow):
+    """Every alarm rule on ``links`` with its state, and what tripped lately"""
+
+    def __init__(
+        self,
+        io: imgui._IO,
+        alarms: AlarmEngine,
+        links: list[str],
+        closable: bool = False,
+        flags=None,
+        scope="",
+    ) -> None:
+        super().__init__("Alarms", io, closable, flags, scope)
+        self.alarms = alarms
+        self.links = links
+
+    def draw_contents(self):
+        active = {
+            (event.link, event.rule) for event in self.alarms.active_on(self.links)
+        }
+        imgui.text(f"Tripped: {len(active)}")
+
+        table_flags = imgui.TableFlags_.row_bg | imgui.TableFlags_.borders_inner_h
+        with imgui_ctx.begin_table("##AlarmRules", 3, table_flags) as table:
+            if table:
+                imgui.table_setup_column("Rule")
+                imgui.table_setup_column("Condition")
+                imgui.table_setup_column("State")
+                imgui.table_headers_row()
+
+                for rule in self.alarms.rules:
+                    tripped = [
+                        link for link in self.links if (link, rule.name) in active
+                    ]
+                    imgui.table_next_row()
+                    imgui.table_next_column()
+                    imgui.text(rule.name)
+                    imgui.table_next_column()
+                    condition = f"{rule.field} {rule.comparator} {rule.threshold:g}"
+                    if rule.duration:
+                        condition += f" for {rule.duration:g}s"
+                    imgui.text(condition)
+                    imgui.table_next_column()
+                    if tripped:
+                        imgui.text_colored(imgui.ImVec4(*ALARM_COLOR), "ALARM")
+                    else:
+                        imgui.text("ok")
+
+        imgui.separator()
+        imgui.text("Recent")
+        now = time.monotonic()
+        with imgui_ctx.begin_table("##AlarmEvents", 3, table_flags) as table:
+            if not table:
+                return
+            imgui.table_setup_column("Rule")
+            imgui.table_setup_column("Value")
+            imgui.table_setup_column("Age")
+            imgui.table_headers_row()
+
+            for event in reversed(self.alarms.events_on(self.links)):
+                imgui.table_next_row()
+                imgui.table_next_column()
+                color = ALARM_COLOR if event.active else CLEARED_COLOR
+                state = "tripped" if event.active else "cleared"
+                imgui.text_colored(imgui.ImVec4(*color), f"{event.rule} {state}")
+                imgui.table_next_column()
+                imgui.text(f"{event.value:g}")
+                imgui.table_next_column()
+                imgui.text(f"{now - event.time:.1f}s")
@@ -0,0 +1,211 @@
+from __future__ import annotations
+from typing import NamedTuple
+from OpenGL import GL as gl
+import numpy as np
+
+# Pages never get bigger than this, even if the driver allows it
+MAX_PAGE_SIZE = 4096
+
+
+def max_page_size() -> int:
+    """Largest usable atlas page, needs a current GL context"""
+    return min(MAX_PAGE_SIZE, int(gl.glGetIntegerv(gl.GL_MAX_TEXTURE_SIZE)))
+
+
+class AtlasRegion(NamedTuple):
+    """Where one image lives inside an atlas, in pixels and in UV coordinates"""
+
+    page: int
+    x: int
+    y: int
+    width: int
+    height: int
+    uv0: tuple[float, float]
+    uv1: tuple[float, float]
+
+    def map_uv(
+        self, uv0=(0.0, 0.0), uv1=(1.0, 1.0)
+    ) -> tuple[tuple[float, float], tuple[float, float]]:
+        """Convert UVs relative to the image (like crops) into atlas UVs"""
+        u_size = self.uv1[0] - self.uv0[0]
+        v_size = self.uv1[1] - self.uv0[1]
+        return (
+            (self.uv0[0] + uv0[0] * u_size, self.uv0[1] + uv0[1] * v_size),
+            (self.uv0[0] + uv1[0] * u_size, self.uv0[1] + uv1[1] * v_size),
+        )
+
+
+class TextureAtlas:
+    """
+    Packs images into one or more textures ("pages") using simple shelf packing,
+    so a whole GIF or a bunch of small icons can be drawn from a single texture and
+    just switch UVs. Pages are all the same size unless ``page_heights`` says
+    otherwise.
+
+    With ``padding``, each image gets a border of copies of its own edge pixels, so
+    linear filtering never blends neighbouring images into each other.
+
+    ``reserve`` only does the bookkeeping and can run on any thread. ``allocate``
+    and ``upload`` make GL calls and need to run on the render thread.
+    """
+
+    def __init__(
+        self,
+        page_width: int,
+        page_height: int,
+        padding: int = 0,
+        page_heights: list[int] | None = None,
+    ) -> None:
+        """
+        Args:
+            page_heights (list[int] | None): Heights of the first pages, for when
+                it's known up front that they won't be filled (like the last page
+                of a GIF). Pages past these are ``page_height``.
+        """
+        self.page_width = page_width
+        self.page_height = page_height
+        self.page_heights = list(page_heights or [])
+
+        # Edge pixels repeated around each image, see above
+        self.padding = padding
+
+        # Per page: list of shelves as [y, height, next free x]
+        self.shelves: list[list[list[int]]] = []
+        self.textures: list[int] = []
+
+    def reserve(self, width: int, height: int) -> AtlasRegion:
+        """
+        Find a spot for an image, adding a page if none of the existing ones fit.
+
+        Raises:
+            ValueError: If the image is bigger than a page
+        """
+        pad = self.padding
+        slot_w, slot_h = width + 2 * pad, height + 2 * pad
+        if slot_w > self.page_width or slot_h > self.page_height:
+            raise ValueError(
+                f"{width}x{height} image does not fit in a "
+                f"{self.page_width}x{self.page_height} atlas page"
+            )
+
+        for page, shelves in enumerate(self.shelves):
+            for shelf in shelves:
+                y, shelf_h, x = shelf
+                if slot_h <= shelf_h and x + slot_w <= self.page_width:
+                    shelf[2] += slot_w
+                    return self._region(page, x + pad, y + pad, width, height)
+
+            top = shelves[-1][0] + shelves[-1][1] if shelves else 0
+            if top + slot_h <= self.page_size(page)[1]:
+                shelves.append([top, slot_h, slot_w])
+                return self._region(page, pad, top + pad, width, height)
+
+        # A short page that's too short for this one gets skipped
+        while self.page_size(len(self.shelves))[1] < slot_h:
+            self.shelves.append([])
+        self.shelves.append([[0, slot_h, slot_w]])
+        return self._region(len(self.shelves) - 1, pad, pad, width, height)
+
+    def page_size(self, page: int) -> tuple[int, int]:
+        if page < len(self.page_heights):
+            return self.page_width, self.page_heights[page]
+        return self.page_width, self.page_height
+
+    def _region(self, page: int, x: int, y: int, width: int, height: int):
+        page_width, page_height = self.page_size(page)
+        return AtlasRegion(
+            page,
+            x,
+            y,
+            width,
+            height,
+            (x / page_width, y / page_height),
+            ((x + width) / page_width, (y + height) / page_height),
+        )
+
+    def allocate(self):
+        """Create textures for any pages added since the last call"""
+        while len(self.textures) < len(self.shelves):
+            texture_id = gl.glGenTextures(1)
+            gl.glBindTexture(gl.GL_TEXTURE_2D, texture_id)
+            gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_LINEAR)
+            gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER, gl.GL_LINEAR)
+            gl.glTexParameteri(
+                gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_S, gl.GL_CLAMP_TO_EDGE
+            )
+            gl.glTexParameteri(
+                gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_T, gl.GL_CLAMP_TO_EDGE
+            )
+            # Left uninitialized, upload() fills in every image and its padding
+            gl.glTexImage2D(
+                gl.GL_TEXTURE_2D,
+                0,
+                gl.GL_RGBA,
+                *self.page_size(len(self.textures)),
+                0,
+                gl.GL_RGBA,
+                gl.GL_UNSIGNED_BYTE,
+                None,
+            )
+            self.textures.append(texture_id)
+
+    def upload(self, region: AtlasRegion, pixels, row: int, rows: int):
+        """Copy ``rows`` rows of RGBA pixels into a region, starting at ``row``"""
+        x, y = region.x, region.y + row
+        pad = self.padding
+        if pad:
+            pixels = np.asarray(pixels, dtype=np.uint8).reshape(rows, region.width, 4)
+            # Repeat the edges into the padding, the top and bottom ones only with
+            # the first and last rows
+            top = pad if row == 0 else 0
+            bottom = pad if row + rows == region.height else 0
+            pixels = np.pad(pixels, ((top, bottom), (pad, pad), (0, 0)), mode="edge")
+            x, y, rows = x - pad, y - top, rows + top + bottom
+
+        gl.glBindTexture(gl.GL_TEXTURE_2D, self.textures[region.page])
+        gl.glTexSubImage2D(
+            gl.GL_TEXTURE_2D,
+            0,
+            x,
+            y,
+            region.width + 2 * pad,
+            rows,
+            gl.GL_RGBA,
+            gl.GL_UNSIGNED_BYTE,
+            pixels,
+        )
+
+    def delete(self):
+        if self.textures:
+            gl.glDeleteTextures(self.textures)
+            self.textures.clear()
+        self.shelves.clear()
+
+    @property
+    def resident_bytes(self) -> int:
+        return sum(
+            width * height * 4
+            for width, height in map(self.page_size, range(len(self.textures)))
+        )
+
+    @classmethod
+    def for_frames(
+        cls, width: int, height: int, count: int, padding: int = 1
+    ) -> TextureAtlas:
+        """
+        Atlas with pages sized to hold ``count`` frames of the same size in a grid,
+        as few pages as the max texture size allows, and the last page only as tall
+        as the rows it needs. A single frame gets a page the exact size of the
+        image, with nothing next to it there's no need for padding.
+        """
+        pad = padding if count > 1 else 0
+        slot_w, slot_h = width + 2 * pad, height + 2 * pad
+        max_size = max(max_page_size(), slot_w, slot_h)
+        cols = max(1, min(count, max_size // slot_w))
+        rows = max(1, min(-(-count // cols), max_size // slot_h))
+
+        per_page = cols * rows
+        pages = -(-count // per_page)
+        last_rows = -(-(count - (pages - 1) * per_page) // cols)
+        page_heights = [rows * slot_h] * (pages - 1) + [last_rows * slot_h]
+        return cls(cols * slot_w, rows * slot_h, pad, page_heights)
@@ -0,0 +1,213 @@
+from __future__ import annotations
+import math
+import time
+
+import numpy as np
+from imgui_bundle import imgui
+
+
+def look_from(azimuth: float, elevation: float) -> np.ndarray:
+    """
+    View matrix for a camera circling the model (x forward, y left, z up), angles in
+    degrees. Rows are screen right, screen up and towards the viewer.
+    """
+    azimuth, elevation = math.radians(azimuth), math.radians(elevation)
+    towards = np.array(
+        [
+            math.cos(elevation) * math.cos(azimuth),
+            math.cos(elevation) * math.sin(azimuth),
+            math.sin(elevation),
+        ]
+    )
+    right = np.cross((0.0, 0.0, 1.0), towards)
+    right /= np.linalg.norm(right)
+    up = np.cross(towards, right)
+    return np.array([right, up, towards], dtype=np.float32)
+
+
+# Front right, a bit above
+VIEW_MATRIX = look_from(-35, 20)
+
+
+def quat_from_euler(heading: float, roll: float, pitch: float, out: np.ndarray):
+    """
+    (w, x, y, z) quaternion from Euler angles in degrees, applied heading (about
+    z), then pitch (about y), then roll (about x).
+    """
+    cy, sy = math.cos(math.radians(heading) / 2), math.sin(math.radians(heading) / 2)
+    cp, sp = math.cos(math.radians(pitch) / 2), math.sin(math.radians(pitch) / 2)
+    cr, sr = math.cos(math.radians(roll) / 2), math.sin(math.radians(roll) / 2)
+
+    out[0] = cy * cp * cr + sy * sp * sr
+    out[1] = cy * cp * sr - sy * sp * cr
+    out[2] = cy * sp * cr + sy * cp * sr
+    out[3] = sy * cp * cr - cy * sp * sr
+    return out
+
+
+def quat_slerp(q0: np.ndarray, q1: np.ndarray, t: float, out: np.ndarray):
+    """Spherical interpolation from q0 (t=0) to q1 (t=1), the short way around"""
+    w0, x0, y0, z0 = q0
+    w1, x1, y1, z1 = q1
+    dot = w0 * w1 + x0 * x1 + y0 * y1 + z0 * z1
+    if dot < 0:
+        # q and -q are the same rotation, this picks the shorter arc
+        w1, x1, y1, z1, dot = -w1, -x1, -y1, -z1, -dot
+
+    if dot > 0.9995:
+        # Close enough that lerp is fine, and sin(theta) would be ~0 anyway
+        s0, s1 = 1 - t, t
+    else:
+        theta = math.acos(dot)
+        sin_theta = math.sin(theta)
+        s0 = math.sin((1 - t) * theta) / sin_theta
+        s1 = math.sin(t * theta) / sin_theta
+
+    w, x, y, z = (
+        s0 * w0 + s1 * w1,
+        s0 * x0 + s1 * x1,
+        s0 * y0 + s1 * y1,
+        s0 * z0 + s1 * z1,
+    )
+    norm = math.sqrt(w * w + x * x + y * y + z * z)
+    out[0], out[1], out[2], out[3] = w / norm, x / norm, y / norm, z / norm
+    return out
+
+
+def quat_to_matrix(q: np.ndarray, out: np.ndarray):
+    """3x3 rotation matrix for a unit quaternion"""
+    w, x, y, z = q
+    out[0, 0] = 1 - 2 * (y * y + z * z)
+    out[0, 1] = 2 * (x * y - w * z)
+    out[0, 2] = 2 * (x * z + w * y)
+    out[1, 0] = 2 * (x * y + w * z)
+    out[1, 1] = 1 - 2 * (x * x + z * z)
+    out[1, 2] = 2 * (y * z - w * x)
+    out[2, 0] = 2 * (x * z - w * y)
+    out[2, 1] = 2 * (y * z + w * x)
+    out[2, 2] = 1 - 2 * (x * x + y * y)
+    return out
+
+
+class AttitudeIndicator:
+    """
+    Wireframe of the payload turned to match its orientation. Samples only come in
+    at 5-10 Hz, so the shown attitude slerps from wherever it is towards each new
+    sample over one sample interval, which keeps it smooth at the frame rate.
+
+    The model, edges and every buffer are set up once, a frame only overwrites them
+    in place before handing the points to imgui.
+    """
+
+    # Payload body: a box, long side along x (the nose)
+    BOX_VERTICES = [
+        (x, y, z) for x in (-1.0, 1.0) for y in (-0.35, 0.35) for z in (-0.35, 0.35)
+    ]
+    BOX_EDGES = [
+        (0, 1), (0, 2), (1, 3), (2, 3),
+        (4, 5), (4, 6), (5, 7), (6, 7),
+        (0, 4), (1, 5), (2, 6), (3, 7),
+    ]  # fmt: skip
+
+    # Body axes, drawn from the center
+    AXES = [
+        ((1.5, 0.0, 0.0), (0.94, 0.33, 0.31, 1.0)),
+        ((0.0, 1.0, 0.0), (0.40, 0.73, 0.42, 1.0)),
+        ((0.0, 0.0, 1.0), (0.26, 0.65, 0.96, 1.0)),
+    ]
+
+    # How far the sample interval estimate moves towards each new interval
+    INTERVAL_SMOOTHING = 0.2
+    MIN_INTERVAL_S = 0.02
+    MAX_INTERVAL_S = 0.5
+
+    def __init__(self, size: float = 220) -> None:
+        self.size = size
+
+        # Box corners, then the origin, then each axis tip
+        vertices = self.BOX_VERTICES + [(0.0, 0.0, 0.0)]
+        vertices += [tip for tip, _ in self.AXES]
+        self.model = np.array(vertices, dtype=np.float32)
+        self.origin = len(self.BOX_VERTICES)
+
+        self.start = np.array([1.0, 0.0, 0.0, 0.0])
+        self.target = np.array([1.0, 0.0, 0.0, 0.0])
+        self.current = np.array([1.0, 0.0, 0.0, 0.0])
+
+        self.rotation = np.eye(3, dtype=np.float32)
+        self.transform = np.eye(3, dtype=np.float32)
+        self.projected = np.zeros_like(self.model)
+        self.screen = np.zeros((len(self.model), 2), dtype=np.float32)
+        # Screen x and y both scale with size, y is flipped since screen y goes down
+        self.screen_scale = np.array([size * 0.3, -size * 0.3], dtype=np.float32)
+
+        self.arrived = None
+        self.interval = 0.1
+        self.colors = None
+        self.box_color = None
+
+    def push(self, orientation: tuple[float, float, float], now: float | None = None):
+        """
+        New sample from the payload.
+
+        Args:
+            orientation (tuple): (heading, roll, pitch) in degrees, like the BNO055
+                reports them
+        """
+        now = time.monotonic() if now is None else now
+        if self.arrived is not None:
+            interval = min(
+                max(now - self.arrived, self.MIN_INTERVAL_S), self.MAX_INTERVAL_S
+            )
+            self.interval += (interval - self.interval) * self.INTERVAL_SMOOTHING
+        self.arrived = now
+
+        # Start from what's on screen, not the previous sample, so nothing jumps
+        self.start[:] = self.current
+        quat_from_euler(*orientation, out=self.target)
+
+    def update(self, now: float | None = None):
+        now = time.monotonic() if now is None else now
+        if self.arrived is not None:
+            t = min((now - self.arrived) / self.interval, 1.0)
+            quat_slerp(self.start, self.target, t, self.current)
+
+        quat_to_matrix(self.current, self.rotation)
+        np.matmul(VIEW_MATRIX, self.rotation, out=self.transform)
+        np.matmul(self.model, self.transform.T, out=self.projected)
+        np.multiply(self.projected[:, :2], self.screen_scale, out=self.screen)
+
+    def draw(self, now: float | None = None):
+        self.update(now)
+
+        if self.colors is None:
+            # Needs an imgui context, so not in __init__
+            self.colors = [imgui.get_color_u32(color) for _, color in self.AXES]
+            self.box_color = imgui.get_color_u32(imgui.Col_.text)
+
+        corner = imgui.get_cursor_screen_pos()
+        cx, cy = corner.x + self.size / 2, corner.y + self.size / 2
+        imgui.dummy((self.size, self.size))
+
+        draw_list = imgui.get_window_draw_list()
+        screen = self.screen.tolist()
+        for start, end in self.BOX_EDGES:
+            draw_list.add_line(
+                (cx + screen[start][0], cy + screen[start][1]),
+                (cx + screen[end][0], cy + screen[end][1]),
+                self.box_color,
+                1.5,
+            )
+
+        ox, oy = screen[self.origin]
+        for index, color in enumerate(self.colors):
+            tx, ty = screen[self.origin + 1 + index]
+            draw_list.add_line((cx + ox, cy + oy), (cx + tx, cy + ty), color, 2.5)
+
+    def euler(self) -> tuple[float, float, float]:
+        """(heading, roll, pitch) in degrees of what's being shown"""
+        w, x, y, z = self.current
+        heading = math.degrees(math.atan2(2 * (w * z + x * y), 1 - 2 * (y * y + z * z)))
+        pitch = math.degrees(math.asin(max(-1.0, min(1.0, 2 * (w * y - z * x)))))
+        roll = math.degrees(math.atan2(2 * (w * x + y * z), 1 - 2 * (x * x + y * y)))
+        return heading, roll, pitch
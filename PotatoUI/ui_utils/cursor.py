@@ -0,0 +1,68 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+from imgui_bundle import imgui, imgui_ctx, implot
+
+if TYPE_CHECKING:
+    from .gpu_plot import GpuSeries
+
+
+class CursorReadout:
+    """
+    Tooltip with the value of every series at the cursor while a plot is hovered,
+    for reading exact numbers off the crosshairs.
+
+    Each series' nearest sample is found by binary search (``GpuSeries.nearest``),
+    and the answer is kept until the cursor moves to another pixel, the axis moves,
+    or a series gets new samples. So a still cursor costs nothing, even over a
+    whole session of data.
+    """
+
+    def __init__(
+        self,
+        series: list[GpuSeries],
+        x_format: str = "Time: {:.2f} s",
+        y_format: str = "{:.2f}",
+    ) -> None:
+        self.series = series
+        self.x_format = x_format
+        self.y_format = y_format
+
+        self.key = None
+        self.lines: list[str] = []
+
+    def lookup(self, x: float) -> list[str]:
+        samples = [series.nearest(x) for series in self.series]
+        found = [sample for sample in samples if sample is not None]
+        if not found:
+            return []
+
+        # The channels of a window are sampled together, so the first one's time
+        # stands for all of them
+        lines = [self.x_format.format(found[0][0])]
+        for series, sample in zip(self.series, samples):
+            value = "-" if sample is None else self.y_format.format(sample[1])
+            lines.append(f"{series.label}: {value}")
+        return lines
+
+    def draw(self):
+        """Inside a plot, after everything's plotted"""
+        if not implot.is_plot_hovered():
+            return
+
+        limits = implot.get_plot_limits().x
+        key = (
+            int(imgui.get_mouse_pos().x),
+            limits.min,
+            limits.max,
+            tuple(series.written for series in self.series),
+        )
+        if key != self.key:
+            self.key = key
+            self.lines = self.lookup(implot.get_plot_mouse_pos().x)
+
+        if not self.lines:
+            return
+        with imgui_ctx.begin_tooltip():
+            for line in self.lines:
+                imgui.text(line)
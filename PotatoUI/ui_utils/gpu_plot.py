@@ -0,0 +1,475 @@
+from __future__ import annotations
+import bisect
+import ctypes
+import threading
+
+import numpy as np
+from OpenGL import GL as gl
+from imgui_bundle import imgui, implot
+
+from .cursor import CursorReadout
+
+VERTEX_SHADER = """
+#version 330 core
+layout(location = 0) in vec2 position;
+// x min, x max, y min, y max
+uniform vec4 bounds;
+
+void main() {
+    vec2 scaled = vec2(
+        (position.x - bounds.x) / (bounds.y - bounds.x),
+        (position.y - bounds.z) / (bounds.w - bounds.z)
+    );
+    gl_Position = vec4(scaled * 2.0 - 1.0, 0.0, 1.0);
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 330 core
+uniform vec4 color;
+out vec4 out_color;
+
+void main() {
+    out_color = color;
+}
+"""
+
+
+def search_sorted(column: np.ndarray, x: float, right: bool = False) -> int:
+    """
+    Same as ``np.searchsorted(column, x)``, for a column sliced out of samples like
+    ``window[:, 0]``. numpy copies a strided column before searching it, which is a
+    pass over the whole thing, while this is just the binary search.
+    """
+    if right:
+        return bisect.bisect_right(column, x)
+    return bisect.bisect_left(column, x)
+
+
+class GpuSeries:
+    """
+    One line of a GpuPlot. Samples go into a ring that's mirrored (every sample is
+    stored twice, ``capacity`` apart) so the newest ``capacity`` samples are always
+    one contiguous range. The same layout lives in a vertex buffer, which only gets
+    the new samples uploaded each frame and is drawn with a single call.
+
+    ``append`` can be called from any thread.
+
+    The y range of everything in the ring is kept up to date as samples come in,
+    so plots don't scan the samples every frame. Once the ring is full it can lag
+    behind a little: samples that fell out can still widen it, until another
+    ``BOUNDS_SLACK`` of the capacity has fallen out and it's worked out again.
+    """
+
+    BOUNDS_SLACK = 1 / 16
+
+    def __init__(
+        self, label: str, capacity: int = 100_000, color: tuple | None = None
+    ) -> None:
+        self.label = label
+        self.capacity = capacity
+        # Defaults to the implot colormap
+        self.color = color
+
+        self.data = np.zeros((capacity * 2, 2), dtype=np.float32)
+        self.head = 0
+        self.count = 0
+        self.written = 0
+        self.lock = threading.Lock()
+
+        self.y_min = np.inf
+        self.y_max = -np.inf
+        # Oldest sample (by number written) the y range was last worked out from
+        self.bounds_from = 0
+
+        # GL side, created on first sync
+        self.vbo = None
+        self.vao = None
+        self.uploaded = 0
+        # (first, count) of what the buffer held after the last sync, which is what
+        # gets drawn. The ring itself can be ahead of that by then.
+        self.synced = (0, 0)
+
+    def append(self, x, y):
+        x = np.atleast_1d(np.asarray(x, dtype=np.float32))
+        y = np.atleast_1d(np.asarray(y, dtype=np.float32))
+        if len(x) > self.capacity:
+            x, y = x[-self.capacity :], y[-self.capacity :]
+
+        with self.lock:
+            index = (self.head + np.arange(len(x))) % self.capacity
+            self.data[index, 0] = x
+            self.data[index, 1] = y
+            self.data[index + self.capacity] = self.data[index]
+
+            self.head = (self.head + len(x)) % self.capacity
+            self.count = min(self.count + len(x), self.capacity)
+            self.written += len(x)
+
+            oldest = self.written - self.count
+            if oldest - self.bounds_from > self.capacity * self.BOUNDS_SLACK:
+                window = self.data[self.start : self.start + self.count, 1]
+                self.y_min, self.y_max = float(window.min()), float(window.max())
+                self.bounds_from = oldest
+            elif len(y):
+                self.y_min = min(self.y_min, float(y.min()))
+                self.y_max = max(self.y_max, float(y.max()))
+
+    def clear(self):
+        with self.lock:
+            self.head = 0
+            self.count = 0
+            self.written = 0
+            self.y_min = np.inf
+            self.y_max = -np.inf
+            self.bounds_from = 0
+            # Everything gets uploaded again from the start
+            self.uploaded = 0
+
+    @property
+    def start(self) -> int:
+        return (self.head - self.count) % self.capacity
+
+    def x_range(self) -> tuple[float, float] | None:
+        """Oldest and newest x, None if there's nothing yet"""
+        with self.lock:
+            if not self.count:
+                return None
+            return (
+                float(self.data[self.start, 0]),
+                float(self.data[self.start + self.count - 1, 0]),
+            )
+
+    def y_range(self, x_min: float | None = None) -> tuple[float, float]:
+        """
+        Lowest and highest y of the samples from ``x_min`` on, (inf, -inf) if
+        there's none. For all of them (None) it's the range kept up to date by
+        ``append``, which can be a bit wider, see above.
+        """
+        with self.lock:
+            if x_min is None:
+                return self.y_min, self.y_max
+            window = self.data[self.start : self.start + self.count]
+            window = window[search_sorted(window[:, 0], x_min) :]
+            if not len(window):
+                return np.inf, -np.inf
+            return float(window[:, 1].min()), float(window[:, 1].max())
+
+    def window(self) -> np.ndarray:
+        """Samples oldest to newest, copied out of the ring"""
+        with self.lock:
+            return self.data[self.start : self.start + self.count].copy()
+
+    def nearest(self, x: float) -> tuple[float, float] | None:
+        """
+        The sample closest to ``x``, by binary search, so x has to be increasing
+        (like time). None if there's nothing yet.
+        """
+        with self.lock:
+            if not self.count:
+                return None
+            window = self.data[self.start : self.start + self.count]
+            index = search_sorted(window[:, 0], x)
+            # Take whichever neighbour is closer
+            if index == self.count or (
+                index and x - window[index - 1, 0] < window[index, 0] - x
+            ):
+                index -= 1
+            return float(window[index, 0]), float(window[index, 1])
+
+    def sync(self):
+        """Upload samples added since last time, GL thread only"""
+        if self.vbo is None:
+            self.vao = gl.glGenVertexArrays(1)
+            self.vbo = gl.glGenBuffers(1)
+            gl.glBindVertexArray(self.vao)
+            gl.glBindBuffer(gl.GL_ARRAY_BUFFER, self.vbo)
+            gl.glBufferData(
+                gl.GL_ARRAY_BUFFER, self.data.nbytes, None, gl.GL_DYNAMIC_DRAW
+            )
+            gl.glEnableVertexAttribArray(0)
+            gl.glVertexAttribPointer(0, 2, gl.GL_FLOAT, gl.GL_FALSE, 8, None)
+            gl.glBindVertexArray(0)
+
+        # Only the copy happens under the lock, appends don't wait on the upload
+        with self.lock:
+            new = min(self.written - self.uploaded, self.capacity)
+            self.uploaded = self.written
+            self.synced = (self.start, self.count)
+            if not new:
+                return
+            first = (self.head - new) % self.capacity
+            # Contiguous thanks to the mirroring
+            samples = self.data[first : first + new].copy()
+
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, self.vbo)
+        # Both copies of the new samples, the second can wrap past the end
+        for low in (first, first + self.capacity):
+            end = 2 * self.capacity - low
+            self._upload(low, samples[:end])
+            if new > end:
+                self._upload(0, samples[end:])
+
+    def _upload(self, low: int, samples: np.ndarray):
+        gl.glBufferSubData(gl.GL_ARRAY_BUFFER, low * 8, samples.nbytes, samples)
+
+    def draw(self):
+        """Draw what the last ``sync`` uploaded, GL thread only"""
+        gl.glBindVertexArray(self.vao)
+        gl.glDrawArrays(gl.GL_LINE_STRIP, *self.synced)
+
+    def delete(self):
+        if self.vbo is not None:
+            gl.glDeleteBuffers(1, [self.vbo])
+            gl.glDeleteVertexArrays(1, [self.vao])
+            self.vbo = self.vao = None
+            self.uploaded = 0
+            self.synced = (0, 0)
+
+
+class GpuPlot:
+    """
+    Plot for long, full-rate series. implot draws the frame, axes and legend, but
+    the lines themselves are drawn by the GPU from persistent vertex buffers into a
+    texture, so the CPU cost doesn't grow with the number of points.
+
+    The python imgui backend can't run draw callbacks, so the lines get rendered
+    into their texture after the frame is built and before imgui renders it (see
+    ``gpu_plot_renderer``), and the plot just shows that texture.
+    """
+
+    def __init__(
+        self,
+        label: str,
+        series: list[GpuSeries],
+        size=(-1, 250),
+        x_window: float | None = None,
+    ) -> None:
+        """
+        Args:
+            x_window (float | None): Only show this much of the x axis (e.g. the
+                last 60 seconds), everything if None
+        """
+        self.label = label
+        self.series = series
+        self.size = size
+        self.x_window = x_window
+
+        self.bounds = (0.0, 1.0, 0.0, 1.0)
+        self.colors: list[tuple] = []
+        self.readout = CursorReadout(series)
+
+        self.framebuffer = None
+        self.texture = None
+        self.texture_size = (0, 0)
+
+    def visible_bounds(self) -> tuple[float, float, float, float]:
+        x_min = y_min = np.inf
+        x_max = y_max = -np.inf
+        ranges = [series.x_range() for series in self.series]
+
+        for x_range in ranges:
+            if x_range is not None:
+                x_max = max(x_max, x_range[1])
+        if self.x_window is not None:
+            x_min = x_max - self.x_window
+
+        for series, x_range in zip(self.series, ranges):
+            if x_range is None:
+                continue
+            if self.x_window is None:
+                # Everything's visible, so the range the series keeps will do
+                x_min = min(x_min, x_range[0])
+                low, high = series.y_range()
+            else:
+                low, high = series.y_range(x_min)
+            y_min, y_max = min(y_min, low), max(y_max, high)
+
+        # Nothing (or only one sample) to plot yet
+        if not np.isfinite(x_max):
+            x_min, x_max = 0.0, 1.0
+        elif x_max <= x_min:
+            x_min = x_max - 1.0
+        if not np.isfinite(y_min):
+            y_min, y_max = 0.0, 1.0
+
+        # A bit of room so lines don't touch the edges
+        pad = max((y_max - y_min) * 0.05, 1e-3)
+        return x_min, x_max, y_min - pad, y_max + pad
+
+    def draw(self, x_label: str = "", y_label: str = ""):
+        if not implot.begin_plot(self.label, self.size):
+            return
+
+        self.bounds = self.visible_bounds()
+        x_min, x_max, y_min, y_max = self.bounds
+        implot.setup_axes(x_label, y_label)
+        implot.setup_axes_limits(x_min, x_max, y_min, y_max, implot.Cond_.always)
+
+        self.colors = []
+        for index, series in enumerate(self.series):
+            color = series.color
+            if color is None:
+                color = tuple(implot.get_colormap_color(index))
+            self.colors.append(color)
+            # Just for the legend, the line itself is drawn by the GPU
+            implot.set_next_line_style(color)
+            implot.plot_dummy(series.label)
+
+        pos = implot.get_plot_pos()
+        size = implot.get_plot_size()
+        scale = imgui.get_io().display_framebuffer_scale
+        self.resize(int(size.x * scale.x), int(size.y * scale.y))
+
+        if self.texture is not None:
+            # Framebuffers are upside down compared to imgui
+            implot.get_plot_draw_list().add_image(
+                self.texture,
+                pos,
+                (pos.x + size.x, pos.y + size.y),
+                (0, 1),
+                (1, 0),
+            )
+            gpu_plot_renderer.queue(self)
+
+        self.readout.draw()
+        implot.end_plot()
+
+    def resize(self, width: int, height: int):
+        if width <= 0 or height <= 0 or (width, height) == self.texture_size:
+            return
+
+        if self.framebuffer is None:
+            self.framebuffer = gl.glGenFramebuffers(1)
+            self.texture = gl.glGenTextures(1)
+
+        gl.glBindTexture(gl.GL_TEXTURE_2D, self.texture)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_LINEAR)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER, gl.GL_LINEAR)
+        gl.glTexImage2D(
+            gl.GL_TEXTURE_2D,
+            0,
+            gl.GL_RGBA,
+            width,
+            height,
+            0,
+            gl.GL_RGBA,
+            gl.GL_UNSIGNED_BYTE,
+            None,
+        )
+
+        last_framebuffer = gl.glGetIntegerv(gl.GL_FRAMEBUFFER_BINDING)
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, self.framebuffer)
+        gl.glFramebufferTexture2D(
+            gl.GL_FRAMEBUFFER,
+            gl.GL_COLOR_ATTACHMENT0,
+            gl.GL_TEXTURE_2D,
+            self.texture,
+            0,
+        )
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, last_framebuffer)
+        self.texture_size = (width, height)
+
+    def render(self, program: "GpuPlotRenderer"):
+        """Draw the lines into the texture, called by the renderer"""
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, self.framebuffer)
+        gl.glViewport(0, 0, *self.texture_size)
+        gl.glClearColor(0.0, 0.0, 0.0, 0.0)
+        gl.glClear(gl.GL_COLOR_BUFFER_BIT)
+
+        gl.glUniform4f(program.bounds_location, *self.bounds)
+        for series, color in zip(self.series, self.colors):
+            series.sync()
+            if series.synced[1] < 2:
+                continue
+            gl.glUniform4f(program.color_location, *color)
+            series.draw()
+
+    def delete(self):
+        for series in self.series:
+            series.delete()
+        if self.framebuffer is not None:
+            gl.glDeleteFramebuffers(1, [self.framebuffer])
+            gl.glDeleteTextures([self.texture])
+            self.framebuffer = self.texture = None
+            self.texture_size = (0, 0)
+
+
+class GpuPlotRenderer:
+    """
+    Renders every GpuPlot drawn this frame. ``render_pending()`` has to be called
+    once per frame after ``imgui.render()`` and before the backend draws
+    (GLFWImguiWrapper does this).
+    """
+
+    def __init__(self) -> None:
+        self.program = None
+        self.bounds_location = -1
+        self.color_location = -1
+        self.pending: list[GpuPlot] = []
+
+    def queue(self, plot: GpuPlot):
+        self.pending.append(plot)
+
+    def _compile(self):
+        program = gl.glCreateProgram()
+        for kind, source in (
+            (gl.GL_VERTEX_SHADER, VERTEX_SHADER),
+            (gl.GL_FRAGMENT_SHADER, FRAGMENT_SHADER),
+        ):
+            shader = gl.glCreateShader(kind)
+            gl.glShaderSource(shader, source)
+            gl.glCompileShader(shader)
+            if not gl.glGetShaderiv(shader, gl.GL_COMPILE_STATUS):
+                raise RuntimeError(gl.glGetShaderInfoLog(shader).decode())
+            gl.glAttachShader(program, shader)
+            gl.glDeleteShader(shader)
+
+        gl.glLinkProgram(program)
+        if not gl.glGetProgramiv(program, gl.GL_LINK_STATUS):
+            raise RuntimeError(gl.glGetProgramInfoLog(program).decode())
+
+        self.program = program
+        self.bounds_location = gl.glGetUniformLocation(program, "bounds")
+        self.color_location = gl.glGetUniformLocation(program, "color")
+
+    def render_pending(self):
+        if not self.pending:
+            return
+        if self.program is None:
+            self._compile()
+
+        last_framebuffer = gl.glGetIntegerv(gl.GL_FRAMEBUFFER_BINDING)
+        last_viewport = gl.glGetIntegerv(gl.GL_VIEWPORT)
+        last_program = gl.glGetIntegerv(gl.GL_CURRENT_PROGRAM)
+        last_vertex_array = gl.glGetIntegerv(gl.GL_VERTEX_ARRAY_BINDING)
+        last_array_buffer = gl.glGetIntegerv(gl.GL_ARRAY_BUFFER_BINDING)
+        scissor = gl.glIsEnabled(gl.GL_SCISSOR_TEST)
+        blend = gl.glIsEnabled(gl.GL_BLEND)
+
+        gl.glDisable(gl.GL_SCISSOR_TEST)
+        gl.glDisable(gl.GL_BLEND)
+        gl.glUseProgram(self.program)
+
+        for plot in self.pending:
+            plot.render(self)
+        self.pending.clear()
+
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, last_framebuffer)
+        gl.glViewport(*last_viewport)
+        gl.glUseProgram(last_program)
+        gl.glBindVertexArray(last_vertex_array)
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, last_array_buffer)
+        if scissor:
+            gl.glEnable(gl.GL_SCISSOR_TEST)
+        if blend:
+            gl.glEnable(gl.GL_BLEND)
+
+    def shutdown(self):
+        if self.program is not None:
+            gl.glDeleteProgram(self.program)
+            self.program = None
+        self.pending.clear()
+
+
+gpu_plot_renderer = GpuPlotRenderer()
@@ -22,10 +22,27 @@ def getDirection(direction: str):
 
 
 def style_gui_from_file(styleConfigPath: str):
+    apply_style(read_style_file(styleConfigPath))
 
+
+def read_style_file(styleConfigPath: str) -> dict:
+    """Parse a style file into plain data that apply_style understands"""
     with open(styleConfigPath, "rb") as styleFile:
         data = tomli.load(styleFile)
 
+    # Get colors from the data
+    colorData = data["colors"]
+
+    def fixColorRange(color: list, maxVal: float):
+        return [color[0] / maxVal, color[1] / maxVal, color[2] / maxVal, *color[3:]]
+
+    data["colors"] = {
+        color: fixColorRange(colorData[color], 255.0) for color in colorData
+    }
+    return data
+
+
+def apply_style(data: dict):
     # Style GUI from file data
     style = imgui.get_style()  # override active style
     imgui.style_colors_dark()
@@ -60,17 +77,8 @@ def style_gui_from_file(styleConfigPath: str):
     style.button_text_align = data["buttonTextAlign"]
     style.selectable_text_align = data["selectableTextAlign"]
 
-    # Get colors from the data
     colorData = data["colors"]
 
-    def fixColorRange(color: tuple, maxVal: float):
-        color[0] = color[0] / maxVal
-        color[1] = color[1] / maxVal
-        color[2] = color[2] / maxVal
-        return color
-
-    colorData = {color: fixColorRange(colorData[color], 255.0) for color in colorData}
-
     style.set_color_(imgui.Col_.text, colorData["Text"])
     style.set_color_(imgui.Col_.text_disabled, colorData["TextDisabled"])
     style.set_color_(imgui.Col_.window_bg, colorData["WindowBg"])
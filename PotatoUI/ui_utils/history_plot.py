@@ -0,0 +1,218 @@
+"""
+Plotting a whole session of a GpuSeries with implot, at any zoom.
+
+implot draws every point it's handed, so zoomed out over an hour of data it would
+be drawing (and python copying) tens of thousands of them every frame. Instead the
+visible part of each series is min/max decimated to about two points per pixel.
+Decimation is done in tiles per zoom level (level n is buckets of 2**n samples)
+that are kept once they're full, so panning and zooming around a live flight only
+ever redoes the newest tile, the one still getting samples.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+from imgui_bundle import imgui, implot
+
+from .gpu_plot import GpuSeries, search_sorted
+
+
+def min_max_decimate(samples: np.ndarray, bucket: int) -> np.ndarray:
+    """
+    Boil every ``bucket`` samples (x, y rows) down to their lowest and highest, in
+    the order they happened, so spikes survive. Leftovers at the end get a bucket of
+    their own.
+    """
+    full = len(samples) // bucket * bucket
+    blocks = [samples[:full].reshape(-1, bucket, 2)]
+    if full < len(samples):
+        blocks.append(samples[full:].reshape(1, -1, 2))
+
+    points = []
+    for block in blocks:
+        if not block.size:
+            continue
+        low = block[:, :, 1].argmin(axis=1)
+        high = block[:, :, 1].argmax(axis=1)
+        rows = np.arange(len(block))
+        first = block[rows, np.minimum(low, high)]
+        second = block[rows, np.maximum(low, high)]
+        points.append(np.stack([first, second], axis=1).reshape(-1, 2))
+
+    if not points:
+        return np.empty((0, 2), dtype=samples.dtype)
+    return np.concatenate(points)
+
+
+class DecimatedSeries:
+    """
+    What of a GpuSeries is visible between two x values, decimated to fit a plot
+    (see the module docstring). x has to be increasing, like time.
+    """
+
+    # Buckets in a tile, at any level
+    TILE_BUCKETS = 512
+
+    # Tiles are small, but zooming around for long enough adds up
+    MAX_TILES = 4096
+
+    def __init__(self, series: GpuSeries) -> None:
+        self.series = series
+        # (level, tile) -> (points, first, end), the absolute sample range it was
+        # made from. Full tiles never change, a partial one is redone once its range
+        # grows.
+        self.tiles: dict[tuple[int, int], tuple[np.ndarray, int, int]] = {}
+
+    @property
+    def label(self) -> str:
+        return self.series.label
+
+    def x_range(self) -> tuple[float, float] | None:
+        """Oldest and newest x, None if there's nothing yet"""
+        series = self.series
+        with series.lock:
+            if not series.count:
+                return None
+            start = series.start
+            return (
+                float(series.data[start, 0]),
+                float(series.data[start + series.count - 1, 0]),
+            )
+
+    def visible(
+        self, x_min: float, x_max: float, max_buckets: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Samples from ``x_min`` to ``x_max``, plus one either side so lines reach the
+        edges of the plot. Decimated to at most ``max_buckets`` min/max pairs when
+        there's more than that.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: x and y, ready for implot
+        """
+        series = self.series
+        max_buckets = max(max_buckets, 1)
+        with series.lock:
+            written, count = series.written, series.count
+            window = series.data[series.start : series.start + count]
+
+            x = window[:, 0]
+            low = max(search_sorted(x, x_min) - 1, 0)
+            high = min(search_sorted(x, x_max, right=True) + 1, count)
+            if high - low <= 2 * max_buckets:
+                points = window[low:high]
+            else:
+                level = int(np.ceil(np.log2((high - low) / max_buckets)))
+                first = written - count
+                points = self._tiles(window, first, written, level, low, high)
+
+            # Tiles can stick out well past the edges
+            start = max(search_sorted(points[:, 0], x_min) - 1, 0)
+            end = search_sorted(points[:, 0], x_max, right=True) + 1
+            points = points[start:end]
+            return points[:, 0].copy(), points[:, 1].copy()
+
+    def _tiles(
+        self,
+        window: np.ndarray,
+        first: int,
+        written: int,
+        level: int,
+        low: int,
+        high: int,
+    ) -> np.ndarray:
+        bucket = 1 << level
+        span = bucket * self.TILE_BUCKETS
+        tiles = range((first + low) // span, (first + high - 1) // span + 1)
+
+        points = []
+        for tile in tiles:
+            # The oldest tile can be missing samples the ring already dropped
+            start = max(tile * span, first)
+            end = min((tile + 1) * span, written)
+
+            cached = self.tiles.get((level, tile))
+            if cached is not None and cached[1:] == (start, end):
+                points.append(cached[0])
+                continue
+
+            tile_points = min_max_decimate(window[start - first : end - first], bucket)
+            if len(self.tiles) >= self.MAX_TILES:
+                self.tiles.clear()
+            self.tiles[(level, tile)] = (tile_points, start, end)
+            points.append(tile_points)
+
+        return np.concatenate(points)
+
+
+class PlotTimeRange:
+    """
+    The x axis shared by a window's plots. Either it follows the newest sample,
+    showing the last ``span`` seconds of it (or everything), or it stays wherever
+    the user panned or zoomed to until they pick a span again.
+    """
+
+    SPANS: tuple[tuple[str, float | None], ...] = (
+        ("30 s", 30.0),
+        ("2 min", 120.0),
+        ("10 min", 600.0),
+        ("All", None),
+    )
+
+    def __init__(self, span: float | None = 30.0) -> None:
+        self.span = span
+        self.follow = True
+
+    def draw_controls(self):
+        for index, (name, span) in enumerate(self.SPANS):
+            if index:
+                imgui.same_line()
+            selected = self.follow and span == self.span
+            if selected:
+                imgui.push_style_color(
+                    imgui.Col_.button,
+                    imgui.get_style_color_vec4(imgui.Col_.button_active),
+                )
+            if imgui.button(f"{name}###Span{index}"):
+                self.span = span
+                self.follow = True
+            if selected:
+                imgui.pop_style_color()
+
+        if not self.follow:
+            imgui.same_line()
+            imgui.text_disabled("(paused, pick one to follow again)")
+
+    def setup(self, x_range: tuple[float, float] | None):
+        """
+        Inside a plot, before anything's plotted. ``x_range`` is the oldest and
+        newest x there is.
+        """
+        if not self.follow or x_range is None:
+            return
+
+        oldest, newest = x_range
+        x_min = oldest if self.span is None else newest - self.span
+        # One sample (or none) still needs some axis
+        if newest <= x_min:
+            x_min = newest - 1.0
+        implot.setup_axis_limits(implot.ImAxis_.x1, x_min, newest, implot.Cond_.always)
+
+    def handle_input(self):
+        """Inside a plot, after everything's plotted"""
+        # Scrolling or dragging in the plot takes over from following. The axis
+        # was locked this frame, from the next one implot pans and zooms it.
+        if not self.follow or not implot.is_plot_hovered():
+            return
+        io = imgui.get_io()
+        if io.mouse_wheel or any(
+            imgui.is_mouse_dragging(button)
+            for button in (imgui.MouseButton_.left, imgui.MouseButton_.right)
+        ):
+            self.follow = False
+
+    @staticmethod
+    def visible() -> tuple[float, float, int]:
+        """x limits of the current plot and how many pixels wide it is"""
+        limits = implot.get_plot_limits()
+        return limits.x.min, limits.x.max, int(implot.get_plot_size().x)
@@ -1,14 +1,15 @@
-from PIL import Image, ImageSequence, UnidentifiedImageError
 from OpenGL import GL as gl
 import pathlib
 from imgui_bundle import imgui
 
+from .texture_cache import get_rgba_pixels, image_loader, texture_cache
+
 _dummy_texture_id = None
 
 
 def dummy_texture_id():
+    # Shared 1x1 black texture shown while images load, made once per process
     global _dummy_texture_id
-    _dummy_texture_id = None
     if _dummy_texture_id is None:
         _dummy_texture_id = gl.glGenTextures(1)
         gl.glBindTexture(gl.GL_TEXTURE_2D, _dummy_texture_id)
@@ -16,8 +17,8 @@ def dummy_texture_id():
             gl.GL_TEXTURE_2D,
             0,
             gl.GL_RGBA,
-            0,
-            0,
+            1,
+            1,
             0,
             gl.GL_RGBA,
             gl.GL_UNSIGNED_BYTE,
@@ -26,36 +27,28 @@ def dummy_texture_id():
     return _dummy_texture_id
 
 
-def get_rgba_pixels(image: Image.Image):
-    if image.mode == "RGB":
-        return image.tobytes("raw", "RGBX")
-    else:
-        if image.mode != "RGBA":
-            image = image.convert("RGBA")
-        return image.tobytes("raw", "RGBA")
-
-
 class ImageHelper:
+    """
+    Draws an image file. The decoded frames and textures live in ``texture_cache``
+    and are shared with every other ImageHelper on the same file, this only keeps
+    track of where its own animation is at.
+    """
+
     def __init__(self, path: str | pathlib.Path, glob=""):
-        self.width = 1
-        self.height = 1
         self.frame = -1
         self.glob = glob
         self.elapsed = 0.0
-        self.loaded = False
-        self.loading = False
-        self.applied = False
         self.missing = False
-        self.invalid = False
         self.prev_time = 0.0
-        self.animated = False
-        self.frames: list[bytes] = []
-        self.durations: list[float] = []
-        self.texture_ids: list[int] = []
+        self.entry = None
         self.resolved_path: pathlib.Path = None
         self.path: pathlib.Path = pathlib.Path(path)
         self.resolve()
 
+    def __del__(self):
+        # Only drops the refcount, the textures get freed by the cache on the GL thread
+        self.release()
+
     def resolve(self):
         self.resolved_path = self.path
         if self.glob:
@@ -69,95 +62,87 @@ class ImageHelper:
             self.resolved_path = paths[0]
         self.missing = not self.resolved_path.is_file()
 
+    def acquire(self):
+        if self.entry is None and not self.missing:
+            try:
+                self.entry = texture_cache.acquire(self.resolved_path)
+            except OSError:
+                self.missing = True
+
+    def release(self):
+        if self.entry is not None:
+            texture_cache.release(self.entry)
+            self.entry = None
+
     def reload(self):
-        self.loaded = False
-        self.loading = True
-        self.applied = False
+        # The cache is keyed by mtime, so an edited file gets decoded again
+        self.release()
         self.resolve()
-
         self.frame = -1
         self.elapsed = 0.0
-        self.frames.clear()
-        self.invalid = False
-        self.animated = False
-        self.durations.clear()
-        self.width, self.height = (1, 1)
-
-        if self.missing:
-            self.loaded = True
-            self.loading = False
-            return
-
-        try:
-            image = Image.open(self.resolved_path)
-        except UnidentifiedImageError:
-            self.invalid = True
-            self.loaded = True
-            self.loading = False
-            return
-
-        self.width, self.height = image.size
-        for frame in ImageSequence.Iterator(image):
-            self.frames.append(get_rgba_pixels(frame))
-            if (duration := frame.info.get("duration", 0)) < 1:
-                duration = 100
-            self.durations.append(duration / 1250)
-            # Technically this should be / 1000 (millis to seconds) but I found that 1250 works better...
-        self.animated = len(self.durations) > 1
-
-        image.close()
-        self.loaded = True
-        self.loading = False
+        self.acquire()
 
     def apply(self):
-        if self.texture_ids:
-            gl.glDeleteTextures([self.texture_ids])
-            self.texture_ids.clear()
-        texture_gen = gl.glGenTextures(len(self.frames))
-        self.texture_ids.extend([texture_gen] if len(self.frames) == 1 else texture_gen)
-        for frame, texture_id in zip(self.frames, self.texture_ids):
-            gl.glBindTexture(gl.GL_TEXTURE_2D, texture_id)
-            gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_LINEAR)
-            gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER, gl.GL_LINEAR)
-            gl.glTexParameteri(
-                gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_S, gl.GL_CLAMP_TO_BORDER
-            )
-            gl.glTexParameteri(
-                gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_T, gl.GL_CLAMP_TO_BORDER
-            )
-            gl.glTexImage2D(
-                gl.GL_TEXTURE_2D,
-                0,
-                gl.GL_RGBA,
-                self.width,
-                self.height,
-                0,
-                gl.GL_RGBA,
-                gl.GL_UNSIGNED_BYTE,
-                frame,
-            )
-        self.frames.clear()
-        self.applied = True
+        # Upload right away instead of waiting for the loader
+        self.acquire()
+        if self.entry is not None and self.entry.loaded:
+            self.entry.upload_frames(None)
 
     @property
-    def texture_id(self):
-        if not self.loaded:
-            if not self.loading:
-                self.loading = True
-                self.applied = False
-                # This next self.reload() actually loads the image and does all the conversion. It takes time and resources!
-                self.reload()
-                # You can (and maybe should) run this in a thread! threading.Thread(target=self.reload, daemon=True).start()
-                # Or maybe setup an image thread and queue images to load one by one?
-                # You could do this with https://gist.github.com/Willy-JL/bb410bcc761f8bf5649180f22b7f3b44 like so:
-                # sync_thread.queue(self.reload)
-            return dummy_texture_id()
+    def width(self) -> int:
+        return self.entry.width if self.entry is not None else 1
 
-        if self.missing or self.invalid:
-            return dummy_texture_id()
+    @property
+    def height(self) -> int:
+        return self.entry.height if self.entry is not None else 1
 
-        if not self.applied:
-            self.apply()
+    @property
+    def loaded(self) -> bool:
+        return self.missing or (self.entry is not None and self.entry.loaded)
+
+    @property
+    def applied(self) -> bool:
+        return self.missing or (self.entry is not None and self.entry.applied)
+
+    @property
+    def invalid(self) -> bool:
+        return self.entry is not None and self.entry.invalid
+
+    @property
+    def animated(self) -> bool:
+        return self.entry is not None and self.entry.animated
+
+    @property
+    def durations(self) -> list[float]:
+        return self.entry.durations if self.entry is not None else []
+
+    @property
+    def texture_ids(self) -> list[int]:
+        return self.entry.texture_ids if self.entry is not None else []
+
+    def map_uv(self, uv0=(0.0, 0.0), uv1=(1.0, 1.0)):
+        """
+        Turn UVs relative to this image (like the ones from crop_to_ratio) into UVs
+        for the current frame in the atlas. Use after getting ``texture_id``.
+        """
+        if self.missing or not self.applied or self.invalid:
+            return uv0, uv1
+        return self.entry.regions[self.frame].map_uv(uv0, uv1)
+
+    def image_args(self, args: tuple, kwargs: dict, uv0_key: str, uv1_key: str):
+        # Pulls the UVs out of whatever was passed to render() and maps them
+        uv0 = kwargs.pop(uv0_key, args[0] if len(args) > 0 else (0.0, 0.0))
+        uv1 = kwargs.pop(uv1_key, args[1] if len(args) > 1 else (1.0, 1.0))
+        texture_id = self.texture_id
+        return (texture_id, *self.map_uv(uv0, uv1), *args[2:])
+
+    @property
+    def texture_id(self):
+        # Decoding happens on the loader's pool, and the textures get uploaded a bit
+        # per frame. Until then the dummy texture is shown.
+        self.acquire()
+        if self.missing or not self.applied or self.invalid:
+            return dummy_texture_id()
 
         if self.animated:
             if self.prev_time != (new_time := imgui.get_time()):
@@ -169,7 +154,7 @@ class ImageHelper:
                     if self.frame == len(self.durations) - 1:
                         self.frame = 0
 
-        return self.texture_ids[self.frame]
+        return self.entry.texture_id(self.frame)
 
     def render(self, width: int, height: int, *args, **kwargs):
         if imgui.is_rect_visible(imgui.ImVec2(width, height)):
@@ -181,12 +166,14 @@ class ImageHelper:
                 pos2 = imgui.ImVec2(pos.x + width, pos.y + height)
                 draw_list = imgui.get_window_draw_list()
                 alpha_color = imgui.get_color_u32(imgui.ImVec4(1.0, 1.0, 1.0, 1.0))
+                texture_id = self.texture_id
+                uv0, uv1 = self.map_uv()
                 draw_list.add_image_rounded(
-                    self.texture_id,
+                    texture_id,
                     pos,
                     pos2,
-                    imgui.ImVec2(0, 0),
-                    imgui.ImVec2(1, 1),
+                    imgui.ImVec2(*uv0),
+                    imgui.ImVec2(*uv1),
                     alpha_color,
                     *args,
                     flags=flags.value,
@@ -195,8 +182,11 @@ class ImageHelper:
 
                 imgui.dummy(imgui.ImVec2(width, height))
             else:
+                texture_id, uv0, uv1, *args = self.image_args(
+                    args, kwargs, "uv0", "uv1"
+                )
                 imgui.image(
-                    self.texture_id, imgui.ImVec2(width, height), *args, **kwargs
+                    texture_id, imgui.ImVec2(width, height), uv0, uv1, *args, **kwargs
                 )
             return True
         else:
@@ -247,12 +237,14 @@ class ForegroundImageHelper(ImageHelper):
 
                 draw_list = imgui.get_foreground_draw_list()
                 alpha_color = imgui.get_color_u32(imgui.ImVec4(1.0, 1.0, 1.0, 1.0))
+                texture_id = self.texture_id
+                uv0, uv1 = self.map_uv()
                 draw_list.add_image_rounded(
-                    self.texture_id,
+                    texture_id,
                     pos,
                     pos2,
-                    imgui.ImVec2(0, 0),
-                    imgui.ImVec2(1, 1),
+                    imgui.ImVec2(*uv0),
+                    imgui.ImVec2(*uv1),
                     alpha_color,
                     *args,
                     flags=flags.value,
@@ -263,7 +255,10 @@ class ForegroundImageHelper(ImageHelper):
                 pos = position
                 pos2 = imgui.ImVec2(pos[0] + width, pos[1] + height)
                 draw_list = imgui.get_foreground_draw_list()
-                draw_list.add_image(self.texture_id, pos, pos2, *args, **kwargs)
+                texture_id, uv0, uv1, *args = self.image_args(
+                    args, kwargs, "uv_min", "uv_max"
+                )
+                draw_list.add_image(texture_id, pos, pos2, uv0, uv1, *args, **kwargs)
 
             return True
         else:
@@ -291,12 +286,14 @@ class BackgroundImageHelper(ImageHelper):
                 pos2 = imgui.ImVec2(pos[0] + width, pos[1] + height)
                 draw_list = imgui.get_background_draw_list()
                 alpha_color = imgui.get_color_u32(imgui.ImVec4(1.0, 1.0, 1.0, 1.0))
+                texture_id = self.texture_id
+                uv0, uv1 = self.map_uv()
                 draw_list.add_image_rounded(
-                    self.texture_id,
+                    texture_id,
                     pos,
                     pos2,
-                    imgui.ImVec2(0, 0),
-                    imgui.ImVec2(1, 1),
+                    imgui.ImVec2(*uv0),
+                    imgui.ImVec2(*uv1),
                     alpha_color,
                     *args,
                     flags=flags.value,
@@ -306,7 +303,10 @@ class BackgroundImageHelper(ImageHelper):
                 pos = position
                 pos2 = imgui.ImVec2(pos[0] + width, pos[1] + height)
                 draw_list = imgui.get_background_draw_list()
-                draw_list.add_image(self.texture_id, pos, pos2, *args, **kwargs)
+                texture_id, uv0, uv1, *args = self.image_args(
+                    args, kwargs, "uv_min", "uv_max"
+                )
+                draw_list.add_image(texture_id, pos, pos2, uv0, uv1, *args, **kwargs)
 
             return True
         else:
@@ -320,6 +320,8 @@ if __name__ == "__main__":
     # Images are loaded lazily, you can create as many as you want,
     # they will only be loaded when shown for the first time.
     # GIFs are also supported!
+    # Loading happens in the background, call image_loader.upload_pending() once per
+    # frame to get the results onto the GPU (GLFWImguiWrapper already does this).
     image = ImageHelper("example.png")
     # You can also use glob patterns, pass a folder path and add a file glob pattern:
     # image = ImageHelper("/path/to/images", glob="**/example.*")
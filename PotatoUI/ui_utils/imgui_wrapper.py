@@ -2,6 +2,12 @@ import glfw
 from OpenGL import GL as gl
 from imgui_bundle import imgui
 from imgui_bundle.python_backends.glfw_backend import GlfwRenderer
+from .texture_cache import image_loader, texture_cache
+from .gpu_plot import gpu_plot_renderer
+from .memory import GCControl, MemoryWindow
+from .startup_cache import BakedFontAtlas, FontSpec, StartupCache
+from .startup_cache import add_fonts, bake_fonts, restore_fonts
+import msgspec
 import sys
 import time
 
@@ -17,16 +23,41 @@ class GLFWImguiWrapper:
         scaling_factor=1,
         framerate=70,
         fullscreen=False,
+        host: "GLFWImguiWrapper | None" = None,
     ):
+        """
+        Args:
+            host (GLFWImguiWrapper | None): Draw inside another wrapper's window
+                instead of making a new one. The host's context, backend and fonts
+                are shared, and the host is in charge of the render loop.
+        """
         self.name = name
         self.fullscreen = fullscreen
-        self.create_backend(width, height, fullscreen)
+        self.host = host
 
-        self.io = self.imgui_backend.io
-        self.io.config_flags |= imgui.ConfigFlags_.docking_enable
-        self.framerate = framerate
+        # Prefix for window names so several hosted interfaces don't clash
+        self.workspace_id = "" if host is None else name
 
-        self.setup_main_font(font_path, font_size, scaling_factor)
+        if host is None:
+            self.create_backend(width, height, fullscreen)
+
+            self.io = self.imgui_backend.io
+            self.io.config_flags |= imgui.ConfigFlags_.docking_enable
+            self.framerate = framerate
+            self.font_scaling_factor = scaling_factor
+
+            self.gc_control = GCControl()
+            self.memory_window = MemoryWindow(self.io, self.gc_control)
+
+            self.setup_main_font(font_path, font_size, scaling_factor)
+        else:
+            self.context = host.context
+            self.glfw_window = host.glfw_window
+            self.imgui_backend = host.imgui_backend
+            self.io = host.io
+            self.framerate = host.framerate
+            self.font_scaling_factor = host.font_scaling_factor
+            self.gc_control = host.gc_control
 
         self.setup_gui()
 
@@ -53,6 +84,85 @@ class GLFWImguiWrapper:
         self.font_scaling_factor = scaling_factor
         self.imgui_backend.refresh_font_texture()
 
+    def setup_fonts(
+        self,
+        specs: list[FontSpec],
+        scaling_factor: int = 1,
+        cache: StartupCache | None = None,
+    ) -> list[imgui.ImFont]:
+        """
+        Load a bunch of fonts with one atlas build and one texture upload, instead of
+        rebuilding after every font like add_extra_font. The first one becomes the
+        main font.
+
+        Args:
+            specs (list[FontSpec]): Fonts to load, sizes get multiplied by
+                ``scaling_factor`` (same as setup_main_font)
+            cache (StartupCache | None): Reuse the atlas baked on a previous launch
+                if the fonts and sizes haven't changed
+
+        Returns:
+            list[imgui.ImFont]: The fonts, in the same order as ``specs``
+        """
+        specs = [
+            msgspec.structs.replace(spec, size_pixels=spec.size_pixels * scaling_factor)
+            for spec in specs
+        ]
+
+        fonts = self.io.fonts
+        fonts.clear()
+        # Baked lines can't be restored from the cache, so don't use them at all
+        fonts.flags |= imgui.ImFontAtlasFlags_.no_baked_lines
+
+        key = cache.font_key(specs) if cache is not None else None
+        baked = cache.load_fonts(key) if cache is not None else None
+        if baked is not None:
+            loaded = restore_fonts(fonts, specs, baked)
+        else:
+            loaded = add_fonts(fonts, specs)
+            baked = bake_fonts(fonts, specs, loaded)
+            if cache is not None:
+                cache.save_fonts(key, baked)
+
+        self.upload_font_texture(baked)
+
+        self.main_font = loaded[0]
+        self.io.font_global_scale = 1 / scaling_factor
+        self.font_scaling_factor = scaling_factor
+        return loaded
+
+    def upload_font_texture(self, baked: BakedFontAtlas):
+        # Single channel texture, swizzled so it reads like imgui's white RGBA atlas
+        texture_id = gl.glGenTextures(1)
+        gl.glBindTexture(gl.GL_TEXTURE_2D, texture_id)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_LINEAR)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER, gl.GL_LINEAR)
+        gl.glTexParameteriv(
+            gl.GL_TEXTURE_2D,
+            gl.GL_TEXTURE_SWIZZLE_RGBA,
+            [gl.GL_ONE, gl.GL_ONE, gl.GL_ONE, gl.GL_RED],
+        )
+        gl.glTexImage2D(
+            gl.GL_TEXTURE_2D,
+            0,
+            gl.GL_R8,
+            baked.width,
+            baked.height,
+            0,
+            gl.GL_RED,
+            gl.GL_UNSIGNED_BYTE,
+            baked.alpha,
+        )
+        gl.glBindTexture(gl.GL_TEXTURE_2D, 0)
+
+        # Hand it to the backend so it gets cleaned up with everything else
+        backend = self.imgui_backend
+        if backend._font_texture is not None and backend._font_texture > 0:
+            gl.glDeleteTextures([backend._font_texture])
+        backend._font_texture = texture_id
+        self.io.fonts.tex_id = texture_id
+        self.io.fonts.clear_tex_data()
+
     def add_extra_font(self, path: str, font_size_in_pixels: int, *args, **kwargs):
         io = imgui.get_io()
 
@@ -73,10 +183,10 @@ class GLFWImguiWrapper:
     def update_gui(self):
         backend = self.imgui_backend
         imgui.set_current_context(self.context)
+        self.gc_control.begin_frame()
 
         # Update inputs like mouse/keyboard
-        glfw.poll_events()
-        backend.process_inputs()
+        self.poll_inputs()
 
         smooth_scroll_speed = 8.0
         scroll_amount = 1.0
@@ -95,23 +205,55 @@ class GLFWImguiWrapper:
 
         imgui.new_frame()
 
+        # Send over whatever images finished decoding, within the per-frame budget
+        image_loader.upload_pending()
+        # And free unused textures if over the GPU memory budget
+        texture_cache.trim()
+
         self.draw()
 
+        if imgui.is_key_pressed(imgui.Key.f12):
+            self.memory_window.show = not self.memory_window.show
+        self.memory_window.draw_window()
+
         imgui.end_frame()
 
         gl.glClearColor(0.1, 0.1, 0.1, 1)
         gl.glClear(gl.GL_COLOR_BUFFER_BIT)
 
         imgui.render()
+        # GPU plots drawn this frame need their lines rendered before imgui uses them
+        gpu_plot_renderer.render_pending()
         backend.render(imgui.get_draw_data())
+        self.present()
+        # Sleeps, but might fit a deferred garbage collection in first
+        self.gc_control.end_frame(1.0 / self.framerate)
+
+    def poll_inputs(self):
+        glfw.poll_events()
+        self.imgui_backend.process_inputs()
+
+    def present(self):
         glfw.swap_buffers(self.glfw_window)
-        time.sleep(1.0 / self.framerate)
+
+    def enable_gc_control(self):
+        """
+        Freeze everything made during startup and move full garbage collections
+        between frames, see GCControl. Call once the interface is up.
+        """
+        self.gc_control.enable()
 
     @property
     def should_close(self):
         return glfw.window_should_close(self.glfw_window)
 
     def shutdown_gui(self):
+        if self.host is not None:
+            # The host owns the window
+            return
+        image_loader.shutdown()
+        gpu_plot_renderer.shutdown()
+        self.gc_control.shutdown()
         self.imgui_backend.shutdown()
         glfw.terminate()
 
@@ -0,0 +1,178 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+import time
+import numpy as np
+
+from imgui_bundle import imgui
+from imgui_bundle import imgui_ctx
+from imgui_bundle import implot
+
+from .widgets import GUIWindow
+
+if TYPE_CHECKING:
+    from PotatoLink.uplink import UplinkScheduler
+    from PotatoLink.link_stats import LinkStats
+
+
+def sparkline(label: str, values: np.ndarray, size=(-1, 30)):
+    """Tiny axis-less line plot, meant to sit in a table cell"""
+    implot.push_style_var(implot.StyleVar_.plot_padding, (0, 0))
+    if implot.begin_plot(f"##{label}", size, implot.Flags_.canvas_only):
+        axis_flags = implot.AxisFlags_.no_decorations
+        implot.setup_axes("", "", axis_flags, axis_flags | implot.AxisFlags_.auto_fit)
+        implot.setup_axis_limits(implot.ImAxis_.x1, 0, len(values), implot.Cond_.always)
+        implot.plot_line(label, values)
+        implot.end_plot()
+    implot.pop_style_var()
+
+
+class UplinkWindow(GUIWindow):
+
+    STATE_COLORS = {
+        "queued": (0.7, 0.7, 0.7, 1.0),
+        "sent": (1.0, 0.8, 0.0, 1.0),
+        "acked": (0.0, 1.0, 0.0, 1.0),
+        "timed out": (1.0, 0.0, 0.0, 1.0),
+        "failed": (1.0, 0.0, 0.0, 1.0),
+    }
+
+    def __init__(
+        self,
+        io: imgui._IO,
+        uplink: UplinkScheduler,
+        closable: bool = False,
+        flags=None,
+        scope="",
+    ) -> None:
+        super().__init__("Uplink", io, closable, flags, scope)
+        self.uplink = uplink
+
+    def draw_contents(self):
+        count, mean, p95, worst = self.uplink.latency_stats()
+        imgui.text(f"Queued: {self.uplink.queue.qsize()}")
+        imgui.text(
+            f"Ack latency ({count}): avg {mean * 1000:.0f}ms, "
+            f"p95 {p95 * 1000:.0f}ms, max {worst * 1000:.0f}ms"
+        )
+
+        table_flags = imgui.TableFlags_.row_bg | imgui.TableFlags_.borders_inner_h
+        with imgui_ctx.begin_table("##UplinkHistory", 4, table_flags) as table:
+            if not table:
+                return
+
+            imgui.table_setup_column("#")
+            imgui.table_setup_column("Command")
+            imgui.table_setup_column("State")
+            imgui.table_setup_column("Age")
+            imgui.table_headers_row()
+
+            now = time.monotonic()
+            for command in reversed(self.uplink.history):
+                imgui.table_next_row()
+                imgui.table_next_column()
+                imgui.text(f"{command.seq}")
+                imgui.table_next_column()
+                imgui.text(command.text)
+                imgui.table_next_column()
+                imgui.text_colored(
+                    imgui.ImVec4(*self.STATE_COLORS[command.state.value]),
+                    f"{command.state.value} x{command.attempts}",
+                )
+                imgui.table_next_column()
+                imgui.text(f"{now - command.created:.1f}s")
+
+
+class LinkQualityWindow(GUIWindow):
+    """
+    Per-link rates next to the UI frame time, so a laggy display can be pinned on
+    either the radio link or the ground station itself.
+    """
+
+    FRAME_TIME_SAMPLES = 300
+
+    def __init__(
+        self,
+        io: imgui._IO,
+        links: list[LinkStats],
+        closable: bool = False,
+        flags=None,
+        scope="",
+    ) -> None:
+        super().__init__("Link Quality", io, closable, flags, scope)
+        self.links = links
+
+        self.frame_times = np.zeros(self.FRAME_TIME_SAMPLES, dtype=np.float32)
+        self.frame_index = 0
+
+        self.jitter_labels = []
+        if links:
+            self.jitter_labels = [f"<{edge}" for edge in links[0].JITTER_EDGES_MS]
+            self.jitter_labels.append(">")
+
+    def draw_contents(self):
+        self.frame_times[self.frame_index] = self.io.delta_time * 1000
+        self.frame_index = (self.frame_index + 1) % self.FRAME_TIME_SAMPLES
+
+        imgui.text(
+            f"UI frame: {self.io.delta_time * 1000:.1f}ms "
+            f"(worst {self.frame_times.max():.1f}ms)"
+        )
+        sparkline(
+            "UI frame ms",
+            np.roll(self.frame_times, -self.frame_index),
+        )
+
+        for link in self.links:
+            self.draw_link(link)
+
+    def draw_link(self, link: LinkStats):
+        imgui.separator()
+        quiet = link.seconds_since_frame()
+        if link.lost is not None:
+            imgui.text(f"{link.name}: disconnected ({link.lost})")
+        elif quiet is None:
+            imgui.text(f"{link.name}: no data yet")
+        else:
+            imgui.text(f"{link.name}: last frame {quiet:.1f}s ago")
+
+        table_flags = imgui.TableFlags_.sizing_fixed_fit
+        with imgui_ctx.begin_table(f"##Link{link.name}", 3, table_flags) as table:
+            if not table:
+                return
+            imgui.table_setup_column("metric")
+            imgui.table_setup_column("now")
+            imgui.table_setup_column("history", imgui.TableColumnFlags_.width_stretch)
+
+            counters = [
+                ("bytes/s", link.bytes),
+                ("frames/s", link.frames),
+                ("decode fails", link.decode_failures),
+                ("dropouts", link.dropouts),
+            ]
+            # A 0 here would look healthy, so it's left out until something counts
+            if link.counts_sequence:
+                counters.insert(3, ("seq gaps", link.sequence_gaps))
+            for label, counter in counters:
+                imgui.table_next_row()
+                imgui.table_next_column()
+                imgui.text(label)
+                imgui.table_next_column()
+                imgui.text(f"{link.latest(counter):.0f}")
+                imgui.table_next_column()
+                sparkline(f"{link.name} {label}", link.history(counter))
+
+        imgui.text("Inter-arrival (ms)")
+        plot_flags = implot.Flags_.canvas_only
+        if implot.begin_plot(f"##{link.name}Jitter", (-1, 80), plot_flags):
+            implot.setup_axes(
+                "", "", implot.AxisFlags_.no_grid_lines, implot.AxisFlags_.auto_fit
+            )
+            implot.setup_axis_ticks(
+                implot.ImAxis_.x1,
+                0,
+                len(self.jitter_labels) - 1,
+                len(self.jitter_labels),
+                self.jitter_labels,
+            )
+            implot.plot_bars("count", link.jitter_histogram(), 0.8)
+            implot.end_plot()
@@ -0,0 +1,278 @@
+from __future__ import annotations
+from collections import deque
+import gc
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from imgui_bundle import imgui
+from imgui_bundle import imgui_ctx
+
+from .widgets import GUIWindow
+from .link_windows import sparkline
+
+
+class GCControl:
+    """
+    Keeps garbage collection pauses out of the middle of frames. Once startup is
+    done, ``enable()`` freezes everything alive (fonts, windows, textures, ...) so
+    the collector never walks it again, and pushes full (gen2) collections into
+    the idle time between frames instead of whenever the allocation counters say
+    so. Young generation collections still happen as usual, they're cheap.
+
+    Also keeps per-frame timing and allocation numbers for the MemoryWindow.
+    """
+
+    # gen1 collections before gen2 would run by itself, effectively never
+    DEFERRED_THRESHOLD_2 = 1_000_000
+    # Full collections at most this often
+    MIN_FULL_INTERVAL_S = 5.0
+    # If they never fit in the idle time, do one anyway after this long
+    MAX_FULL_INTERVAL_S = 60.0
+
+    HISTORY = 300
+    # How often the tracemalloc snapshots get compared
+    TRACE_INTERVAL_S = 1.0
+    TRACE_FRAMES = 1
+    TOP_SITES = 12
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.frozen = 0
+        self.default_threshold = gc.get_threshold()
+
+        self.collections = [0, 0, 0]
+        self.last_pause = [0.0, 0.0, 0.0]
+        self.max_pause = [0.0, 0.0, 0.0]
+        self.idle_collections = 0
+        self.forced_collections = 0
+        self.last_full = time.monotonic()
+        self._gc_started = 0.0
+
+        self.frame_times = np.zeros(self.HISTORY, dtype=np.float32)
+        self.frame_blocks = np.zeros(self.HISTORY, dtype=np.float32)
+        self.frame_index = 0
+        self.frame_started = time.perf_counter()
+        self.blocks_started = sys.getallocatedblocks()
+
+        self.tracing = False
+        self.snapshot = None
+        self.snapshot_time = 0.0
+        # (size diff, count diff, where) since the previous snapshot
+        self.top_sites: list[tuple[int, int, str]] = []
+        self.traced_per_frame: deque[int] = deque([], maxlen=self.HISTORY)
+        self._traced_started = 0
+
+        gc.callbacks.append(self._on_gc)
+
+    def _on_gc(self, phase: str, info: dict):
+        if phase == "start":
+            self._gc_started = time.perf_counter()
+            return
+
+        generation = info["generation"]
+        pause = time.perf_counter() - self._gc_started
+        self.collections[generation] += 1
+        self.last_pause[generation] = pause
+        self.max_pause[generation] = max(self.max_pause[generation], pause)
+        if generation == 2:
+            self.last_full = time.monotonic()
+
+    def enable(self):
+        """Call once startup is done and everything long-lived exists"""
+        if self.enabled:
+            return
+        gc.collect()
+        gc.freeze()
+        self.frozen = gc.get_freeze_count()
+
+        threshold_0, threshold_1, _ = self.default_threshold
+        gc.set_threshold(threshold_0, threshold_1, self.DEFERRED_THRESHOLD_2)
+        self.enabled = True
+
+    def disable(self):
+        if not self.enabled:
+            return
+        gc.set_threshold(*self.default_threshold)
+        gc.unfreeze()
+        self.frozen = 0
+        self.enabled = False
+
+    def begin_frame(self):
+        self.frame_started = time.perf_counter()
+        self.blocks_started = sys.getallocatedblocks()
+        if self.tracing:
+            self._traced_started = tracemalloc.get_traced_memory()[0]
+
+    def end_frame(self, idle_s: float):
+        """
+        Record the frame, then spend ``idle_s`` sleeping, with a full collection in
+        there if one is due and should fit.
+        """
+        now = time.perf_counter()
+        index = self.frame_index % self.HISTORY
+        self.frame_times[index] = now - self.frame_started
+        self.frame_blocks[index] = sys.getallocatedblocks() - self.blocks_started
+        self.frame_index += 1
+
+        if self.tracing:
+            self.traced_per_frame.append(
+                tracemalloc.get_traced_memory()[0] - self._traced_started
+            )
+            if time.monotonic() - self.snapshot_time > self.TRACE_INTERVAL_S:
+                self._compare_snapshots()
+
+        if self.enabled:
+            self._maybe_collect(idle_s)
+
+        time.sleep(max(0.0, idle_s - (time.perf_counter() - now)))
+
+    def _maybe_collect(self, idle_s: float):
+        # Counts gen1 collections since the last full one, 0 means nothing new
+        if gc.get_count()[2] == 0:
+            return
+
+        since_full = time.monotonic() - self.last_full
+        if since_full < self.MIN_FULL_INTERVAL_S:
+            return
+
+        # Frozen objects aren't scanned, so this is a decent guess for the next one
+        if self.last_pause[2] < idle_s:
+            self.idle_collections += 1
+        elif since_full > self.MAX_FULL_INTERVAL_S:
+            self.forced_collections += 1
+        else:
+            return
+        gc.collect(2)
+
+    def start_tracing(self):
+        if self.tracing:
+            return
+        tracemalloc.start(self.TRACE_FRAMES)
+        self.tracing = True
+        self.snapshot = self._take_snapshot()
+        self.snapshot_time = time.monotonic()
+
+    def stop_tracing(self):
+        if not self.tracing:
+            return
+        tracemalloc.stop()
+        self.tracing = False
+        self.snapshot = None
+        self.traced_per_frame.clear()
+
+    def _take_snapshot(self) -> tracemalloc.Snapshot:
+        # Leave out tracemalloc's own bookkeeping
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+
+    def _compare_snapshots(self):
+        snapshot = self._take_snapshot()
+        stats = snapshot.compare_to(self.snapshot, "lineno")
+        stats.sort(key=lambda stat: stat.count_diff, reverse=True)
+        self.top_sites = [
+            (stat.size_diff, stat.count_diff, str(stat.traceback[0]))
+            for stat in stats[: self.TOP_SITES]
+        ]
+        self.snapshot = snapshot
+        self.snapshot_time = time.monotonic()
+
+    def shutdown(self):
+        self.stop_tracing()
+        self.disable()
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+
+
+class MemoryWindow(GUIWindow):
+    """Frame times, GC pauses and where allocations come from (F12 to show)"""
+
+    def __init__(
+        self,
+        io: imgui._IO,
+        gc_control: GCControl,
+        closable: bool = True,
+        flags=None,
+        scope="",
+    ) -> None:
+        super().__init__("Memory", io, closable, flags, scope)
+        self.gc_control = gc_control
+        self.show = False
+
+    def draw_contents(self):
+        control = self.gc_control
+        frames = min(control.frame_index, control.HISTORY)
+        if frames:
+            times = control.frame_times[:frames]
+            blocks = control.frame_blocks[:frames]
+            imgui.text(
+                f"Frame: avg {times.mean() * 1000:.1f}ms, "
+                f"max {times.max() * 1000:.1f}ms"
+            )
+            imgui.text(f"Net blocks/frame: avg {blocks.mean():+.0f}")
+            # Oldest first
+            start = control.frame_index % control.HISTORY
+            ordered = (
+                np.roll(control.frame_times, -start)
+                if frames == control.HISTORY
+                else times
+            )
+            sparkline("frame_times", ordered, size=(-1, 40))
+
+        imgui.separator()
+        state = "deferred" if control.enabled else "default"
+        imgui.text(f"GC: {state}, {control.frozen} objects frozen")
+        imgui.text(f"Thresholds: {gc.get_threshold()}  Counts: {gc.get_count()}")
+
+        with imgui_ctx.begin_table("##GCPauses", 4) as table:
+            if table:
+                for heading in ("Gen", "Runs", "Last", "Max"):
+                    imgui.table_setup_column(heading)
+                imgui.table_headers_row()
+                for generation in range(3):
+                    imgui.table_next_row()
+                    imgui.table_next_column()
+                    imgui.text(str(generation))
+                    imgui.table_next_column()
+                    imgui.text(str(control.collections[generation]))
+                    imgui.table_next_column()
+                    imgui.text(f"{control.last_pause[generation] * 1000:.2f}ms")
+                    imgui.table_next_column()
+                    imgui.text(f"{control.max_pause[generation] * 1000:.2f}ms")
+
+        imgui.text(
+            f"Full collections between frames: {control.idle_collections}, "
+            f"forced: {control.forced_collections}"
+        )
+
+        imgui.separator()
+        tracing = imgui.checkbox("Trace allocations (slow)", control.tracing)[1]
+        if tracing != control.tracing:
+            if tracing:
+                control.start_tracing()
+            else:
+                control.stop_tracing()
+
+        if not control.tracing:
+            return
+
+        if control.traced_per_frame:
+            per_frame = sum(control.traced_per_frame) / len(control.traced_per_frame)
+            imgui.text(f"Traced bytes/frame: avg {per_frame:+.0f}")
+
+        flags = imgui.TableFlags_.row_bg | imgui.TableFlags_.resizable
+        with imgui_ctx.begin_table("##AllocationSites", 3, flags) as table:
+            if table:
+                for heading in ("Blocks", "Bytes", "Where"):
+                    imgui.table_setup_column(heading)
+                imgui.table_headers_row()
+                for size_diff, count_diff, where in control.top_sites:
+                    imgui.table_next_row()
+                    imgui.table_next_column()
+                    imgui.text(f"{count_diff:+d}")
+                    imgui.table_next_column()
+                    imgui.text(f"{size_diff:+d}")
+                    imgui.table_next_column()
+                    imgui.text(where)
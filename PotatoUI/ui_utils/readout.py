@@ -0,0 +1,109 @@
+from __future__ import annotations
+from typing import NamedTuple
+
+from imgui_bundle import imgui
+
+
+class Unit(NamedTuple):
+    suffix: str
+    scale: float = 1.0
+    offset: float = 0.0
+
+
+DISTANCE_UNITS = (Unit("m"), Unit("ft", 3.28084))
+SPEED_UNITS = (Unit("m/s"), Unit("ft/s", 3.28084))
+TEMPERATURE_UNITS = (Unit(" °C"), Unit(" °F", 1.8, 32.0))
+
+
+class Readout:
+    """
+    One telemetry value as text, only formatted again when the value or the unit
+    changes. Clicking it switches to the next unit, if there's more than one.
+    """
+
+    def __init__(
+        self, field: str, template: str, units: tuple[Unit, ...] = (Unit(""),)
+    ) -> None:
+        """
+        Args:
+            field (str): Attribute of the state object to show
+            template (str): Format string, gets the value (or each value of a
+                tuple) positionally and the unit suffix as ``unit``, like
+                ``"Altitude: {:.1f}{unit}"``
+            units (tuple[Unit, ...]): Units that can be switched between, the value
+                is in the first one
+        """
+        self.field = field
+        self.template = template
+        self.units = units
+        self.unit_index = 0
+
+        self.value = None
+        self.text = ""
+        self.dirty = True
+
+    @property
+    def unit(self) -> Unit:
+        return self.units[self.unit_index]
+
+    def set_unit(self, index: int):
+        if index != self.unit_index:
+            self.unit_index = index
+            self.dirty = True
+
+    def update(self, value) -> str:
+        if value != self.value or self.dirty:
+            self.value = value
+            self.dirty = False
+
+            unit = self.unit
+            values = value if isinstance(value, tuple) else (value,)
+            if unit.scale != 1.0 or unit.offset != 0.0:
+                values = [v * unit.scale + unit.offset for v in values]
+            self.text = self.template.format(*values, unit=unit.suffix)
+        return self.text
+
+    def draw(self) -> bool:
+        """Returns True if the unit got switched"""
+        imgui.text(self.text)
+        if len(self.units) > 1 and imgui.is_item_clicked():
+            self.set_unit((self.unit_index + 1) % len(self.units))
+            return True
+        return False
+
+
+class ReadoutPanel:
+    """
+    A group of Readouts on the same state object. If the state has a ``version``
+    that's bumped whenever it changes (or is a new object each update), frames
+    where nothing changed skip straight to drawing the cached text.
+    """
+
+    def __init__(self, readouts: list[Readout]) -> None:
+        self.readouts = readouts
+        self.state = None
+        self.version = None
+        self.stale = True
+
+    def set_unit(self, field: str, index: int):
+        for readout in self.readouts:
+            if readout.field == field:
+                readout.set_unit(index)
+        self.stale = True
+
+    def update(self, state):
+        version = getattr(state, "version", None)
+        if state is self.state and version == self.version and not self.stale:
+            return
+
+        self.state = state
+        self.version = version
+        self.stale = False
+        for readout in self.readouts:
+            readout.update(getattr(state, readout.field))
+
+    def draw(self, state):
+        self.update(state)
+        for readout in self.readouts:
+            if readout.draw():
+                self.stale = True
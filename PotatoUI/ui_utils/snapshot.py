@@ -0,0 +1,377 @@
+"""
+Crash-safe snapshots of everything an interface has on screen, so a relaunch with
+``--resume`` picks up where the crashed (or slept) one left off.
+
+Everything lives in one memory-mapped file, laid out once when snapshots are
+enabled: a table of named sections, each with a fixed amount of space. A
+background thread writes the sections that changed every ``INTERVAL_S``, the
+render loop never waits on it.
+"""
+
+from __future__ import annotations
+from typing import Any, Callable
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+import msgspec
+import numpy as np
+
+from .gpu_plot import GpuSeries
+
+FILE_HEADER = struct.Struct("<8sII")
+MAGIC = b"POTATOSS"
+FORMAT_VERSION = 1
+
+# name, offset, size
+TABLE_ENTRY = struct.Struct("<64sQQ")
+
+
+class StateSection:
+    """
+    Anything msgspec can encode, like a state struct and the console history.
+    ``get`` runs on the snapshot thread and ``set`` gets the decoded value back on
+    resume.
+
+    Written copy-on-write: there are two slots, a new snapshot always goes in the
+    older one, and its header (sequence number, length, CRC) goes last. A crash
+    halfway through leaves the other slot as it was, and restoring takes the newest
+    slot whose CRC checks out.
+    """
+
+    SLOT_HEADER = struct.Struct("<QII")
+
+    def __init__(
+        self,
+        name: str,
+        get: Callable[[], Any],
+        set: Callable[[Any], None],
+        type: Any = Any,
+        capacity: int = 256 * 1024,
+    ) -> None:
+        self.name = name
+        self.get = get
+        self.set = set
+        self.type = type
+        self.capacity = capacity
+        self.size = 2 * (self.SLOT_HEADER.size + capacity)
+
+        self.encoder = msgspec.msgpack.Encoder()
+        self.last_written = b""
+        self.seq = 0
+
+    def _slots(self, view: memoryview) -> list[memoryview]:
+        slot_size = self.SLOT_HEADER.size + self.capacity
+        return [view[:slot_size], view[slot_size:]]
+
+    def _read_slot(self, slot: memoryview) -> tuple[int, bytes | None]:
+        seq, length, crc = self.SLOT_HEADER.unpack_from(slot)
+        if not seq or length > self.capacity:
+            return 0, None
+        payload = bytes(slot[self.SLOT_HEADER.size : self.SLOT_HEADER.size + length])
+        if zlib.crc32(payload) != crc:
+            return 0, None
+        return seq, payload
+
+    def write(self, view: memoryview) -> bool:
+        payload = self.encoder.encode(self.get())
+        if payload == self.last_written:
+            return False
+        if len(payload) > self.capacity:
+            logging.error(f"Snapshot of {self.name} doesn't fit ({len(payload)} B)")
+            return False
+
+        self.seq += 1
+        slot = self._slots(view)[self.seq % 2]
+        slot[self.SLOT_HEADER.size : self.SLOT_HEADER.size + len(payload)] = payload
+        self.SLOT_HEADER.pack_into(slot, 0, self.seq, len(payload), zlib.crc32(payload))
+        self.last_written = payload
+        return True
+
+    def restore(self, view: memoryview) -> bool:
+        seq, payload = max(
+            (self._read_slot(slot) for slot in self._slots(view)),
+            key=lambda slot: slot[0],
+        )
+        if payload is None:
+            return False
+        self.set(msgspec.msgpack.decode(payload, type=self.type))
+        # Keep counting from here so the next write goes in the other slot
+        self.seq = seq
+        return True
+
+
+class RingSection:
+    """
+    A GpuSeries, written incrementally: only the samples added since the last write
+    get copied, into the same ring positions the series uses.
+
+    New samples can land on top of the oldest saved ones, so before copying them
+    the header says how many are on the way (``pending``), and restoring leaves out
+    any old samples that could have been half overwritten.
+    """
+
+    # written, pending, head, count
+    HEADER = struct.Struct("<QQQQ")
+
+    def __init__(self, name: str, series: GpuSeries) -> None:
+        self.name = name
+        self.series = series
+        self.size = self.HEADER.size + series.capacity * 2 * 4
+        self.saved = 0
+
+    def _data(self, view: memoryview) -> np.ndarray:
+        return np.frombuffer(view[self.HEADER.size :], dtype=np.float32).reshape(-1, 2)
+
+    def write(self, view: memoryview) -> bool:
+        series = self.series
+        capacity = series.capacity
+        with series.lock:
+            written, head, count = series.written, series.head, series.count
+            new = min(written - self.saved, capacity)
+            if not new:
+                return False
+            index = (head - new + np.arange(new)) % capacity
+            samples = series.data[index]
+
+        _, _, saved_head, saved_count = self.HEADER.unpack_from(view)
+        self.HEADER.pack_into(view, 0, self.saved, written, saved_head, saved_count)
+        self._data(view)[index] = samples
+        self.HEADER.pack_into(view, 0, written, written, head, count)
+        self.saved = written
+        return True
+
+    def restore(self, view: memoryview) -> bool:
+        written, pending, head, count = self.HEADER.unpack_from(view)
+        capacity = self.series.capacity
+        if not written or head >= capacity or count > capacity:
+            return False
+        # Whatever was being copied when it stopped may have clobbered the oldest
+        count = min(count, capacity - min(pending - written, capacity))
+        index = (head - count + np.arange(count)) % capacity
+        samples = self._data(view)[index]
+
+        self.series.clear()
+        self.series.append(samples[:, 0], samples[:, 1])
+        # Positions changed, so the next write copies everything again
+        self.saved = 0
+        return True
+
+
+class SessionSnapshot:
+    """
+    Keeps every added section saved in the file at ``path`` from a background
+    thread, see the module docstring.
+
+    Interfaces ``add()`` their sections while they're being built, before their
+    links deliver anything. With ``resume``, that's also when each section gets
+    back what the last session saved under the same name. Call ``start()`` once
+    every interface exists.
+    """
+
+    INTERVAL_S = 1.0
+
+    # The last session's file gets moved here instead of overwritten, in case
+    # whoever relaunched forgot --resume
+    PREVIOUS_SUFFIX = ".prev"
+
+    def __init__(self, path: str, resume: bool = False) -> None:
+        # Resuming from a kept file carries on in the file it was kept from, so
+        # suffixes don't pile up
+        self.resume_path = path if resume else None
+        if path.endswith(self.PREVIOUS_SUFFIX):
+            path = path[: -len(self.PREVIOUS_SUFFIX)]
+        self.path = path
+        self.sections: list[StateSection | RingSection] = []
+
+        # The last session's file, while there's still things to restore from it
+        self.saved: mmap.mmap | None = None
+        self.saved_view: memoryview | None = None
+        self.saved_table: dict[str, tuple[int, int]] = {}
+        self.restored = 0
+        self.restore_s = 0.0
+
+        self.file = None
+        self.map: mmap.mmap | None = None
+        self.views: dict[str, memoryview] = {}
+        self.layout: list[tuple[StateSection | RingSection, int]] = []
+
+        self.writes = 0
+        self.last_write_s = 0.0
+
+        self.running = False
+        self.snapshot_thread = threading.Thread(target=self.snapshot_loop, daemon=True)
+
+        if resume:
+            self._open_saved()
+
+    @staticmethod
+    def _read_table(buffer) -> dict[str, tuple[int, int]]:
+        table = {}
+        try:
+            magic, version, num_sections = FILE_HEADER.unpack_from(buffer)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                return {}
+            for index in range(num_sections):
+                name, offset, size = TABLE_ENTRY.unpack_from(
+                    buffer, FILE_HEADER.size + index * TABLE_ENTRY.size
+                )
+                table[name.rstrip(b"\0").decode()] = (offset, size)
+        except (struct.error, UnicodeDecodeError):
+            # Cut short, keep whatever sections made it
+            pass
+        return table
+
+    def _open_saved(self):
+        try:
+            with open(self.resume_path, "rb") as f:
+                self.saved = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Nothing to resume from {self.resume_path}: {e}")
+            return
+        self.saved_view = memoryview(self.saved)
+        self.saved_table = self._read_table(self.saved)
+
+    def _close_saved(self):
+        if self.saved is None:
+            return
+        self.saved_view.release()
+        self.saved.close()
+        self.saved = self.saved_view = None
+        logging.info(
+            f"Restored {self.restored} of {len(self.sections)} sections from "
+            f"{self.resume_path} in {self.restore_s * 1000:.1f} ms"
+        )
+
+    def add(self, sections: list[StateSection | RingSection]):
+        """Save these too, restoring them first when resuming"""
+        self.sections += sections
+        if self.saved is None:
+            return
+
+        start = time.perf_counter()
+        for section in sections:
+            offset, size = self.saved_table.get(section.name, (0, 0))
+            if size != section.size or offset + size > len(self.saved):
+                continue
+            try:
+                self.restored += section.restore(
+                    self.saved_view[offset : offset + size]
+                )
+            except (msgspec.DecodeError, struct.error) as e:
+                logging.error(f"Couldn't restore {section.name}: {e}")
+        self.restore_s += time.perf_counter() - start
+
+    def _create(self):
+        table_size = FILE_HEADER.size + len(self.sections) * TABLE_ENTRY.size
+        offset = table_size
+        layout = []
+        for section in self.sections:
+            # Keep every section 8 byte aligned for the numpy views
+            offset = (offset + 7) & ~7
+            layout.append((section, offset))
+            offset += section.size
+
+        # Filled in next to the old one and renamed over it, so there's always one
+        # complete file to resume from
+        temp_path = f"{self.path}.new"
+        with open(temp_path, "wb") as f:
+            f.truncate(offset)
+        self.layout = layout
+        self._map(temp_path)
+
+        FILE_HEADER.pack_into(self.map, 0, MAGIC, FORMAT_VERSION, len(self.sections))
+        for index, (section, section_offset) in enumerate(layout):
+            TABLE_ENTRY.pack_into(
+                self.map,
+                FILE_HEADER.size + index * TABLE_ENTRY.size,
+                section.name.encode()[:64],
+                section_offset,
+                section.size,
+            )
+        self.write()
+
+        # Windows won't rename a file that's mapped
+        self._unmap()
+        os.replace(temp_path, self.path)
+        self._map(self.path)
+
+    def _map(self, path: str):
+        self.file = open(path, "r+b")
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        view = memoryview(self.map)
+        self.views = {
+            section.name: view[offset : offset + section.size]
+            for section, offset in self.layout
+        }
+        view.release()
+
+    def _unmap(self):
+        for view in self.views.values():
+            view.release()
+        self.views = {}
+        self.map.close()
+        self.file.close()
+        self.map = None
+
+    def _keep_previous(self):
+        if not os.path.exists(self.path):
+            return
+        previous = self.path + self.PREVIOUS_SUFFIX
+        if self.resume_path == previous:
+            # That's what this session came from, it stays until the next launch
+            logging.warning(f"Resumed from {previous}, replacing {self.path}")
+            return
+        try:
+            os.replace(self.path, previous)
+        except OSError as e:
+            logging.error(f"Couldn't keep the last snapshot as {previous}: {e}")
+            return
+        logging.warning(
+            f"Last session's snapshot kept as {previous}, --resume --snapshot "
+            f"{previous} brings it back"
+        )
+
+    def start(self):
+        self._close_saved()
+        self._keep_previous()
+        self._create()
+        self.running = True
+        self.snapshot_thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.snapshot_thread.is_alive():
+            self.snapshot_thread.join()
+        self._close_saved()
+        if self.map is None:
+            return
+        # Last one on a clean exit
+        self.write()
+        self._unmap()
+
+    def write(self) -> int:
+        """Write every section that changed, returns how many did"""
+        start = time.perf_counter()
+        written = 0
+        for section in self.sections:
+            try:
+                written += section.write(self.views[section.name])
+            except Exception as e:
+                # One broken section shouldn't stop the rest from being saved
+                logging.error(f"Couldn't snapshot {section.name}: {e}")
+        if written:
+            self.map.flush()
+            self.writes += 1
+            self.last_write_s = time.perf_counter() - start
+        return written
+
+    def snapshot_loop(self):
+        while self.running:
+            time.sleep(self.INTERVAL_S)
+            if self.running:
+                self.write()
@@ -0,0 +1,208 @@
+from __future__ import annotations
+import hashlib
+import logging
+import os
+import pathlib
+
+import imgui_bundle
+import msgspec
+import numpy as np
+from imgui_bundle import imgui
+
+from .gui_style import read_style_file
+
+# What imgui loads when a font doesn't get any glyph ranges (Basic Latin + Latin-1)
+DEFAULT_GLYPH_RANGES = [0x0020, 0x00FF]
+
+CACHE_DIR = (
+    pathlib.Path(os.environ.get("XDG_CACHE_HOME", pathlib.Path.home() / ".cache"))
+    / "potatostation"
+)
+
+
+class FontSpec(msgspec.Struct, frozen=True):
+    path: str
+    size_pixels: float
+    glyph_ranges: list[int] | None = None
+
+
+class BakedFont(msgspec.Struct, array_like=True):
+    font_size: float
+    ascent: float
+    descent: float
+    # (codepoint, x0, y0, x1, y1, u0, v0, u1, v1, advance_x)
+    glyphs: list[
+        tuple[int, float, float, float, float, float, float, float, float, float]
+    ]
+
+
+class BakedFontAtlas(msgspec.Struct, array_like=True):
+    width: int
+    height: int
+    uv_scale: tuple[float, float]
+    uv_white_pixel: tuple[float, float]
+    fonts: list[BakedFont]
+    # Alpha only, the RGB of the font texture is always white anyway
+    alpha: bytes
+
+
+def add_fonts(atlas: imgui.ImFontAtlas, specs: list[FontSpec]) -> list[imgui.ImFont]:
+    fonts = []
+    for spec in specs:
+        kwargs = {}
+        if spec.glyph_ranges is not None:
+            kwargs["glyph_ranges_as_int_list"] = spec.glyph_ranges
+        fonts.append(
+            atlas.add_font_from_file_ttf(spec.path, spec.size_pixels, **kwargs)
+        )
+    return fonts
+
+
+def bake_fonts(
+    atlas: imgui.ImFontAtlas, specs: list[FontSpec], fonts: list[imgui.ImFont]
+) -> BakedFontAtlas:
+    """Build the atlas and grab everything restore_fonts needs to skip doing it again"""
+    pixels: np.ndarray = atlas.get_tex_data_as_rgba32()
+
+    baked = []
+    for spec, font in zip(specs, fonts):
+        ranges = spec.glyph_ranges or DEFAULT_GLYPH_RANGES
+        glyphs = []
+        for start, end in zip(ranges[::2], ranges[1::2]):
+            for codepoint in range(start, end + 1):
+                glyph = font.find_glyph_no_fallback(codepoint)
+                if glyph is None:
+                    continue
+                glyphs.append(
+                    (
+                        codepoint,
+                        glyph.x0,
+                        glyph.y0,
+                        glyph.x1,
+                        glyph.y1,
+                        glyph.u0,
+                        glyph.v0,
+                        glyph.u1,
+                        glyph.v1,
+                        glyph.advance_x,
+                    )
+                )
+        baked.append(BakedFont(font.font_size, font.ascent, font.descent, glyphs))
+
+    return BakedFontAtlas(
+        atlas.tex_width,
+        atlas.tex_height,
+        tuple(atlas.tex_uv_scale),
+        tuple(atlas.tex_uv_white_pixel),
+        baked,
+        np.ascontiguousarray(pixels[:, :, 3]).tobytes(),
+    )
+
+
+def restore_fonts(
+    atlas: imgui.ImFontAtlas, specs: list[FontSpec], baked: BakedFontAtlas
+) -> list[imgui.ImFont]:
+    """
+    Set the atlas up as if it had been built, from a bake_fonts result. The font
+    files still get read (imgui wants them around), but nothing gets rasterized.
+    """
+    fonts = add_fonts(atlas, specs)
+    for font, baked_font in zip(fonts, baked.fonts):
+        # Normally done while building the atlas
+        font.font_size = baked_font.font_size
+        font.ascent = baked_font.ascent
+        font.descent = baked_font.descent
+        font.container_atlas = atlas
+        for glyph in baked_font.glyphs:
+            # The stored values already have the font config's spacing/snapping applied
+            font.add_glyph(None, *glyph)
+        font.build_lookup_table()
+
+    atlas.tex_width = baked.width
+    atlas.tex_height = baked.height
+    atlas.tex_uv_scale = imgui.ImVec2(*baked.uv_scale)
+    atlas.tex_uv_white_pixel = imgui.ImVec2(*baked.uv_white_pixel)
+    atlas.tex_ready = True
+    return fonts
+
+
+class StartupCache:
+    """
+    Keeps the baked font atlas and parsed style on disk between launches, so
+    startup doesn't have to rasterize every font again. Entries are keyed by a hash
+    of the input files and settings, so changing a font, size, scale or the style
+    file just makes a new entry.
+
+    Anything going wrong with the cache falls back to doing things the slow way.
+    """
+
+    VERSION = 1
+
+    def __init__(self, directory: pathlib.Path | None = None) -> None:
+        self.directory = directory if directory is not None else CACHE_DIR
+        self.hits = 0
+        self.misses = 0
+
+    def _hash(self, *parts: bytes | str) -> str:
+        digest = hashlib.sha256()
+        for part in (str(self.VERSION), imgui_bundle.__version__, *parts):
+            if isinstance(part, str):
+                part = part.encode()
+            digest.update(len(part).to_bytes(8, "little"))
+            digest.update(part)
+        return digest.hexdigest()[:24]
+
+    def _read(self, name: str, type_):
+        path = self.directory / name
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except OSError as e:
+            logging.warning(f"Could not read startup cache {path}: {e}")
+            self.misses += 1
+            return None
+
+        try:
+            value = msgspec.msgpack.decode(data, type=type_)
+        except msgspec.DecodeError as e:
+            logging.warning(f"Ignoring broken startup cache {path}: {e}")
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return value
+
+    def _write(self, name: str, value):
+        path = self.directory / name
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Write then rename so a crash can't leave half a file behind
+            temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            temp_path.write_bytes(msgspec.msgpack.encode(value))
+            os.replace(temp_path, path)
+        except OSError as e:
+            logging.warning(f"Could not write startup cache {path}: {e}")
+
+    def font_key(self, specs: list[FontSpec]) -> str:
+        parts = []
+        for spec in specs:
+            parts.append(pathlib.Path(spec.path).read_bytes())
+            parts.append(msgspec.msgpack.encode(spec))
+        return self._hash(*parts)
+
+    def load_fonts(self, key: str) -> BakedFontAtlas | None:
+        return self._read(f"fonts-{key}.msgpack", BakedFontAtlas)
+
+    def save_fonts(self, key: str, baked: BakedFontAtlas):
+        self._write(f"fonts-{key}.msgpack", baked)
+
+    def style(self, path: str) -> dict:
+        """Parsed style file (see gui_style.read_style_file), from the cache if possible"""
+        name = f"style-{self._hash(pathlib.Path(path).read_bytes())}.msgpack"
+        data = self._read(name, dict)
+        if data is None:
+            data = read_style_file(path)
+            self._write(name, data)
+        return data
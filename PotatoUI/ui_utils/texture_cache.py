@@ -0,0 +1,376 @@
+from __future__ import annotations
+from PIL import Image, ImageSequence, UnidentifiedImageError
+from OpenGL import GL as gl
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import pathlib
+import threading
+import numpy as np
+
+from .atlas import AtlasRegion, TextureAtlas
+
+
+def get_rgba_pixels(image: Image.Image):
+    if image.mode == "RGB":
+        return image.tobytes("raw", "RGBX")
+    else:
+        if image.mode != "RGBA":
+            image = image.convert("RGBA")
+        return image.tobytes("raw", "RGBA")
+
+
+class TextureEntry:
+    """
+    One decoded image file, shared by every ImageHelper showing that file. All of
+    its frames get packed into an atlas, so animating is just a UV change.
+    """
+
+    def __init__(
+        self,
+        path: pathlib.Path,
+        key: tuple[str, int],
+        shared_atlas: TextureAtlas | None = None,
+    ) -> None:
+        self.path = path
+        self.key = key
+
+        self.width = 1
+        self.height = 1
+        self.queued = False
+        self.loaded = False
+        self.applied = False
+        self.invalid = False
+        self.evicted = False
+        self.animated = False
+
+        self.frames: list[bytes] = []
+        self.durations: list[float] = []
+        self.upload_index = 0
+        self.upload_row = 0
+
+        # Small still images go in here instead of getting their own texture
+        self.shared_atlas = shared_atlas
+        self.atlas: TextureAtlas | None = None
+        self.regions: list[AtlasRegion] = []
+
+        # Number of ImageHelpers using this, only unused entries can be evicted
+        self.refs = 0
+
+    def reload(self):
+        """Decode the file into RGBA frames, runs on the loader pool"""
+        try:
+            image = Image.open(self.path)
+        except UnidentifiedImageError:
+            self.invalid = True
+            self.loaded = True
+            return
+
+        width, height = image.size
+        for frame in ImageSequence.Iterator(image):
+            self.frames.append(get_rgba_pixels(frame))
+            if (duration := frame.info.get("duration", 0)) < 1:
+                duration = 100
+            self.durations.append(duration / 1250)
+            # Technically this should be / 1000 (millis to seconds) but I found that 1250 works better...
+        self.animated = len(self.durations) > 1
+
+        image.close()
+        self.width, self.height = width, height
+        self.loaded = True
+
+    def pack(self):
+        """Reserve atlas space for every frame and create the page textures"""
+        if (
+            self.shared_atlas is not None
+            and not self.animated
+            and self.width <= TextureCache.SHARED_MAX_SIZE
+            and self.height <= TextureCache.SHARED_MAX_SIZE
+        ):
+            self.atlas = self.shared_atlas
+        else:
+            self.atlas = TextureAtlas.for_frames(
+                self.width, self.height, len(self.frames)
+            )
+        self.regions = [
+            self.atlas.reserve(self.width, self.height) for _ in self.frames
+        ]
+        self.atlas.allocate()
+
+    def upload_frames(self, budget: int | None) -> int:
+        """
+        Upload decoded frames into the atlas, stopping once ``budget`` bytes have
+        been sent. Frames bigger than the budget go up a strip of rows at a time. Call
+        again next frame to continue, ``applied`` is set once every frame is on the
+        GPU.
+
+        Returns:
+            int: Bytes uploaded
+        """
+        if self.invalid or self.evicted:
+            self.applied = True
+            return 0
+
+        if self.atlas is None:
+            self.pack()
+
+        row_bytes = self.width * 4
+        used = 0
+        while self.upload_index < len(self.frames):
+            rows_left = self.height - self.upload_row
+            if budget is None:
+                rows = rows_left
+            else:
+                rows = min(rows_left, (budget - used) // row_bytes)
+                if rows <= 0:
+                    if used:
+                        break
+                    # Always make some progress, even on a tiny budget
+                    rows = 1
+
+            start = self.upload_row * row_bytes
+            pixels = np.frombuffer(self.frames[self.upload_index], dtype=np.uint8)
+            self.atlas.upload(
+                self.regions[self.upload_index],
+                pixels[start : start + rows * row_bytes],
+                self.upload_row,
+                rows,
+            )
+            used += rows * row_bytes
+
+            self.upload_row += rows
+            if self.upload_row == self.height:
+                self.upload_row = 0
+                self.upload_index += 1
+
+        if self.upload_index == len(self.frames):
+            self.frames.clear()
+            self.applied = True
+
+        return used
+
+    def texture_id(self, frame: int) -> int:
+        return self.atlas.textures[self.regions[frame].page]
+
+    @property
+    def texture_ids(self) -> list[int]:
+        """Texture of each frame, most of the time these are all the same one"""
+        if self.atlas is None:
+            return []
+        return [self.atlas.textures[region.page] for region in self.regions]
+
+    @property
+    def shared(self) -> bool:
+        return self.atlas is not None and self.atlas is self.shared_atlas
+
+    @property
+    def resident_bytes(self) -> int:
+        # Shared pages are counted by the cache
+        if self.atlas is None or self.shared:
+            return 0
+        return self.atlas.resident_bytes
+
+    def delete(self):
+        """Free the textures, GL thread only"""
+        if self.atlas is not None and not self.shared:
+            self.atlas.delete()
+        self.frames.clear()
+        self.evicted = True
+
+
+class ImageLoader:
+    """
+    Decodes images on a small thread pool, then uploads them to the GPU a few frames
+    at a time from the render thread so a big logo or a long GIF can't stall a frame.
+
+    ``upload_pending()`` has to be called once per frame with the GL context current
+    (GLFWImguiWrapper does this before drawing).
+    """
+
+    WORKERS = 2
+
+    # Rough cap on texture data sent to the GPU per rendered frame
+    UPLOAD_BUDGET_BYTES = 4 * 1024 * 1024
+
+    def __init__(
+        self, workers: int = WORKERS, upload_budget: int = UPLOAD_BUDGET_BYTES
+    ) -> None:
+        self.workers = workers
+        self.upload_budget = upload_budget
+        self.pool: ThreadPoolExecutor | None = None
+
+        # Decoded images waiting for upload, filled from the pool threads
+        self.ready: deque[TextureEntry] = deque()
+
+    def load(self, image: TextureEntry):
+        if self.pool is None:
+            self.pool = ThreadPoolExecutor(
+                self.workers, thread_name_prefix="ImageLoader"
+            )
+        self.pool.submit(self._decode, image)
+
+    def _decode(self, image: TextureEntry):
+        try:
+            image.reload()
+        except Exception as e:
+            logging.error(f"Could not load image {image.path}: {e}")
+            image.invalid = True
+            image.loaded = True
+        self.ready.append(image)
+
+    def upload_pending(self):
+        budget = self.upload_budget
+        while self.ready and budget > 0:
+            image = self.ready[0]
+            budget -= image.upload_frames(budget)
+            if image.applied:
+                self.ready.popleft()
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+
+image_loader = ImageLoader()
+
+
+class TextureCache:
+    """
+    Process-wide cache of image textures, keyed by file path and modification time
+    so the same file is only decoded and uploaded once no matter how many widgets
+    show it (and an edited file gets picked up as a new entry).
+
+    Entries are reference counted. Once the textures on the GPU go over
+    ``budget_bytes``, unused entries are freed oldest first. Entries still in use
+    are never evicted, even if that means going over budget.
+
+    Still images up to ``SHARED_MAX_SIZE`` pixels on a side are packed together into
+    one shared atlas instead of getting a texture each. Space in there is never
+    reclaimed, so those entries stay cached for the whole session.
+    """
+
+    BUDGET_BYTES = 64 * 1024 * 1024
+
+    SHARED_MAX_SIZE = 128
+    SHARED_PAGE_SIZE = 1024
+
+    def __init__(self, loader: ImageLoader, budget_bytes: int = BUDGET_BYTES) -> None:
+        self.loader = loader
+        self.budget_bytes = budget_bytes
+        self.shared_atlas = TextureAtlas(
+            self.SHARED_PAGE_SIZE, self.SHARED_PAGE_SIZE, padding=1
+        )
+
+        # Least recently released first
+        self.entries: OrderedDict[tuple[str, int], TextureEntry] = OrderedDict()
+        self.lock = threading.Lock()
+        # Released entries waiting for the GL thread to drop their refs. A deque so
+        # release() never takes the lock: it runs from __del__, which a GC pass can
+        # call on a thread that's already holding it.
+        self.released: deque[TextureEntry] = deque()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def acquire(self, path: pathlib.Path) -> TextureEntry:
+        """
+        Get the entry for a file, starting to load it if it isn't cached. Every
+        acquire needs a matching release.
+
+        Raises:
+            OSError: If the file can't be stat'ed
+        """
+        stat = path.stat()
+        key = (str(path.resolve()), stat.st_mtime_ns)
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                self.entries.move_to_end(key)
+            else:
+                self.misses += 1
+                entry = TextureEntry(path, key, self.shared_atlas)
+                self.entries[key] = entry
+            entry.refs += 1
+            load = not entry.queued
+            entry.queued = True
+
+        if load:
+            self.loader.load(entry)
+        return entry
+
+    def release(self, entry: TextureEntry):
+        # No GL calls or locks in here, it can run from __del__ on any thread
+        self.released.append(entry)
+
+    def _drain_released(self):
+        with self.lock:
+            while self.released:
+                entry = self.released.popleft()
+                entry.refs -= 1
+                if entry.refs == 0 and entry.key in self.entries:
+                    self.entries.move_to_end(entry.key)
+
+    def trim(self):
+        """
+        Drop the refs of released entries, then evict unused ones until under
+        budget. GL thread only.
+        """
+        self._drain_released()
+        resident = self.bytes_resident
+        if resident <= self.budget_bytes:
+            return
+
+        with self.lock:
+            unused = [
+                entry
+                for entry in self.entries.values()
+                if entry.refs == 0
+                and (entry.applied or entry.invalid)
+                and not entry.shared
+            ]
+            evicted = []
+            for entry in unused:
+                if resident <= self.budget_bytes:
+                    break
+                del self.entries[entry.key]
+                resident -= entry.resident_bytes
+                evicted.append(entry)
+
+        for entry in evicted:
+            entry.delete()
+            self.evictions += 1
+
+    @property
+    def bytes_resident(self) -> int:
+        with self.lock:
+            entries = sum(entry.resident_bytes for entry in self.entries.values())
+        return entries + self.shared_atlas.resident_bytes
+
+    @property
+    def texture_count(self) -> int:
+        with self.lock:
+            own = sum(
+                len(entry.atlas.textures)
+                for entry in self.entries.values()
+                if entry.atlas is not None and not entry.shared
+            )
+        return own + len(self.shared_atlas.textures)
+
+    def stats(self) -> dict[str, int]:
+        """Counters for debugging/profiling windows"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "textures": self.texture_count,
+            "bytes_resident": self.bytes_resident,
+            "budget_bytes": self.budget_bytes,
+        }
+
+
+texture_cache = TextureCache(image_loader)
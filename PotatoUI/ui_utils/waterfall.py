@@ -0,0 +1,250 @@
+from __future__ import annotations
+from collections import deque
+import queue
+import threading
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from OpenGL import GL as gl
+from imgui_bundle import imgui, implot
+
+# Control points for the waterfall colors, quiet to loud
+COLORMAP_POINTS = np.array(
+    [
+        (0, 0, 4, 255),
+        (40, 11, 84, 255),
+        (101, 21, 110, 255),
+        (159, 42, 99, 255),
+        (212, 72, 66, 255),
+        (245, 125, 21, 255),
+        (250, 193, 39, 255),
+        (252, 255, 164, 255),
+    ],
+    dtype=np.float32,
+)
+
+
+def make_colormap(size: int = 256) -> np.ndarray:
+    """(size, 4) RGBA lookup table interpolated from COLORMAP_POINTS"""
+    stops = np.linspace(0, 1, len(COLORMAP_POINTS))
+    positions = np.linspace(0, 1, size)
+    channels = [np.interp(positions, stops, COLORMAP_POINTS[:, i]) for i in range(4)]
+    return np.stack(channels, axis=1).astype(np.uint8)
+
+
+class StreamingFFT:
+    """
+    Turns a multi-axis sample stream into spectrum columns for a waterfall. Samples
+    are cut into overlapping Hann windows, every window that's ready gets
+    transformed in one vectorised rfft, and the power of all axes is summed (so
+    vibration shows up whichever way the sensor is mounted).
+
+    The FFTs run on their own thread, ``push`` only queues the samples so it's fine
+    to call from the UI or ingest threads. Finished columns are already colored and
+    wait in ``columns`` for the UI to upload.
+    """
+
+    def __init__(
+        self,
+        window_size: int = 256,
+        overlap: float = 0.75,
+        max_columns: int = 512,
+        dynamic_range_db: float = 60.0,
+    ) -> None:
+        self.window_size = window_size
+        self.hop = max(1, int(window_size * (1 - overlap)))
+        self.dynamic_range_db = dynamic_range_db
+        self.bins = window_size // 2 + 1
+
+        self.taper = np.hanning(window_size).astype(np.float32)
+        self.colormap = make_colormap()
+
+        # Samples left over from the last batch that still belong to a future window
+        self.tail_times = np.zeros(0, dtype=np.float64)
+        self.tail = None
+
+        # Loudest recent power, the colors are scaled down from this
+        self.peak_db = None
+        self.sample_rate = 0.0
+        self.total_columns = 0
+
+        self.columns: deque[np.ndarray] = deque([], maxlen=max_columns)
+        self.incoming: queue.Queue[tuple[np.ndarray, np.ndarray]] = queue.Queue()
+
+        self.running = False
+        self.fft_thread = threading.Thread(target=self.fft_loop, daemon=True)
+
+    def start(self):
+        self.running = True
+        self.fft_thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.fft_thread.is_alive():
+            self.fft_thread.join()
+
+    def push(self, times: np.ndarray, samples: np.ndarray):
+        """
+        Args:
+            times (np.ndarray): Timestamp of each sample in seconds
+            samples (np.ndarray): (samples, axes) values
+        """
+        self.incoming.put(
+            (
+                np.asarray(times, dtype=np.float64),
+                np.asarray(samples, dtype=np.float32),
+            )
+        )
+
+    def fft_loop(self):
+        while self.running:
+            try:
+                batches = [self.incoming.get(timeout=0.05)]
+            except queue.Empty:
+                continue
+
+            # Everything that piled up goes through in one go
+            while True:
+                try:
+                    batches.append(self.incoming.get_nowait())
+                except queue.Empty:
+                    break
+            self.process(batches)
+
+    def process(self, batches: list[tuple[np.ndarray, np.ndarray]]):
+        times = np.concatenate([self.tail_times] + [batch[0] for batch in batches])
+        parts = [batch[1] for batch in batches]
+        if self.tail is not None:
+            parts.insert(0, self.tail)
+        samples = np.concatenate(parts)
+
+        count = (len(samples) - self.window_size) // self.hop + 1
+        if count <= 0:
+            self.tail_times, self.tail = times, samples
+            return
+
+        span = times[self.window_size - 1] - times[0]
+        if span > 0:
+            self.sample_rate = (self.window_size - 1) / span
+
+        # (windows, axes, window_size) views, nothing gets copied until the taper
+        windows = sliding_window_view(samples, self.window_size, axis=0)
+        windows = windows[: count * self.hop : self.hop]
+        # Take out the mean first, otherwise gravity swamps the low bins
+        windows = windows - windows.mean(axis=-1, keepdims=True)
+        spectra = np.fft.rfft(windows * self.taper, axis=-1)
+        power = (spectra.real**2 + spectra.imag**2).sum(axis=1)
+        power_db = 10 * np.log10(power + 1e-12)
+
+        loudest = float(power_db.max())
+        if self.peak_db is None or loudest > self.peak_db:
+            self.peak_db = loudest
+        else:
+            # Let the scale come back down slowly after a loud bit
+            self.peak_db = max(loudest, self.peak_db - 0.05 * count)
+
+        floor_db = self.peak_db - self.dynamic_range_db
+        levels = (power_db - floor_db) / self.dynamic_range_db
+        indices = (np.clip(levels, 0, 1) * (len(self.colormap) - 1)).astype(np.intp)
+        self.columns.extend(self.colormap[indices])
+        self.total_columns += count
+
+        used = count * self.hop
+        self.tail_times, self.tail = times[used:], samples[used:]
+
+
+class Waterfall:
+    """
+    Scrolling spectrogram of a StreamingFFT, newest column on the right. The texture
+    is a ring of columns: each new spectrum is uploaded into one column and the
+    image is drawn with shifted UVs (wrapping), so nothing else gets touched.
+    """
+
+    # Most columns uploaded per frame, more wait for the next one
+    UPLOAD_BUDGET = 64
+
+    def __init__(self, label: str, fft: StreamingFFT, size=(-1, 250)) -> None:
+        self.label = label
+        self.fft = fft
+        self.size = size
+        self.width = fft.columns.maxlen
+
+        self.texture = None
+        self.written = 0
+
+    def _create_texture(self):
+        self.texture = gl.glGenTextures(1)
+        gl.glBindTexture(gl.GL_TEXTURE_2D, self.texture)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_NEAREST)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER, gl.GL_NEAREST)
+        # The ring wraps around horizontally
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_S, gl.GL_REPEAT)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_T, gl.GL_CLAMP_TO_EDGE)
+        gl.glTexImage2D(
+            gl.GL_TEXTURE_2D,
+            0,
+            gl.GL_RGBA,
+            self.width,
+            self.fft.bins,
+            0,
+            gl.GL_RGBA,
+            gl.GL_UNSIGNED_BYTE,
+            bytes(self.width * self.fft.bins * 4),
+        )
+
+    def upload_pending(self):
+        if self.texture is None:
+            self._create_texture()
+
+        gl.glBindTexture(gl.GL_TEXTURE_2D, self.texture)
+        for _ in range(self.UPLOAD_BUDGET):
+            try:
+                column = self.fft.columns.popleft()
+            except IndexError:
+                break
+            gl.glTexSubImage2D(
+                gl.GL_TEXTURE_2D,
+                0,
+                self.written % self.width,
+                0,
+                1,
+                self.fft.bins,
+                gl.GL_RGBA,
+                gl.GL_UNSIGNED_BYTE,
+                column,
+            )
+            self.written += 1
+
+    def draw(self):
+        self.upload_pending()
+
+        rate = self.fft.sample_rate
+        # Without a rate yet, just go by columns and bins
+        seconds = self.width * self.fft.hop / rate if rate else self.width
+        nyquist = rate / 2 if rate else self.fft.bins
+
+        if not implot.begin_plot(self.label, self.size):
+            return
+
+        implot.setup_axes(
+            "Seconds ago" if rate else "",
+            "Frequency (Hz)" if rate else "",
+        )
+        implot.setup_axes_limits(-seconds, 0, 0, nyquist, implot.Cond_.always)
+
+        # Oldest column is where the next one gets written, rows go up in frequency
+        start = (self.written % self.width) / self.width
+        implot.plot_image(
+            "##spectrum",
+            self.texture,
+            implot.Point(-seconds, 0),
+            implot.Point(0, nyquist),
+            (start, 1),
+            (start + 1, 0),
+        )
+        implot.end_plot()
+
+    def delete(self):
+        if self.texture is not None:
+            gl.glDeleteTextures([self.texture])
+            self.texture = None
@@ -55,6 +55,10 @@ class ImageWidget:
     def set_rounding(self, rounding):
         self.rounding = rounding
 
+    def release(self):
+        # Let the texture cache free the image once nothing else is using it
+        self.image.release()
+
     def draw(self):
         scaled_width = self.image.width * self.scale[0]
         scaled_height = self.image.height * self.scale[1]
@@ -133,10 +137,13 @@ class BackgroundImage(ImageWidget):
 
 class GUIWindow:
     def __init__(
-        self, name: str, io: imgui.IO, closable: bool = True, flags=None
+        self, name: str, io: imgui.IO, closable: bool = True, flags=None, scope=""
     ) -> None:
         super().__init__()
-        self.name = name
+        self.title = name
+
+        # Keep the title the same but give the window its own ID per workspace
+        self.name = f"{name}###{scope}/{name}" if scope else name
         self.closable = closable
         self.io = io
 
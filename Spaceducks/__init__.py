@@ -1 +1,10 @@
-from .interface import SpaceduckInterface
+# The interface pulls in the whole GUI stack, so it's only imported when asked for.
+# That keeps the protocol cheap to import early in startup and in ingest workers.
+
+
+def __getattr__(name):
+    if name == "SpaceduckInterface":
+        from .interface import SpaceduckInterface
+
+        return SpaceduckInterface
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
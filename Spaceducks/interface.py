@@ -1,17 +1,39 @@
+from __future__ import annotations
 from collections import deque
 from threading import Thread
 import time
 
 import msgspec
+import numpy as np
 import serial
 from imgui_bundle import imgui, implot, imgui_ctx
-from PotatoUI import MainInterface
+from PotatoUI import MainInterface, UplinkWindow, LinkQualityWindow
+from PotatoUI import AlarmBanner, AlarmWindow
+from PotatoUI import RingSection, SessionSnapshot, StateSection
+from PotatoLink import UplinkScheduler, UplinkCommand, Priority, LinkStats
+from PotatoLink import WRITE_TIMEOUT_S, write_all
+from PotatoLink import IngestEngine, SerialLink, ProcessIngestEngine, WorkerLink
+from PotatoLink import AlarmEngine, EarlyLinks
+from PotatoLink import AltitudeCallout, CalloutService, alarm_listener
+from PotatoLink.workers import KIND_COL, TIME_COL, VALUES_COL
 
 from . import windows
+from . import protocol
 from .shared.state import MESSAGE_TYPES, SensorState, FlightStats, Message
 from .shared.xbee_interface import XbeeInterface
 
 
+class SpaceducksSnapshot(msgspec.Struct):
+    """Everything ``--resume`` brings back, besides the history and plots"""
+
+    start_time: float
+    heartbeat: float
+    state: SensorState
+    stats: FlightStats
+    serial_text: list[str]
+    message_text: list[str]
+
+
 class SpaceduckInterface(MainInterface):
 
     MESSAGE_STORE_CAP = 100
@@ -28,61 +50,238 @@ class SpaceduckInterface(MainInterface):
         font_path=None,
         font_size=14,
         scaling_factor=1,
+        ingest: IngestEngine | ProcessIngestEngine | None = None,
+        ingest_workers=False,
+        early: EarlyLinks | None = None,
+        snapshot: SessionSnapshot | None = None,
+        alarms: AlarmEngine | None = None,
+        callouts: CalloutService | None = None,
         **kwargs,
     ):
         """
         this is all probably over-complicated tbh
+
+        Pass in an ``ingest`` engine to share one reader thread with other
+        interfaces, otherwise this makes its own. With ``ingest_workers`` the one it
+        makes reads and decodes the port in a separate process.
+
+        If the port is in ``early`` it was opened before the GUI (staged startup),
+        it's taken over along with its ingest engine and whatever it recorded.
+
+        State and the full-rate history get saved to ``snapshot`` (and restored
+        from it first, if it's resuming).
+
+        Alarms from ``alarms`` on the port get flashed on screen and written to the
+        message console.
+
+        Flight stats, altitude and alarms get read out loud through ``callouts``.
         """
 
+        self.init_data(name, serial_port_1, early, alarms, callouts)
+
+        super().__init__(
+            name, width, height, font_path, font_size, scaling_factor, **kwargs
+        )
+
+        if alarms is not None:
+            alarms.on_event(alarm_listener(self.ports, self.alarm_message, callouts))
+
+        # Before connecting, so anything replayed from early links lands on top
+        if snapshot is not None:
+            snapshot.add(self.snapshot_sections())
+
+        self.owns_ingest = ingest is None
+        if ingest is None and early is not None:
+            ingest = early.ingest
+        elif ingest is None:
+            ingest = ProcessIngestEngine() if ingest_workers else IngestEngine()
+        self.ingest = ingest
+
+        if early is not None and serial_port_1 in early:
+            # Already open and recording, catch up on what arrived during startup
+            if self.ingest.out_of_process:
+                self.xbee = None
+                self.worker_link = early.conn(serial_port_1)
+                early.attach(
+                    serial_port_1, on_rows=self.handle_rows, on_text=self.handle_text
+                )
+            else:
+                self.xbee = XbeeInterface(
+                    early.conn(serial_port_1), self.receive_data, self.link_stats
+                )
+                early.attach(serial_port_1, on_frame=self.xbee.process_data)
+        elif self.ingest.out_of_process:
+            # The port is opened in the worker process, writes are forwarded to it
+            self.xbee = None
+            self.worker_link = WorkerLink(
+                serial_port_1,
+                baudrate,
+                protocol.decode_frame,
+                self.handle_rows,
+                self.handle_text,
+                self.link_stats,
+                num_values=protocol.NUM_VALUES,
+            )
+            self.ingest.add_link(self.worker_link)
+        else:
+            # Make the serial connections. The xbee's own receive thread isn't
+            # started, the ingest engine reads the port and hands frames to it for
+            # decoding.
+            conn = serial.Serial(
+                serial_port_1,
+                baudrate,
+                timeout=self.SERIAL_TIMEOUT_S,
+                write_timeout=WRITE_TIMEOUT_S,
+            )
+            self.xbee = XbeeInterface(conn, self.receive_data, self.link_stats)
+            self.ingest.add_link(
+                SerialLink(
+                    serial_port_1,
+                    self.xbee.xbee,
+                    self.xbee.process_data,
+                    self.link_stats,
+                )
+            )
+
+        if self.owns_ingest and not self.ingest.running:
+            self.ingest.start()
+        self.uplink.start()
+
+    def init_data(
+        self,
+        name: str,
+        serial_port_1: str,
+        early: EarlyLinks | None = None,
+        alarms: AlarmEngine | None = None,
+        callouts: CalloutService | None = None,
+    ):
+        """
+        Everything the data handling needs, without the GUI or opening any ports.
+        Same as KrakenInterface.init_data(), the benchmarks build interfaces with
+        just this.
+        """
         # Set up data storage
         self.state = SensorState()
         self.stats = FlightStats()
         self.heartbeat: float = 0.0
         self.start_time = time.time()
         self.current_time = 0.0
+        # Ingest workers timestamp rows with the monotonic clock
+        self.start_monotonic = time.monotonic()
 
-        super().__init__(
-            name, width, height, font_path, font_size, scaling_factor, **kwargs
+        self.alarms = alarms
+        self.ports = [serial_port_1]
+        self.callouts = callouts
+        self.altitude_callout = (
+            AltitudeCallout(callouts, f"{name}/altitude")
+            if callouts is not None
+            else None
         )
 
-        self.plot_context = implot.create_context()
+        # Commands get written from here instead of the UI thread
+        self.uplink = UplinkScheduler(self.write_serial, self.uplink_status)
+        self.link_stats = (
+            early.stats(serial_port_1)
+            if early is not None
+            else LinkStats(serial_port_1)
+        )
 
         # Cool deque to store previously-received data for serial monitor
         self.serial_text = deque([], maxlen=self.MESSAGE_STORE_CAP)
         self.message_text = deque([], maxlen=self.MESSAGE_STORE_CAP)
         self.read_serial = True
 
-        # Make the serial connections
-        self.xbee = XbeeInterface(serial_port_1, self.process_data)
-
         self.decoder = msgspec.msgpack.Decoder(MESSAGE_TYPES)
         self.encoder = msgspec.msgpack.Encoder()
 
-        self.xbee.start()
+    def snapshot_sections(self) -> list[StateSection | RingSection]:
+        sections = [
+            StateSection(
+                f"{self.name}/state",
+                self.snapshot_state,
+                self.restore_state,
+                SpaceducksSnapshot,
+            )
+        ]
+        # Restored after the state, which puts the time base back first
+        for series in self.history_window.series:
+            sections.append(RingSection(f"{self.name}/history/{series.label}", series))
+        for series in self.plot_window.series:
+            sections.append(RingSection(f"{self.name}/plot/{series.label}", series))
+        return sections
+
+    def snapshot_state(self) -> SpaceducksSnapshot:
+        # Runs on the snapshot thread
+        return SpaceducksSnapshot(
+            self.start_time,
+            self.heartbeat,
+            self.state,
+            self.stats,
+            list(self.serial_text),
+            list(self.message_text),
+        )
+
+    def restore_state(self, snapshot: SpaceducksSnapshot):
+        # Same time base as before, so the plots carry on where they stopped. The
+        # monotonic clock doesn't survive a reboot, so it comes from the wall clock.
+        self.start_time = snapshot.start_time
+        self.current_time = time.time() - self.start_time
+        self.start_monotonic = time.monotonic() - self.current_time
+        self.heartbeat = snapshot.heartbeat
+        self.state = snapshot.state
+        self.stats = snapshot.stats
+        self.serial_text.extend(snapshot.serial_text)
+        self.message_text.extend(snapshot.message_text)
+        self.plot_window.last_graph_update = self.current_time
+        self.serial_window.just_updated = True
 
     def setup_gui(self) -> None:
         self.serial_window = windows.SerialWindow(self.io, self)
         self.button_panel = windows.ButtonPanel(self.io, self)
         self.plot_window = windows.PlotWindow(self.io, self)
+        self.history_window = windows.HistoryWindow(self.io, self)
+        self.vibration_window = windows.VibrationWindow(self.io, self)
+        self.attitude_window = windows.AttitudeWindow(self.io, self)
         # self.motor_debugger = windows.MotorTesterWindow(self.io, self)
+        self.uplink_window = UplinkWindow(self.io, self.uplink, scope=self.workspace_id)
+        self.link_window = LinkQualityWindow(
+            self.io, [self.link_stats], scope=self.workspace_id
+        )
+        self.alarm_window = self.alarm_banner = None
+        if self.alarms is not None:
+            self.alarm_window = AlarmWindow(
+                self.io, self.alarms, self.ports, scope=self.workspace_id
+            )
+            self.alarm_banner = AlarmBanner(
+                self.io, self.alarms, self.ports, scope=self.workspace_id
+            )
         self.first = True
 
+    def tick(self):
+        self.current_time = time.time() - self.start_time
+
     def draw(self) -> None:
         # Draw the background logo and version stuff
         super().draw()
 
-        self.current_time = time.time() - self.start_time
+        self.tick()
 
-        display_size = self.io.display_size
+        # Pick up anything the ingest workers decoded (no-op for the threaded engine)
+        self.ingest.poll()
+
+        workspace_size = self.workspace_size
 
         imgui.set_next_window_size((280, 500), imgui.Cond_.once)
         imgui.set_next_window_pos(
-            (0 * display_size.x, 0.5 * display_size.y),
+            self.workspace_point(0.0, 0.5),
             imgui.Cond_.once,
             (0.0, 0.5),
         )
-        node_id = imgui.get_id("dashboard_dockspace")
-        with imgui_ctx.begin("Dashboard", flags=imgui.WindowFlags_.no_docking):
+        node_id = imgui.get_id(f"{self.workspace_id}dashboard_dockspace")
+        with imgui_ctx.begin(
+            f"Dashboard###{self.workspace_id}/Dashboard",
+            flags=imgui.WindowFlags_.no_docking,
+        ):
             imgui.dock_space(node_id, (0, 0))
 
         if self.first:
@@ -91,55 +290,168 @@ class SpaceduckInterface(MainInterface):
                 node_id, flags=imgui.DockNodeFlags_.no_docking_split
             )
 
-            imgui.internal.dock_builder_dock_window("Motor Tester", node_id)
-            imgui.internal.dock_builder_dock_window("Serial Console", node_id)
+            imgui.internal.dock_builder_dock_window(self.serial_window.name, node_id)
+            imgui.internal.dock_builder_dock_window(self.uplink_window.name, node_id)
+            imgui.internal.dock_builder_dock_window(self.link_window.name, node_id)
+            imgui.internal.dock_builder_dock_window(self.history_window.name, node_id)
+            imgui.internal.dock_builder_dock_window(self.vibration_window.name, node_id)
+            imgui.internal.dock_builder_dock_window(self.attitude_window.name, node_id)
+            if self.alarm_window is not None:
+                imgui.internal.dock_builder_dock_window(self.alarm_window.name, node_id)
             imgui.internal.dock_builder_finish(node_id)
             self.first = False
 
         self.serial_window.draw_window()
+        self.uplink_window.draw_window()
+        self.link_window.draw_window()
+        self.history_window.draw_window()
+        self.vibration_window.draw_window()
+        self.attitude_window.draw_window()
+        if self.alarm_window is not None:
+            self.alarm_window.draw_window()
 
         imgui.set_next_window_pos(
-            (1 * display_size.x, 0 * display_size.y),
+            self.workspace_point(1.0, 0.0),
             imgui.Cond_.always,
             (1.0, 0.0),
         )
         self.button_panel.draw_window()
 
-        imgui.set_next_window_size((0.55 * display_size.x, -1), imgui.Cond_.always)
+        imgui.set_next_window_size((0.55 * workspace_size.x, -1), imgui.Cond_.always)
         imgui.set_next_window_pos(
-            (0.5 * display_size.x, 0.04 * display_size.y),
+            self.workspace_point(0.5, 0.04),
             imgui.Cond_.always,
             (0.5, 0.0),
         )
         self.plot_window.draw_window()
 
+        if self.alarm_banner is not None:
+            imgui.set_next_window_pos(
+                self.workspace_point(0.5, 0.97),
+                imgui.Cond_.always,
+                (0.5, 1.0),
+            )
+            self.alarm_banner.draw_window()
+
+    def alarm_message(self, text: str):
+        # Runs on whichever thread checked the rows
+        self.message_text.append(text)
+        self.serial_window.just_updated = True
+
+    def receive_data(self, data: MESSAGE_TYPES):
+        """Called from the ingest thread with each decoded frame (threaded mode)"""
+        if type(data) is SensorState:
+            self.record_sensor_rows(
+                np.array([time.monotonic() - self.start_monotonic]),
+                np.array([protocol.sensor_state_to_row(data)]),
+            )
+        self.process_data(data)
+
+    def record_sensor_rows(self, times: np.ndarray, values: np.ndarray):
+        """Full-rate SensorState values for the history and vibration windows"""
+        self.history_window.record(times, values)
+        self.vibration_window.record(times, values)
+
     def process_data(self, data: MESSAGE_TYPES):
         if type(data) is Message:
+            if data.message.startswith("ACK "):
+                self.uplink.acknowledge(data.message[4:])
+
             self.message_text.append(f"{data.message}\n")
             self.serial_window.just_updated = True
 
         elif type(data) is SensorState:
             self.state = data
+            if self.altitude_callout is not None:
+                self.altitude_callout.update(data.altitude)
+
+        elif type(data) is FlightStats:
+            self.stats = data
+            # Comes in every second or so, only the newest is worth saying
+            if self.callouts is not None:
+                self.callouts.submit(str(data), Priority.LOW, f"{self.name}/stats")
 
         # Set the heartbeat since received from sail
         self.heartbeat = self.current_time
 
-    def send_data(self, data: str):
+    def handle_rows(self, rows):
+        """
+        Called from the UI thread with rows decoded by an ingest worker. Only the
+        newest of each kind matters since the state just gets replaced.
+        """
+        kinds = rows[:, KIND_COL]
+
+        sensor_rows = rows[kinds == protocol.KIND_SENSOR_STATE]
+        if len(sensor_rows):
+            # The history wants all of them though
+            self.record_sensor_rows(
+                sensor_rows[:, TIME_COL] - self.start_monotonic,
+                sensor_rows[:, VALUES_COL : VALUES_COL + protocol.NUM_VALUES],
+            )
+            values = sensor_rows[-1, VALUES_COL:]
+            self.process_data(protocol.sensor_state_from_row(values))
+
+        stats_rows = rows[kinds == protocol.KIND_FLIGHT_STATS]
+        if len(stats_rows):
+            values = stats_rows[-1, VALUES_COL:]
+            self.process_data(protocol.flight_stats_from_row(values))
+
+    def handle_text(self, data: str):
+        self.process_data(Message(data))
+
+    def send_data(
+        self, data: str, priority: Priority = Priority.NORMAL, needs_ack: bool = False
+    ) -> UplinkCommand:
         """
-        Function to send data to both of the serial ports.
-        Will append a semicolon at the end, so you don't need to add one ahead of time.
+        Function to queue data to be sent to the xbee.
         Also updates the serial monitor.
 
+        The actual write happens on the uplink thread, so this is safe to call from
+        the UI.
+
         Args:
             data (str): Input data to send
+            priority (Priority): Higher priority commands skip ahead in the queue
+            needs_ack (bool): Resend until the payload replies with ``ACK <data>``
+
+        Returns:
+            UplinkCommand: Handle for checking if the command landed
         """
-        self.xbee.send_data(Message(data))
+        command = self.uplink.submit(data, priority, needs_ack)
 
         self.serial_window.just_updated = True
         self.serial_text.append(f"{data}\n")
         self.message_text.append(f"{data}\n")
 
+        return command
+
+    def write_serial(self, data: str):
+        # Runs on the uplink thread
+        frame = self.encoder.encode(Message(data)) + b";"
+        if self.xbee is None:
+            self.worker_link.write(frame)
+        else:
+            with self.xbee.lock:
+                write_all(self.xbee.xbee, frame)
+
+    def uplink_status(self, command: UplinkCommand):
+        if command.latency is not None:
+            latency_ms = command.latency * 1000
+            self.message_text.append(
+                f"{command.text}: {command.state.value} ({latency_ms:.0f}ms)\n"
+            )
+        else:
+            self.message_text.append(f"{command.text}: {command.state.value}!\n")
+        self.serial_window.just_updated = True
+
     def shutdown_gui(self):
-        self.xbee.stop()
+        self.uplink.stop()
+        self.vibration_window.stop()
+        if self.owns_ingest:
+            self.ingest.stop()
+        if self.xbee is None:
+            self.worker_link.close()
+        else:
+            self.xbee.stop()
         super().shutdown_gui()
         self.read_serial = False
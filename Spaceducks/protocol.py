@@ -0,0 +1,74 @@
+# Flattening of the Spaceducks msgpack messages into ingest ring rows, kept free of
+# GUI imports so it can run in an ingest worker process
+import msgspec
+
+from .shared.state import MESSAGE_TYPES, SensorState, FlightStats
+
+# Row kinds in the ingest ring
+KIND_SENSOR_STATE = 0
+KIND_FLIGHT_STATS = 1
+
+# Most values in one row (a SensorState)
+NUM_VALUES = 11
+
+# Row kind and value index of each field, for alarm rules
+FIELDS = {
+    "altitude": (KIND_SENSOR_STATE, 0),
+    "temperature": (KIND_SENSOR_STATE, 1),
+    **{
+        f"{vector}_{axis}": (KIND_SENSOR_STATE, 2 + 3 * index + offset)
+        for index, vector in enumerate(("orientation", "acceleration", "linear_accel"))
+        for offset, axis in enumerate("xyz")
+    },
+    "current_alt": (KIND_FLIGHT_STATS, 0),
+    "max_acceleration": (KIND_FLIGHT_STATS, 1),
+    "max_temperature": (KIND_FLIGHT_STATS, 2),
+    "max_altitude": (KIND_FLIGHT_STATS, 3),
+    "survivability_rating": (KIND_FLIGHT_STATS, 4),
+}
+
+_decoder = msgspec.msgpack.Decoder(MESSAGE_TYPES)
+
+
+def decode_frame(frame: bytes) -> tuple[int, tuple[float, ...]] | str:
+    data = _decoder.decode(frame)
+
+    if type(data) is SensorState:
+        return KIND_SENSOR_STATE, sensor_state_to_row(data)
+
+    if type(data) is FlightStats:
+        return KIND_FLIGHT_STATS, (
+            data.current_alt,
+            data.max_acceleration,
+            data.max_temperature,
+            data.max_altitude,
+            data.survivability_rating,
+        )
+
+    return data.message
+
+
+def sensor_state_to_row(state: SensorState) -> tuple[float, ...]:
+    return (
+        state.altitude,
+        state.temperature,
+        *state.orientation,
+        *state.acceleration,
+        *state.linear_accel,
+    )
+
+
+def sensor_state_from_row(values) -> SensorState:
+    values = [float(value) for value in values]
+    return SensorState(
+        altitude=values[0],
+        temperature=values[1],
+        orientation=tuple(values[2:5]),
+        acceleration=tuple(values[5:8]),
+        linear_accel=tuple(values[8:11]),
+    )
+
+
+def flight_stats_from_row(values) -> FlightStats:
+    values = [float(value) for value in values]
+    return FlightStats(*values[:5])
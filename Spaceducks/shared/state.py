@@ -37,11 +37,12 @@ class FlightStats(msgspec.Struct, array_like=True, tag=True):
     def __str__(self) -> str:
         """This string will be used for text-to-speech"""
 
+        # Rounded, nobody wants to hear fifteen digits read out
         return (
-            f"Maximum Acceleration: {self.max_acceleration}. "
-            f"Maximum Temperature: {self.max_temperature}. "
-            f"Maximum Altitude: {self.max_altitude}. "
-            f"STEMnaut Survivability: {self.survivability_rating * 100.0} percent."
+            f"Maximum Acceleration: {self.max_acceleration:.1f}. "
+            f"Maximum Temperature: {self.max_temperature:.1f}. "
+            f"Maximum Altitude: {self.max_altitude:.0f}. "
+            f"STEMnaut Survivability: {self.survivability_rating * 100.0:.0f} percent."
         )
 
 
@@ -9,8 +9,14 @@ from typing import Callable
 
 class XbeeInterface:
 
-    def __init__(self, port: str, callback: Callable[[MESSAGE_TYPES], None]) -> None:
-        self.xbee = serial.Serial(port)
+    def __init__(
+        self,
+        port: str | serial.Serial,
+        callback: Callable[[MESSAGE_TYPES], None],
+        stats=None,
+    ) -> None:
+        # Can also be handed a port that's already open
+        self.xbee = port if isinstance(port, serial.Serial) else serial.Serial(port)
         self.encoder = msgspec.msgpack.Encoder()
         self.decoder = msgspec.msgpack.Decoder(MESSAGE_TYPES)
         self.recv_thread = threading.Thread(target=self.receive_thread)
@@ -21,6 +27,9 @@ class XbeeInterface:
         # Callback for whenever we receive data
         self.callback = callback
 
+        # Optional link statistics (PotatoLink.LinkStats on the ground station side)
+        self.stats = stats
+
     def send_data(self, data: MESSAGE_TYPES):
         with self.lock:
             self.xbee.write(self.encoder.encode(data) + b";")
@@ -32,7 +41,9 @@ class XbeeInterface:
     def stop(self):
         self.running = False
         self.xbee.close()
-        self.recv_thread.join()
+        # Might not have been started if something else is reading the port
+        if self.recv_thread.is_alive():
+            self.recv_thread.join()
 
     def process_data(self, data: bytes):
         decoded_data: MESSAGE_TYPES = self.decoder.decode(data)
@@ -59,9 +70,14 @@ class XbeeInterface:
             if data == b";":
                 continue
 
+            if self.stats is not None:
+                self.stats.record_frame(len(data))
+
             try:
                 self.process_data(data)
             except Exception as e:
+                if self.stats is not None:
+                    self.stats.record_decode_failure()
                 logging.error(e)
                 logging.error(f"Error on processing data {data}")
 
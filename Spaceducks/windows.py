@@ -7,7 +7,11 @@ from imgui_bundle import imgui
 from imgui_bundle import imgui_ctx
 from imgui_bundle import implot
 
-from PotatoUI import GUIWindow
+from PotatoUI import GUIWindow, GpuPlot, GpuSeries, StreamingFFT, Waterfall
+from PotatoUI import CursorReadout, DecimatedSeries, PlotTimeRange
+from PotatoUI import AttitudeIndicator, Readout, ReadoutPanel
+from PotatoUI import DISTANCE_UNITS, TEMPERATURE_UNITS
+from PotatoLink import Priority
 
 if TYPE_CHECKING:
     from .interface import SpaceduckInterface
@@ -22,7 +26,7 @@ class SerialWindow(GUIWindow):
         closable: bool = False,
         flags=None,
     ) -> None:
-        super().__init__("Serial Console", io, closable, flags)
+        super().__init__("Serial Console", io, closable, flags, interface.workspace_id)
         self.interface = interface
         self.serial_input_text = ""
         self.just_sent = False
@@ -97,11 +101,21 @@ class ButtonPanel(GUIWindow):
         flags |= imgui.WindowFlags_.no_move
         flags |= imgui.WindowFlags_.no_bring_to_front_on_focus
 
-        super().__init__("ButtonPanel", io, closable, flags)
+        super().__init__("ButtonPanel", io, closable, flags, interface.workspace_id)
 
         self.interface = interface
         self.armed = False
 
+        # Click one to switch units
+        self.readouts = ReadoutPanel(
+            [
+                Readout("altitude", "Altitude: {:.1f}{unit}", DISTANCE_UNITS),
+                Readout("acceleration", "Accel: {:.2f}, {:.2f}, {:.2f}"),
+                Readout("orientation", "Orient: {:.1f}, {:.1f}, {:.1f}"),
+                Readout("temperature", "Temperature: {:.1f}{unit}", TEMPERATURE_UNITS),
+            ]
+        )
+
     def draw_contents(self):
         state = self.interface.state
 
@@ -143,10 +157,7 @@ class ButtonPanel(GUIWindow):
         # imgui.separator()
         # imgui.dummy(-1, -1)
 
-        imgui.text(f"Altitude: {state.altitude:.1f}m")
-        imgui.text(f"Accel: {state.acceleration}")
-        imgui.text(f"Orient: {state.orientation}")
-        imgui.text(f"Temperature: {state.temperature:.1f} \u00B0C")
+        self.readouts.draw(state)
 
         # imgui.separator()
         # imgui.dummy(-1, -1)
@@ -174,23 +185,35 @@ class ButtonPanel(GUIWindow):
                 with imgui_ctx.push_font(self.interface.bigger_icon_font):
                     transmit = imgui.button("\uea83###TransmitButton", (200, 200))
                     if transmit:
-                        self.interface.send_data("transmit")
+                        self.interface.send_data(
+                            "transmit", Priority.HIGH, needs_ack=True
+                        )
 
                 if imgui.button("Echo"):
                     self.interface.send_data("echo")
                 imgui.same_line()
                 if imgui.button("Transmit Now"):
-                    self.interface.send_data("!transmitnow")
+                    self.interface.send_data(
+                        "!transmitnow", Priority.HIGH, needs_ack=True
+                    )
                 if imgui.button("Switch to recover state (shutdown)"):
-                    self.interface.send_data("!recover")
+                    self.interface.send_data(
+                        "!recover", Priority.CRITICAL, needs_ack=True
+                    )
 
 
 class PlotWindow(GUIWindow):
-
-    MAX_PLOT_VALUES = 600
+    """
+    Altitude, acceleration and temperature for the whole session. Both plots share
+    one time axis that follows the newest data until it's panned or zoomed (see
+    PlotTimeRange).
+    """
 
     PLOT_UPDATE_TIME_S = 0.1
 
+    # Per channel, almost 3 hours at one sample every PLOT_UPDATE_TIME_S
+    HISTORY_SAMPLES = 100_000
+
     def __init__(
         self,
         io: imgui._IO,
@@ -205,36 +228,39 @@ class PlotWindow(GUIWindow):
         flags |= imgui.WindowFlags_.always_auto_resize
         flags |= imgui.WindowFlags_.no_decoration
 
-        super().__init__("Plot Window", io, closable, flags)
+        super().__init__("Plot Window", io, closable, flags, interface.workspace_id)
         self.interface = interface
 
-        self.time_data = np.zeros(self.MAX_PLOT_VALUES, dtype=np.float32)
-        self.alt_data = np.zeros(self.MAX_PLOT_VALUES, dtype=np.float32)
-
-        self.accel_data = np.zeros(self.MAX_PLOT_VALUES, dtype=np.float32)
-        self.temp_data = np.zeros(self.MAX_PLOT_VALUES, dtype=np.float32)
+        self.altitude = GpuSeries("Altitude", self.HISTORY_SAMPLES)
+        self.acceleration = GpuSeries("Acceleration", self.HISTORY_SAMPLES)
+        self.temperature = GpuSeries("Temperature", self.HISTORY_SAMPLES)
+        self.series = [self.altitude, self.acceleration, self.temperature]
 
-        self.offset_index = 0
-        self.num_values = 0
+        self.decimated = {
+            series.label: DecimatedSeries(series) for series in self.series
+        }
+        self.time_range = PlotTimeRange()
+        # Both plots show every channel at the cursor
+        self.readout = CursorReadout(self.series)
 
         self.last_graph_update = interface.current_time
 
     def update_data(self):
-        if self.offset_index == self.MAX_PLOT_VALUES:
-            self.offset_index = 0
-
-        self.time_data[self.offset_index] = self.interface.current_time
-        self.alt_data[self.offset_index] = self.interface.state.altitude
+        now = self.interface.current_time
+        state = self.interface.state
 
-        self.accel_data[self.offset_index] = np.sqrt(
-            np.sum(np.asarray(self.interface.state.acceleration) ** 2)
+        self.altitude.append(now, state.altitude)
+        self.acceleration.append(
+            now, np.sqrt(np.sum(np.asarray(state.acceleration) ** 2))
         )
-        self.temp_data[self.offset_index] = self.interface.state.temperature
+        self.temperature.append(now, state.temperature)
 
-        self.offset_index += 1
-
-        if self.num_values < self.MAX_PLOT_VALUES:
-            self.num_values += 1
+    def plot(self, label: str, shaded: bool = False):
+        x, y = self.decimated[label].visible(*self.time_range.visible())
+        if shaded:
+            implot.plot_shaded(label, x, y)
+        else:
+            implot.plot_line(label, x, y)
 
     def draw_contents(self):
         time_since_update = self.interface.current_time - self.last_graph_update
@@ -243,45 +269,182 @@ class PlotWindow(GUIWindow):
             self.update_data()
             self.last_graph_update = self.interface.current_time
 
-        max_width = imgui.get_content_region_avail().x
+        self.time_range.draw_controls()
+        x_range = self.decimated["Altitude"].x_range()
 
+        # Only y fits itself, x is up to the time range
         axis_flags = implot.AxisFlags_.auto_fit
         plot_flags = implot.Flags_.crosshairs
+        subplot_flags = implot.SubplotFlags_.no_title
+        subplot_flags |= implot.SubplotFlags_.link_all_x
 
         implot.push_style_color(implot.Col_.plot_bg, (0, 0, 0, 0.1))
         implot.push_style_color(implot.Col_.frame_bg, (0, 0, 0, 0.1))
         implot.push_style_var(implot.StyleVar_.fill_alpha, 0.35)
 
-        if implot.begin_plot("###AltitudeVeloPlot", flags=plot_flags):
-            implot.setup_axes("", "", axis_flags, axis_flags)
-            implot.plot_shaded(
-                "Altitude",
-                self.time_data,
-                self.alt_data,
-                offset=self.offset_index,
-            )
-
-            implot.plot_line(
-                "Acceleration",
-                self.time_data,
-                self.accel_data,
-                offset=self.offset_index,
-            )
-
-            implot.end_plot()
-
-        if implot.begin_plot("###TempPlot", flags=plot_flags):
-            implot.setup_axes("Time", "", axis_flags, axis_flags)
-
-            implot.plot_shaded(
-                "Temperature",
-                self.time_data,
-                self.temp_data,
-                offset=self.offset_index,
-            )
-            implot.end_plot()
+        size = (-1, 2 * implot.get_style().plot_default_size.y)
+        if implot.begin_subplots("###Plots", 2, 1, size, subplot_flags)[0]:
+            if implot.begin_plot("###AltitudeVeloPlot", flags=plot_flags):
+                implot.setup_axes("", "", 0, axis_flags)
+                self.time_range.setup(x_range)
+                self.plot("Altitude", shaded=True)
+                self.plot("Acceleration")
+                self.readout.draw()
+                self.time_range.handle_input()
+                implot.end_plot()
+
+            if implot.begin_plot("###TempPlot", flags=plot_flags):
+                implot.setup_axes("Time", "", 0, axis_flags)
+                self.time_range.setup(x_range)
+                self.plot("Temperature", shaded=True)
+                self.readout.draw()
+                self.time_range.handle_input()
+                implot.end_plot()
+
+            implot.end_subplots()
 
         implot.pop_style_color()
         implot.pop_style_color()
         implot.pop_style_var()
         # implot.show_demo_window()
+
+
+class HistoryWindow(GUIWindow):
+    """
+    Every SensorState value at full rate, for as long as the history holds. The
+    lines are drawn from GPU buffers so this stays cheap with a whole flight in it.
+    """
+
+    # Per channel, about 45 minutes at 37 Hz
+    HISTORY_SAMPLES = 100_000
+
+    FOLLOW_WINDOW_S = 60
+
+    CHANNELS = (
+        "Altitude",
+        "Temperature",
+        "Orientation X",
+        "Orientation Y",
+        "Orientation Z",
+        "Accel X",
+        "Accel Y",
+        "Accel Z",
+        "Linear Accel X",
+        "Linear Accel Y",
+        "Linear Accel Z",
+    )
+
+    def __init__(
+        self,
+        io: imgui._IO,
+        interface: SpaceduckInterface,
+        closable: bool = False,
+        flags=None,
+    ) -> None:
+        super().__init__("History", io, closable, flags, interface.workspace_id)
+        self.interface = interface
+
+        # Same order as protocol.sensor_state_to_row
+        self.series = [
+            GpuSeries(channel, self.HISTORY_SAMPLES) for channel in self.CHANNELS
+        ]
+        self.plots = [
+            GpuPlot("Altitude / Temperature", self.series[0:2], size=(-1, 160)),
+            GpuPlot("Orientation", self.series[2:5], size=(-1, 160)),
+            GpuPlot("Acceleration", self.series[5:11], size=(-1, 160)),
+        ]
+        self.follow = True
+
+    def record(self, times: np.ndarray, values: np.ndarray):
+        """
+        Add samples, can be called from any thread.
+
+        Args:
+            times (np.ndarray): Seconds since the interface started, one per sample
+            values (np.ndarray): (samples, channels) SensorState rows
+        """
+        for index, series in enumerate(self.series):
+            series.append(times, values[:, index])
+
+    def draw_contents(self):
+        _, self.follow = imgui.checkbox(
+            f"Last {self.FOLLOW_WINDOW_S} s only", self.follow
+        )
+
+        for plot in self.plots:
+            plot.x_window = self.FOLLOW_WINDOW_S if self.follow else None
+            plot.draw(x_label="Time (s)")
+
+
+class VibrationWindow(GUIWindow):
+    """Spectrogram of the three-axis acceleration, for the survivability analysis"""
+
+    # Where each stream's x/y/z are in a SensorState row
+    SOURCES = {
+        "Acceleration": slice(5, 8),
+        "Linear Accel": slice(8, 11),
+    }
+
+    def __init__(
+        self,
+        io: imgui._IO,
+        interface: SpaceduckInterface,
+        closable: bool = False,
+        flags=None,
+    ) -> None:
+        super().__init__("Vibration", io, closable, flags, interface.workspace_id)
+        self.interface = interface
+
+        self.ffts = {source: StreamingFFT() for source in self.SOURCES}
+        self.waterfalls = {
+            source: Waterfall(f"{source}##waterfall", fft, size=(-1, 300))
+            for source, fft in self.ffts.items()
+        }
+
+        for fft in self.ffts.values():
+            fft.start()
+
+    def record(self, times: np.ndarray, values: np.ndarray):
+        """Same as HistoryWindow.record, the FFTs happen on their own threads"""
+        for source, columns in self.SOURCES.items():
+            self.ffts[source].push(times, values[:, columns])
+
+    def stop(self):
+        for fft in self.ffts.values():
+            fft.stop()
+
+    def draw_contents(self):
+        with imgui_ctx.begin_tab_bar("VibrationTabs"):
+            for source, waterfall in self.waterfalls.items():
+                with imgui_ctx.begin_tab_item(source) as tab:
+                    if tab.visible:
+                        rate = self.ffts[source].sample_rate
+                        imgui.text(f"Sample rate: {rate:.1f} Hz")
+                        waterfall.draw()
+
+
+class AttitudeWindow(GUIWindow):
+    """Payload orientation as a 3D model, smoothed between samples"""
+
+    def __init__(
+        self,
+        io: imgui._IO,
+        interface: SpaceduckInterface,
+        closable: bool = False,
+        flags=None,
+    ) -> None:
+        super().__init__("Attitude", io, closable, flags, interface.workspace_id)
+        self.interface = interface
+        self.indicator = AttitudeIndicator()
+        self.last_state = None
+
+    def draw_contents(self):
+        # Every new SensorState is a new object, so this catches each sample once
+        state = self.interface.state
+        if state is not self.last_state:
+            self.last_state = state
+            self.indicator.push(state.orientation)
+
+        self.indicator.draw()
+        heading, roll, pitch = self.indicator.euler()
+        imgui.text(f"Heading {heading:6.1f}  Roll {roll:6.1f}  Pitch {pitch:6.1f}")
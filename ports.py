@@ -1,7 +1,26 @@
+import argparse
+
 import serial.tools.list_ports
 
-ports = serial.tools.list_ports.comports()
+parser = argparse.ArgumentParser(description="List out all the COM ports")
+
+parser.add_argument(
+    "--probe",
+    action="store_true",
+    help="Listen to every port and say which payload is on it, best match first",
+)
+
+args = parser.parse_args()
+
+if args.probe:
+    from PotatoLink import discover
+
+    for result in discover():
+        print(result)
+
+else:
+    ports = serial.tools.list_ports.comports()
 
-# Just list out all the COM ports for convenience
-for port, desc, hwid in sorted(ports):
-    print(f"{port}: {desc} [{hwid}]")
+    # Just list out all the COM ports for convenience
+    for port, desc, hwid in sorted(ports):
+        print(f"{port}: {desc} [{hwid}]")
@@ -0,0 +1,164 @@
+import argparse
+from startup_profile import StartupProfiler
+
+# Everything heavy is imported in main(), after the station is connected
+
+
+# rough framerate, should be slightly higher due to render time
+FRAMERATE = 90
+
+
+msg = "Very Cool Ground Station Software, watching another ground station"
+
+parser = argparse.ArgumentParser(description=msg)
+
+parser.add_argument(
+    "station",
+    type=str,
+    help="Ground station running with --publish, as host or host:port",
+)
+
+parser.add_argument(
+    "--timeout",
+    type=float,
+    default=10.0,
+    help="Seconds to wait for the station before giving up",
+)
+
+parser.add_argument(
+    "-f",
+    "--fullscreen",
+    action="store_true",
+    help="Launch interface in full screen mode (borderless)",
+)
+
+parser.add_argument(
+    "--profile-startup",
+    action="store_true",
+    help="Print how long imports and each startup stage took",
+)
+
+parser.add_argument(
+    "--default-gc",
+    action="store_true",
+    help="Leave garbage collection alone instead of freezing startup objects and "
+    "running full collections between frames",
+)
+
+parser.add_argument(
+    "--alarms",
+    type=str,
+    metavar="FILE",
+    help="JSON list of threshold alarm rules to check every sample against",
+)
+
+parser.add_argument(
+    "--callouts",
+    nargs="?",
+    const="auto",
+    choices=("auto", "pyttsx3", "espeak", "none"),
+    metavar="ENGINE",
+    help="Read flight stats, altitude and alarms out loud, with pyttsx3, espeak "
+    "or none (default: whichever is installed)",
+)
+
+args = parser.parse_args()
+
+
+def main(args):
+    profiler = StartupProfiler(args.profile_startup)
+
+    # Connect first, the snapshot says which payloads the station has
+    from PotatoLink import RemoteLinks
+
+    host, _, port = args.station.partition(":")
+    remote = RemoteLinks(host, int(port) if port else 5760)
+    callouts = None
+    if args.callouts is not None:
+        from PotatoLink import CalloutService, speech_backend
+
+        callouts = CalloutService(speech_backend(args.callouts))
+        callouts.start()
+
+    alarms = None
+    if args.alarms is not None:
+        from PotatoLink import AlarmEngine, load_rules
+
+        alarms = AlarmEngine(load_rules(args.alarms))
+        remote.check_alarms(alarms)
+    remote.start()
+    try:
+        decoders = remote.wait_for_snapshot(args.timeout)
+    except TimeoutError as e:
+        remote.stop()
+        parser.error(str(e))
+    profiler.mark("station connected")
+
+    kraken_ports = [
+        link for link, decoder in decoders.items() if decoder == "Kraken.protocol"
+    ]
+    spaceducks_ports = [
+        link for link, decoder in decoders.items() if decoder == "Spaceducks.protocol"
+    ]
+
+    from PotatoUI import SessionManager
+
+    profiler.mark("GUI imported")
+
+    session = SessionManager(
+        f"PotatoStation ({args.station})",
+        1280,
+        720,
+        framerate=FRAMERATE,
+        fullscreen=args.fullscreen,
+        ingest=remote.ingest,
+    )
+
+    try:
+        if kraken_ports:
+            from Kraken import KrakenInterface
+
+            session.add_workspace(
+                KrakenInterface,
+                "Kraken Control Panel",
+                kraken_ports[0],
+                kraken_ports[1] if len(kraken_ports) > 1 else None,
+                early=remote,
+                alarms=alarms,
+                callouts=callouts,
+            )
+
+        for port in spaceducks_ports:
+            from Spaceducks import SpaceduckInterface
+
+            session.add_workspace(
+                SpaceduckInterface,
+                "Spaceduck Control Panel",
+                port,
+                early=remote,
+                alarms=alarms,
+                callouts=callouts,
+            )
+        profiler.mark("GUI ready", f"replayed {remote.replayed} rows of history")
+
+        session.update_gui()
+        profiler.mark("first frame drawn")
+        profiler.report()
+
+        if not args.default_gc:
+            session.enable_gc_control()
+
+        while not session.should_close:
+            session.update_gui()
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:
+        session.shutdown_gui()
+        if callouts is not None:
+            callouts.stop()
+
+
+if __name__ == "__main__":
+    main(args)
@@ -0,0 +1,250 @@
+import argparse
+from startup_profile import StartupProfiler
+
+# Everything heavy is imported in main(), after the serial ports are open
+
+
+# rough framerate, should be slightly higher due to render time
+FRAMERATE = 90
+
+
+msg = "Very Cool Ground Station Software, every payload in one window"
+
+parser = argparse.ArgumentParser(description=msg)
+
+parser.add_argument(
+    "--kraken",
+    type=str,
+    default=None,
+    help="COM port for the Kraken XBee/Arduino",
+)
+
+parser.add_argument(
+    "--kraken_2",
+    type=str,
+    default=None,
+    help="Second COM port for Kraken",
+)
+
+parser.add_argument(
+    "--spaceducks",
+    type=str,
+    default=None,
+    help="COM port for the Spaceducks XBee",
+)
+
+parser.add_argument(
+    "--auto",
+    action="store_true",
+    help="Find whichever payload ports weren't given by listening to every serial "
+    "port",
+)
+
+parser.add_argument(
+    "--workers",
+    action="store_true",
+    help="Read and decode each serial port in its own process",
+)
+
+parser.add_argument(
+    "-f",
+    "--fullscreen",
+    action="store_true",
+    help="Launch interface in full screen mode (borderless)",
+)
+
+parser.add_argument(
+    "--profile-startup",
+    action="store_true",
+    help="Print how long imports and each startup stage took",
+)
+
+parser.add_argument(
+    "--default-gc",
+    action="store_true",
+    help="Leave garbage collection alone instead of freezing startup objects and "
+    "running full collections between frames",
+)
+
+parser.add_argument(
+    "--resume",
+    action="store_true",
+    help="Bring back the telemetry and UI state saved by the last run",
+)
+
+parser.add_argument(
+    "--snapshot",
+    type=str,
+    default="session.snapshot",
+    metavar="FILE",
+    help="Where the state gets saved for --resume (default session.snapshot)",
+)
+
+parser.add_argument(
+    "--publish",
+    type=int,
+    metavar="PORT",
+    help="Rebroadcast telemetry to remote viewers over TCP on PORT",
+)
+
+parser.add_argument(
+    "--alarms",
+    type=str,
+    metavar="FILE",
+    help="JSON list of threshold alarm rules to check every sample against",
+)
+
+parser.add_argument(
+    "--callouts",
+    nargs="?",
+    const="auto",
+    choices=("auto", "pyttsx3", "espeak", "none"),
+    metavar="ENGINE",
+    help="Read flight stats, altitude and alarms out loud, with pyttsx3, espeak "
+    "or none (default: whichever is installed)",
+)
+
+args = parser.parse_args()
+
+
+def main(args):
+    profiler = StartupProfiler(args.profile_startup)
+
+    # Staged startup: get the ports open and recording before the GUI is even
+    # imported, whatever arrives while booting gets replayed once it's up
+    from PotatoLink import EarlyLinks
+    import Kraken.protocol
+    import Spaceducks.protocol
+
+    baudrates = {}
+    if args.auto:
+        from PotatoLink import discover, matching
+
+        # Opening a port can reset an Arduino, so the ones given are left alone
+        results = discover(exclude=(args.kraken, args.kraken_2, args.spaceducks))
+        for result in results:
+            print(result)
+        baudrates = {result.port: result.baudrate for result in results}
+
+        kraken = [result.port for result in matching(results, "Kraken")]
+        if args.kraken is None and kraken:
+            args.kraken = kraken.pop(0)
+        if args.kraken is not None and args.kraken_2 is None and kraken:
+            args.kraken_2 = kraken.pop(0)
+        spaceducks = matching(results, "Spaceducks")
+        if args.spaceducks is None and spaceducks:
+            args.spaceducks = spaceducks[0].port
+        profiler.mark(
+            "ports discovered",
+            f"Kraken {args.kraken} {args.kraken_2}, Spaceducks {args.spaceducks}",
+        )
+
+    early = EarlyLinks(args.workers)
+    for port in (args.kraken, args.kraken_2):
+        if port is not None:
+            early.open(port, baudrates.get(port, 9600), Kraken.protocol.decode_frame)
+    if args.spaceducks is not None:
+        early.open(
+            args.spaceducks,
+            baudrates.get(args.spaceducks, 9600),
+            Spaceducks.protocol.decode_frame,
+            Spaceducks.protocol.NUM_VALUES,
+        )
+
+    # Ingest, publisher and callouts run from here on, so everything after has to
+    # stop them again, also if building the GUI fails
+    publisher = callouts = session = snapshot = None
+    try:
+        if args.publish is not None:
+            from PotatoLink import TelemetryPublisher
+
+            publisher = TelemetryPublisher(port=args.publish)
+            early.publish(publisher)
+            publisher.start()
+
+        if args.callouts is not None:
+            from PotatoLink import CalloutService, speech_backend
+
+            callouts = CalloutService(speech_backend(args.callouts))
+            callouts.start()
+
+        alarms = None
+        if args.alarms is not None:
+            from PotatoLink import AlarmEngine, load_rules
+
+            alarms = AlarmEngine(load_rules(args.alarms))
+            early.check_alarms(alarms)
+
+        early.start()
+        profiler.mark("serial ports open")
+
+        from PotatoUI import SessionManager, SessionSnapshot
+
+        profiler.mark("GUI imported")
+
+        session = SessionManager(
+            "PotatoStation",
+            1280,
+            720,
+            framerate=FRAMERATE,
+            fullscreen=args.fullscreen,
+            ingest=early.ingest,
+        )
+        snapshot = SessionSnapshot(args.snapshot, resume=args.resume)
+
+        if args.kraken is not None:
+            from Kraken import KrakenInterface
+
+            session.add_workspace(
+                KrakenInterface,
+                "Kraken Control Panel",
+                args.kraken,
+                args.kraken_2,
+                early=early,
+                snapshot=snapshot,
+                alarms=alarms,
+                callouts=callouts,
+            )
+
+        if args.spaceducks is not None:
+            from Spaceducks import SpaceduckInterface
+
+            session.add_workspace(
+                SpaceduckInterface,
+                "Spaceduck Control Panel",
+                args.spaceducks,
+                early=early,
+                snapshot=snapshot,
+                alarms=alarms,
+                callouts=callouts,
+            )
+        snapshot.start()
+        profiler.mark("GUI ready", f"replayed {early.replayed} early frames")
+
+        session.update_gui()
+        profiler.mark("first frame drawn")
+        profiler.report()
+
+        if not args.default_gc:
+            session.enable_gc_control()
+
+        while not session.should_close:
+            session.update_gui()
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:
+        if session is not None:
+            session.shutdown_gui()
+        if snapshot is not None:
+            snapshot.stop()
+        early.stop()
+        if publisher is not None:
+            publisher.stop()
+        if callouts is not None:
+            callouts.stop()
+
+
+if __name__ == "__main__":
+    main(args)
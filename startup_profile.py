@@ -0,0 +1,123 @@
+"""
+Startup profiling for the entry points (``--profile-startup``). Prints a report like
+``python -X importtime`` for everything imported after it's enabled, plus how long
+each startup stage took.
+
+Only uses the standard library, so importing it doesn't skew the numbers.
+"""
+
+from __future__ import annotations
+import importlib.abc
+import sys
+import time
+
+
+class _TimedLoader:
+    """Wraps a module's loader to time executing it"""
+
+    def __init__(self, loader, profiler: StartupProfiler, name: str) -> None:
+        self._loader = loader
+        self._profiler = profiler
+        self._name = name
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._profiler._begin_import()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._end_import(self._name)
+
+    def __getattr__(self, name):
+        # Anything else (resource readers, get_data, ...) goes to the real loader
+        return getattr(self._loader, name)
+
+
+class _ImportTimer(importlib.abc.MetaPathFinder):
+    def __init__(self, profiler: StartupProfiler) -> None:
+        self.profiler = profiler
+
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+
+        # Namespace packages don't execute anything
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self.profiler, name)
+        return spec
+
+
+class StartupProfiler:
+    """
+    Does nothing unless enabled, so entry points can always call ``mark()`` and
+    ``report()``.
+    """
+
+    def __init__(self, enabled: bool) -> None:
+        self.enabled = enabled
+        self.start = time.perf_counter()
+        self.stages: list[tuple[str, float, str]] = []
+
+        # (self us, cumulative us, depth, name) in the order imports finish
+        self.imports: list[tuple[int, int, int, str]] = []
+        # Start time and time spent in nested imports, per import in progress
+        self._stack: list[list[float]] = []
+
+        self._timer = _ImportTimer(self)
+        if enabled:
+            sys.meta_path.insert(0, self._timer)
+
+    def _begin_import(self):
+        self._stack.append([time.perf_counter(), 0.0])
+
+    def _end_import(self, name: str):
+        started, nested = self._stack.pop()
+        cumulative = time.perf_counter() - started
+        if self._stack:
+            self._stack[-1][1] += cumulative
+        self.imports.append(
+            (
+                int((cumulative - nested) * 1e6),
+                int(cumulative * 1e6),
+                len(self._stack),
+                name,
+            )
+        )
+
+    def mark(self, stage: str, note: str = ""):
+        """Record that a startup stage just finished"""
+        if self.enabled:
+            self.stages.append((stage, time.perf_counter() - self.start, note))
+
+    def report(self, top: int = 15):
+        """Print the report to stderr and stop timing imports"""
+        if not self.enabled:
+            return
+        if self._timer in sys.meta_path:
+            sys.meta_path.remove(self._timer)
+
+        out = sys.stderr
+        print("import time: self [us] | cumulative | imported package", file=out)
+        for self_us, cumulative_us, depth, name in self.imports:
+            print(
+                f"import time: {self_us:>9} | {cumulative_us:>10} | {'  ' * depth}{name}",
+                file=out,
+            )
+
+        print(f"\nSlowest {top} imports (cumulative):", file=out)
+        slowest = sorted(self.imports, key=lambda entry: entry[1], reverse=True)
+        for _, cumulative_us, _, name in slowest[:top]:
+            print(f"  {cumulative_us / 1000:9.1f} ms  {name}", file=out)
+
+        print("\nStartup stages:", file=out)
+        for stage, elapsed, note in self.stages:
+            note = f"  ({note})" if note else ""
+            print(f"  {elapsed * 1000:9.1f} ms  {stage}{note}", file=out)